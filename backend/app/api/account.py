@@ -1,33 +1,66 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Dict, Any, Optional
 from app.services.repository import account_repo
+from app.services.executor import execution_manager
+from app.services.positions_feed import positions_feed
+from app.utils.http_cache import data_versions, make_etag, content_digest, etag_matches, set_etag, not_modified
 
 router = APIRouter()
 
+# 摘要中的累積股息與總報酬來自這些資料表
+LEDGER_TABLES = ("dividends", "trade_history")
+
 @router.get("/list")
 async def get_account_list():
     """
     獲取所有可用的帳戶清單 (用於下拉選單)
     """
-    return account_repo.get_account_list()
+    return await execution_manager.run_io(account_repo.get_account_list)
 
 @router.get("/summary")
-async def get_account_summary(account_hash: Optional[str] = Query(None)):
+async def get_account_summary(request: Request, response: Response, account_hash: Optional[str] = Query(None)):
     """
     獲取指定帳戶的摘要資訊
+    ETag 由帳戶快照內容與交易帳本版本組成，未變動時略過資料庫統計直接回傳 304
     """
-    return account_repo.get_account_summary(account_hash)
+    data = await execution_manager.run_io(account_repo.get_account_data, account_hash)
+    if "error" not in data:
+        etag = make_etag("summary", account_hash, content_digest(data), await execution_manager.run_io(data_versions.get, *LEDGER_TABLES))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+    return await execution_manager.run_io(account_repo.build_summary, data, account_hash)
 
 @router.get("/positions")
-async def get_account_positions(account_hash: Optional[str] = Query(None)):
+async def get_account_positions(request: Request, response: Response, account_hash: Optional[str] = Query(None)):
+    """
+    獲取指定帳戶的持倉清單 (持倉未變動時回傳 304)
+    """
+    data = await execution_manager.run_io(account_repo.get_account_data, account_hash)
+    positions = account_repo.build_positions(data)
+    if "error" not in data:
+        etag = make_etag("positions", account_hash, content_digest(positions))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+    return positions
+
+@router.get("/positions/delta")
+async def get_account_positions_delta(account_hash: Optional[str] = Query(None),
+                                      since: Optional[str] = Query(None, description="客戶端最後看過的版本")):
     """
-    獲取指定帳戶的持倉清單
+    持倉增量：只回傳自 since 版本後變動 / 新增 / 移除的持倉與新版本號
+    since 未提供、過舊或伺服器已重啟時回傳完整清單 (full=true)
     """
-    return account_repo.get_positions(account_hash)
+    data = await execution_manager.run_io(account_repo.get_account_data, account_hash)
+    if "error" in data:
+        raise HTTPException(status_code=502, detail=data["error"])
+    positions = account_repo.build_positions(data)
+    return await execution_manager.run_io(positions_feed.delta, account_hash or "default", positions, since)
 
 @router.get("/history")
 async def get_account_history():
     """
     獲取帳戶資產歷史數據 (用於圖表)
     """
-    return account_repo.get_history_from_db()
+    return await execution_manager.run_io(account_repo.get_history_from_db)
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from app.core.config import settings
 from app.db.database import SessionLocal
 from app.models.persistence import HistoricalBalance, AssetHistory, TransactionHistory
 from app.utils.risk import calculate_risk_metrics, calculate_weighted_beta
+from app.services.executor import execution_manager
+from app.utils.http_cache import data_versions, make_etag, etag_matches, set_etag, not_modified
+from app.utils.json_response import FastJSONResponse, to_columnar
+from types import SimpleNamespace
 from typing import List
 import datetime
 import pandas as pd
 
 router = APIRouter()
 
+# 各端點依賴的資料表，任一表寫入後 ETag 即改變
+HISTORY_TABLES = ("historical_balances", "asset_history")
+# Beta 取自持倉，持倉變動由 Auto-Snapshot 寫入 holding_snapshots 反映
+RISK_TABLES = HISTORY_TABLES + ("transaction_history", "holding_snapshots")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -18,10 +28,31 @@ def get_db():
         db.close()
 
 @router.get("/history")
-def get_historical_net_worth(account_hash: str = None, db: Session = Depends(get_db)):
+def get_historical_net_worth(request: Request, account_hash: str = None,
+                             shape: str = Query("rows", description="rows (逐日物件) 或 columnar (每個序列一個陣列)"),
+                             db: Session = Depends(get_db)):
     """
     聯合查詢 HistoricalBalance (CSV 匯入) 與 AssetHistory (即時同步)，回傳趨勢數據。
-    支援依 account_hash 過濾。
+    支援依 account_hash 過濾；資料未變動時以 304 回應 If-None-Match。
+    shape=columnar 時每個帳戶鍵只出現一次，多帳戶長期資料的體積大幅縮小
+    """
+    if shape not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="shape 只支援 rows 或 columnar")
+    etag = make_etag("history", account_hash, shape, data_versions.get(*HISTORY_TABLES))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    result = build_history(db, account_hash)
+    if shape == "columnar":
+        result = {**to_columnar(result["history"]), "accounts": result["accounts"]}
+    # 直接回傳 Response，略過 jsonable_encoder 逐筆轉換
+    response = FastJSONResponse(result)
+    set_etag(response, etag)
+    return response
+
+def build_history(db: Session, account_hash: str = None):
+    """
+    資產走勢計算本體，/history 與 /dashboard 共用
     """
     # 1. 取得所有不重複的帳戶 ID (從 HistoricalBalance)，用於前端收集 Series
     account_ids_query = db.query(HistoricalBalance.account_id).distinct()
@@ -99,7 +130,7 @@ def get_historical_net_worth(account_hash: str = None, db: Session = Depends(get
     }
 
 @router.get("/risk-metrics")
-def get_risk_analysis(account_hash: str = None, db: Session = Depends(get_db)):
+def get_risk_analysis(request: Request, response: Response, account_hash: str = None, db: Session = Depends(get_db)):
     """
     獲取風險分析指標。
     逻辑：
@@ -107,9 +138,45 @@ def get_risk_analysis(account_hash: str = None, db: Session = Depends(get_db)):
     2. 使用 pandas 計算每日報酬率
     3. 計算年化波動率、夏普比率、最大回撤、VaR
     4. 獲取即時持倉計算 Beta
+    資料未變動時以 304 回應 If-None-Match，略過整個計算
+    Beta 來自即時持倉 (不在資料表版本內)，先算出 Beta 並與模式一併納入 ETag
+    """
+    account_data = fetch_beta_account_data(account_hash)
+    beta = compute_beta(account_data)
+    etag = make_etag("risk", account_hash, settings.APP_MODE.strip().upper(), beta, data_versions.get(*RISK_TABLES))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return build_risk_metrics(db, account_hash, account_data=account_data)
+
+def fetch_beta_account_data(account_hash: str = None) -> dict:
+    """
+    取得計算 Beta 用的即時帳戶快照 (失敗時回傳含 error 的 dict，不再重試)
     """
     from app.services.schwab_client import schwab_client
-    
+    try:
+        return schwab_client.get_real_account_data(account_hash)
+    except Exception as e:
+        print(f"Error calculating weighted beta: {e}")
+        return {"error": str(e)}
+
+def compute_beta(account_data: dict) -> float:
+    """
+    以即時持倉計算加權 Beta；無法取得持倉時為 1.0
+    """
+    try:
+        if "error" not in account_data and account_data.get('accounts'):
+            acc_info = account_data['accounts'][0]
+            return calculate_weighted_beta(acc_info.get('holdings', []), acc_info.get('total_balance', 0))
+    except Exception as e:
+        print(f"Error calculating weighted beta: {e}")
+    return 1.0
+
+def build_risk_metrics(db: Session, account_hash: str = None, account_data: dict = None):
+    """
+    風險指標計算本體；account_data 為已取得的帳戶快照 (用於 Beta)，未提供時才向嘉信查詢
+    """
+
     # --- 1. 抓取歷史序列 (total_value) ---
     data_by_date = {}
 
@@ -146,14 +213,18 @@ def get_risk_analysis(account_hash: str = None, db: Session = Depends(get_db)):
     df_history = pd.DataFrame(history_list)
     
     # --- 1.5 抓取交易紀錄 (用於 TWR 修正) ---
-    tx_query = db.query(TransactionHistory)
+    tx_query = db.query(TransactionHistory.date, TransactionHistory.action,
+                        TransactionHistory.description, TransactionHistory.amount)
     if account_hash:
         tx_query = tx_query.filter(TransactionHistory.account_id == account_hash)
-    transactions = tx_query.all()
+    # 轉為可 pickle 的輕量物件，才能交給 CPU 行程池
+    transactions = [SimpleNamespace(date=t.date, action=t.action, description=t.description, amount=t.amount)
+                    for t in tx_query.all()]
 
     # --- 2. 呼叫工具函數計算指標 ---
     # 傳送完整的 DataFrame 以支援智慧型模糊對齊 (Smart Flow Alignment)
-    vol, sharpe, mdd, var = calculate_risk_metrics(df_history, transactions=transactions)
+    # 逐日迴圈的 TWR 計算在行程池中執行，不佔用 API 執行緒的 GIL
+    vol, sharpe, mdd, var = execution_manager.run_cpu_blocking(calculate_risk_metrics, df_history, transactions)
     
     # 計算年化報酬率 (由夏普比率與波動率反推)
     annual_return = float(sharpe * vol + 0.02)
@@ -168,15 +239,8 @@ def get_risk_analysis(account_hash: str = None, db: Session = Depends(get_db)):
     }
 
     # --- 3. 額外計算 Beta (基於當前持倉) ---
-    weighted_beta = 1.0
-    try:
-        real_data = schwab_client.get_real_account_data(account_hash)
-        if "error" not in real_data and real_data.get('accounts'):
-            acc_info = real_data['accounts'][0]
-            weighted_beta = calculate_weighted_beta(acc_info.get('holdings', []), acc_info.get('total_balance', 0))
-    except Exception as e:
-        print(f"Error calculating weighted beta: {e}")
-
-    metrics["beta"] = weighted_beta
+    if account_data is None:
+        account_data = fetch_beta_account_data(account_hash)
+    metrics["beta"] = compute_beta(account_data)
     
     return metrics
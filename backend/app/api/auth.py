@@ -1,8 +1,6 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter
 from app.core.config import settings
-from app.db.database import get_db
-from app.models.persistence import SystemSetting
+from app.services.settings_store import settings_store
 from app.services.schwab_auth import fetch_token_from_schwab, token_storage
 from app.services.schwab_client import schwab_client
 import urllib.parse
@@ -15,8 +13,9 @@ def get_auth_status():
     回傳當前是否已完成嘉信連線，並進行實時驗證
     """
     try:
-        # 1. 先初步檢查資料庫是否有 token
-        token_data = schwab_client._load_token_from_db()
+        # 1. 先初步檢查是否有 token (記憶體快取，僅首次讀取資料庫)
+        from app.services.token_manager import token_manager
+        token_data = token_manager.get()
         if not token_data:
             return {"authenticated": False}
         
@@ -32,25 +31,25 @@ def get_auth_status():
     return {"authenticated": False}
 
 @router.get("/login")
-def get_login_url(db: Session = Depends(get_db)):
+def get_login_url():
     """
     產生並回傳 Schwab 授權 URL
-    優先從資料庫 SystemSetting 讀取憑證，若無則使用環境變數
+    優先從 SystemSetting (settings_store 快取) 讀取憑證，若無則使用環境變數
     """
     # 讀取 API Key (client_id)
-    db_api_key = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_API_KEY").first()
+    db_api_key = settings_store.get("SCHWAB_API_KEY")
     # 優先順序：DB > settings.SCHWAB_API_KEY > settings.SCHWAB_APP_KEY
-    client_id = db_api_key.value if db_api_key else (settings.SCHWAB_API_KEY or settings.SCHWAB_APP_KEY)
+    client_id = db_api_key if db_api_key is not None else (settings.SCHWAB_API_KEY or settings.SCHWAB_APP_KEY)
     
     # 讀取 Redirect URI
-    db_redirect_uri = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_REDIRECT_URI").first()
-    redirect_uri = db_redirect_uri.value if db_redirect_uri else settings.SCHWAB_REDIRECT_URI
+    db_redirect_uri = settings_store.get("SCHWAB_REDIRECT_URI")
+    redirect_uri = db_redirect_uri if db_redirect_uri is not None else settings.SCHWAB_REDIRECT_URI
     
     # 偵錯日誌
     print(f"🔍 [DEBUG] get_login_url")
     print(f"  - DB Key found: {db_api_key is not None}")
-    if db_api_key:
-        print(f"  - DB Key value: {db_api_key.value[:4] if db_api_key.value else 'EMPTY'}***")
+    if db_api_key is not None:
+        print(f"  - DB Key value: {db_api_key[:4] if db_api_key else 'EMPTY'}***")
     print(f"  - Settings.SCHWAB_API_KEY: {settings.SCHWAB_API_KEY[:4] if settings.SCHWAB_API_KEY else 'NONE'}***")
     print(f"  - Settings.SCHWAB_APP_KEY: {settings.SCHWAB_APP_KEY[:4] if settings.SCHWAB_APP_KEY else 'NONE'}***")
     print(f"  - Final client_id: {client_id}")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.services.repository import account_repo
+from app.services.executor import execution_manager
 
 router = APIRouter()
 
@@ -13,7 +14,8 @@ async def chat_with_copilot(request: ChatRequest):
     Rule-Based AI Copilot 模擬引擎
     """
     user_msg = request.message.lower()
-    data = account_repo.get_account_data()
+    # 帳戶資料需要呼叫嘉信 API 與 SQLite，交給 I/O 執行緒池避免阻塞 event loop
+    data = await execution_manager.run_io(account_repo.get_account_data)
     
     if "error" in data:
         return {"reply": "抱歉，我現在無法讀取您的帳戶數據。"}
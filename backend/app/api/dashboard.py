@@ -0,0 +1,67 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.db.database import SessionLocal
+from app.services.repository import account_repo
+from app.services.executor import execution_manager
+from app.api.analytics import build_history, build_risk_metrics
+from app.utils.json_response import to_columnar
+
+router = APIRouter()
+
+DASHBOARD_SECTIONS = ("summary", "positions", "history", "risk")
+# 需要帳戶快照 (嘉信 API) 的區塊；只選 history 時不必呼叫券商
+SNAPSHOT_SECTIONS = {"summary", "positions", "risk"}
+
+def _with_session(builder, *args, **kwargs):
+    # 每個區塊在各自的執行緒中使用獨立 Session (Session 不可跨執行緒共用)
+    db = SessionLocal()
+    try:
+        return builder(db, *args, **kwargs)
+    finally:
+        db.close()
+
+@router.get("")
+async def get_dashboard(
+    account_hash: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="以逗號分隔的區塊：summary,positions,history,risk"),
+    shape: str = Query("rows", description="history 區塊格式：rows 或 columnar")
+):
+    """
+    Dashboard 複合端點：只取得一次帳戶快照，並行計算摘要、持倉、資產走勢與風險指標
+    """
+    sections = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(DASHBOARD_SECTIONS)
+    unknown = [s for s in sections if s not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知的區塊: {', '.join(unknown)}")
+    if shape not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="shape 只支援 rows 或 columnar")
+
+    data = None
+    if SNAPSHOT_SECTIONS.intersection(sections):
+        data = await execution_manager.run_io(account_repo.get_account_data, account_hash)
+
+    builders = {
+        "summary": lambda: execution_manager.run_io(account_repo.build_summary, data, account_hash),
+        "positions": lambda: execution_manager.run_io(account_repo.build_positions, data),
+        "history": lambda: execution_manager.run_io(_with_session, build_history, account_hash),
+        "risk": lambda: execution_manager.run_io(_with_session, build_risk_metrics, account_hash, data),
+    }
+    results = await asyncio.gather(*(builders[s]() for s in sections), return_exceptions=True)
+
+    response = {}
+    errors = {}
+    for section, result in zip(sections, results):
+        if isinstance(result, Exception):
+            # 單一區塊失敗不影響其他區塊
+            print(f"❌ [DASHBOARD] Section '{section}' failed: {result}")
+            errors[section] = str(result)
+            response[section] = None
+        else:
+            response[section] = result
+    if shape == "columnar" and response.get("history"):
+        history = response["history"]
+        response["history"] = {**to_columnar(history["history"]), "accounts": history["accounts"]}
+    if errors:
+        response["errors"] = errors
+    return response
@@ -0,0 +1,55 @@
+import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from app.services.executor import execution_manager
+from app.services.exporter import EXPORT_DATASETS, EXPORT_FORMATS, exporter, format_available
+from app.utils.http_cache import data_versions, make_etag, etag_matches, not_modified
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+async def export_dataset(
+    request: Request,
+    dataset: str,
+    format: str = Query("csv", description="csv / ndjson / parquet"),
+    account_hash: Optional[str] = Query(None),
+    start_date: Optional[datetime.date] = Query(None),
+    end_date: Optional[datetime.date] = Query(None),
+):
+    """
+    串流匯出完整資料集 (依日期由舊到新)，以伺服器端游標分批讀取，不一次載入記憶體
+    中斷的下載可帶 Range (+ If-Range) 續傳：同一資料版本的匯出結果會快取成檔案
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"dataset 只支援 {', '.join(EXPORT_DATASETS)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format 只支援 {', '.join(EXPORT_FORMATS)}")
+    if not format_available(format):
+        raise HTTPException(status_code=501, detail="Parquet 匯出需要安裝 pyarrow")
+
+    table = EXPORT_DATASETS[dataset][0].__tablename__
+    filters = {"account_hash": account_hash, "start_date": start_date, "end_date": end_date}
+    # 版本包含資料庫指紋：其他程序匯入後不會沿用舊的快取檔
+    version = await execution_manager.run_io(data_versions.get, table)
+    key = make_etag("export", dataset, format, account_hash, start_date, end_date, version)
+    # 同一資料版本的輸出位元組完全相同，使用強 ETag 供 If-Range 續傳比對
+    etag = key[2:]
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    filename = f"{dataset}_{account_hash or 'all'}_{datetime.date.today().isoformat()}.{format}"
+    headers = {"etag": etag, "cache-control": "no-cache"}
+
+    path = exporter.cached(key, format)
+    if path is None and request.headers.get("range"):
+        # 續傳請求但快取已過期 (或伺服器重啟)：先完整產生檔案再回應指定區段
+        path = await execution_manager.run_io(exporter.materialize, key, dataset, format, **filters)
+    if path is not None:
+        # FileResponse 處理 Range / If-Range (ETag 不符時回傳完整檔案)
+        return FileResponse(path, media_type=EXPORT_FORMATS[format], filename=filename, headers=headers)
+
+    headers["content-disposition"] = f'attachment; filename="{filename}"'
+    headers["accept-ranges"] = "bytes"
+    return StreamingResponse(exporter.stream(key, dataset, format, **filters),
+                             media_type=EXPORT_FORMATS[format], headers=headers)
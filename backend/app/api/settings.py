@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 from pydantic import BaseModel
 from app.db.database import get_db
-from app.models.persistence import SystemSetting
+from app.services.settings_store import settings_store
 
 router = APIRouter(tags=["settings"])
 
@@ -16,18 +16,18 @@ def mask_value(value: str) -> str:
     return "*" * (len(value) - 4) + value[-4:]
 
 @router.get("")
-def get_settings(db: Session = Depends(get_db)):
+def get_settings():
     keys = ["SCHWAB_API_KEY", "SCHWAB_API_SECRET", "SCHWAB_REDIRECT_URI"]
     results = {}
+    stored = settings_store.get_many(keys)
     
     for key in keys:
-        setting = db.query(SystemSetting).filter(SystemSetting.key == key).first()
-        if setting:
+        if key in stored:
             # 對於 Key 和 Secret 進行遮罩
             if key in ["SCHWAB_API_KEY", "SCHWAB_API_SECRET"]:
-                results[key] = mask_value(setting.value)
+                results[key] = mask_value(stored[key])
             else:
-                results[key] = setting.value
+                results[key] = stored[key]
         else:
             # 嘗試從環境變數讀取（僅作為 fallback）
             from app.core.config import settings as app_settings
@@ -39,9 +39,7 @@ def get_settings(db: Session = Depends(get_db)):
             if val:
                 # 自動遷移到資料庫，以便後續管理
                 print(f"🚀 [SETTINGS] Migrating {key} from environment to Database")
-                new_setting = SystemSetting(key=key, value=val)
-                db.add(new_setting)
-                db.commit()
+                settings_store.set(key, val)
                 
                 if key in ["SCHWAB_API_KEY", "SCHWAB_API_SECRET"]:
                     results[key] = mask_value(val)
@@ -54,7 +52,8 @@ def get_settings(db: Session = Depends(get_db)):
     return results
 
 @router.post("")
-def update_settings(update_data: SettingsUpdate, db: Session = Depends(get_db)):
+def update_settings(update_data: SettingsUpdate):
+    updates = {}
     for key, value in update_data.settings.items():
         if not value:
             print(f"🔍 [DEBUG] Skipping empty value for key: {key}")
@@ -66,20 +65,12 @@ def update_settings(update_data: SettingsUpdate, db: Session = Depends(get_db)):
             continue
 
         print(f"🔍 [DEBUG] Updating key: {key} with value: {value[:4]}***")
-        setting = db.query(SystemSetting).filter(SystemSetting.key == key).first()
-        if setting:
-            setting.value = value
-        else:
-            setting = SystemSetting(key=key, value=value)
-            db.add(setting)
+        updates[key] = value
             
-    db.commit()
+    # 單一交易寫入並通知訂閱者 (SchwabClient 重建、APP_MODE 切換)
+    settings_store.set_many(updates)
     print(f"🚀 [DEBUG] Settings updated in DB: {list(update_data.settings.keys())}")
     
-    # 強制重整 SchwabClient
-    from app.services.schwab_client import schwab_client
-    schwab_client._refresh_config()
-    
     return {"message": "Settings updated successfully"}
 
 from fastapi import UploadFile, File
@@ -90,18 +81,23 @@ from fastapi import Form
 @router.post("/import-csv")
 async def import_csv(
     file: UploadFile = File(...),
-    account_hash: str = Form(...)
+    account_hash: str = Form(...),
+    dry_run: bool = Form(False)
 ):
     """
     接收上傳的 CSV 檔案與目標帳戶 Hash，並進行資料匯入
+    dry_run=true 時只回傳差異預覽 (新增 / 重複 / 更新列數與範例)，不寫入資料庫
     """
     if not file.filename.lower().endswith('.csv'):
         raise HTTPException(status_code=400, detail="只支援 CSV 檔案格式")
     
     try:
         content = await file.read()
-        # 現在將 account_hash 直接傳入，不再讓 importer 猜測
-        result = importer_service.process_csv(content, file.filename, account_hash)
+        if dry_run:
+            result = importer_service.preview_csv(content, file.filename, account_hash)
+        else:
+            # 現在將 account_hash 直接傳入，不再讓 importer 猜測
+            result = importer_service.process_csv(content, file.filename, account_hash)
         
         if not result.get("success"):
             raise HTTPException(status_code=400, detail=result.get("error", "匯入失敗"))
@@ -110,6 +106,63 @@ async def import_csv(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"伺服器錯誤: {str(e)}")
 
+from app.services.import_jobs import import_job_manager
+
+@router.post("/import-jobs", status_code=202)
+async def submit_import_job(
+    file: UploadFile = File(...),
+    account_hash: str = Form(...)
+):
+    """
+    建立背景匯入工作，立即回傳 job_id，處理進度請以 /import-jobs/{job_id} 查詢
+    """
+    if not file.filename.lower().endswith('.csv'):
+        raise HTTPException(status_code=400, detail="只支援 CSV 檔案格式")
+
+    content = await file.read()
+    job = import_job_manager.submit(content, file.filename, account_hash)
+    return {"job_id": job.id, "status": job.status}
+
+@router.post("/import-bulk", status_code=202)
+async def submit_bulk_import(file: UploadFile = File(...)):
+    """
+    批次匯入 ZIP (內含多個帳戶的 Balances / Transactions CSV)
+    各檔案依檔名中的帳號末三碼對應 SCHWAB_ACCOUNT_MAP，於背景工作中平行解析
+    """
+    if not file.filename.lower().endswith('.zip'):
+        raise HTTPException(status_code=400, detail="只支援 ZIP 檔案格式")
+
+    content = await file.read()
+    job = import_job_manager.submit_bulk(content, file.filename)
+    return {"job_id": job.id, "status": job.status}
+
+@router.get("/import-jobs")
+def list_import_jobs():
+    """
+    列出最近的背景匯入工作
+    """
+    return import_job_manager.list_jobs()
+
+@router.get("/import-jobs/{job_id}")
+def get_import_job(job_id: str):
+    """
+    查詢背景匯入工作進度 (已解析/新增/略過/錯誤列數與吞吐量)
+    """
+    job = import_job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="找不到匯入工作")
+    return job.to_dict()
+
+@router.delete("/import-jobs/{job_id}")
+def cancel_import_job(job_id: str):
+    """
+    取消背景匯入工作，已寫入但未提交的資料將被回滾
+    """
+    job = import_job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="找不到匯入工作")
+    return job.to_dict()
+
 @router.delete("/reset-history")
 def reset_history(db: Session = Depends(get_db)):
     """
@@ -117,16 +170,22 @@ def reset_history(db: Session = Depends(get_db)):
     這也解決了 Schema 變更後的遷移問題。
     """
     try:
-        from app.models.persistence import AssetHistory, HistoricalBalance, TransactionHistory
+        from app.models.persistence import AssetHistory, HistoricalBalance, TransactionHistory, ImportLedger, ImportChunk
         from app.db.database import engine, Base
         
         # 1. 直接刪除表格以確保 Schema 更新
         AssetHistory.__table__.drop(engine, checkfirst=True)
         HistoricalBalance.__table__.drop(engine, checkfirst=True)
         TransactionHistory.__table__.drop(engine, checkfirst=True)
+        # 匯入帳本一併清除，否則重新上傳的檔案會被誤判為已匯入
+        ImportLedger.__table__.drop(engine, checkfirst=True)
+        ImportChunk.__table__.drop(engine, checkfirst=True)
         
         # 2. 重新建立表格
         Base.metadata.create_all(bind=engine)
+        # DROP TABLE 不經過 Session，需手動讓相關 ETag 失效
+        from app.utils.http_cache import data_versions
+        data_versions.bump(AssetHistory.__tablename__, HistoricalBalance.__tablename__, TransactionHistory.__tablename__)
         
         print(f"🔥 [SYSTEM] History tables dropped and recreated to apply new schema.")
         return {
@@ -0,0 +1,57 @@
+import json
+import asyncio
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional
+from app.core.config import settings
+from app.services.event_bus import EventBus, Subscription, event_bus
+
+router = APIRouter()
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    依 SSE 格式輸出單一事件 (id / event / data)
+    """
+    payload = json.dumps({"account": event.get("account"), "ts": event.get("ts"), "data": event.get("data")},
+                         default=str, separators=(",", ":"))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+async def event_stream(sub: Subscription, heartbeat: float, bus: EventBus = event_bus) -> AsyncIterator[str]:
+    """
+    將訂閱佇列轉為 SSE 串流；閒置時送出註解行作為 heartbeat (避免代理伺服器斷線)
+    佇列曾丟棄事件時先送出 resync，提示前端重新以 REST 取得完整狀態
+    """
+    try:
+        yield f"retry: {int(settings.STREAM_RETRY_MS)}\n\n"
+        dropped = 0
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if sub.dropped != dropped:
+                yield format_sse({"id": event["id"], "type": "resync", "account": sub.account_key,
+                                  "data": {"dropped": sub.dropped - dropped}})
+                dropped = sub.dropped
+            yield format_sse(event)
+    finally:
+        # 連線中斷時 StreamingResponse 會取消產生器，在此解除訂閱
+        bus.unsubscribe(sub)
+
+
+@router.get("/events")
+async def stream_events(account_hash: Optional[str] = Query(None)):
+    """
+    Server-Sent Events 推播：帳戶快照變動 (snapshot)、持倉增量 (positions)、
+    持倉報價 (quotes) 與排程 / 匯入工作完成 (job)
+    所有連線共用同一個 LivePublisher 的上游刷新
+    """
+    sub = event_bus.subscribe(account_hash or "default")
+    return StreamingResponse(
+        event_stream(sub, settings.STREAM_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
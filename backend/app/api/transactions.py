@@ -0,0 +1,34 @@
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.db.database import get_db
+from app.services.transactions_query import SOURCES, query_transactions
+
+router = APIRouter()
+
+@router.get("")
+def list_transactions(
+    source: str = Query("history", description="history (完整交易紀錄) / trades / dividends"),
+    account_hash: Optional[str] = Query(None),
+    start_date: Optional[datetime.date] = Query(None),
+    end_date: Optional[datetime.date] = Query(None),
+    action: Optional[str] = Query(None),
+    symbol: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="描述文字搜尋"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    瀏覽交易紀錄：依帳戶、日期區間、動作、代碼與描述篩選，由新到舊 keyset 分頁
+    """
+    if source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"source 只支援 {', '.join(SOURCES)}")
+    try:
+        return query_transactions(db, source=source, account_hash=account_hash, start_date=start_date,
+                                  end_date=end_date, action=action, symbol=symbol, q=q,
+                                  cursor=cursor, limit=limit)
+    except ValueError as e:
+        # 包含 InvalidCursor 與來源不支援的篩選條件
+        raise HTTPException(status_code=400, detail=str(e))
@@ -49,7 +49,65 @@ class Settings(BaseSettings):
     
     # Risk Metrics
     RISK_FREE_RATE: float = 0.04
-    
+
+    # Background Import Jobs
+    IMPORT_WORKERS: int = 2
+    BULK_IMPORT_WORKERS: int = 4
+
+    # Quote Cache (秒)
+    QUOTE_PRICE_TTL_SECONDS: float = 15
+    QUOTE_FUNDAMENTAL_TTL_SECONDS: float = 3600
+
+    # Quote Fetching (分塊並行)
+    QUOTE_CHUNK_SIZE: int = 100
+    QUOTE_FETCH_WORKERS: int = 4
+    QUOTE_FETCH_RETRIES: int = 2
+
+    # Schwab API 限流 (每分鐘請求數與瞬間可用額度)
+    SCHWAB_RATE_LIMIT_PER_MINUTE: int = 120
+    SCHWAB_RATE_LIMIT_BURST: int = 20
+
+    # Schwab API 斷路器
+    SCHWAB_BREAKER_FAILURE_THRESHOLD: int = 5
+    SCHWAB_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    SCHWAB_BREAKER_RECOVERY_SECONDS: float = 30.0
+
+    # OAuth Token 背景換發 (到期前多少秒換發、檢查間隔)
+    TOKEN_REFRESH_MARGIN_SECONDS: float = 600
+    TOKEN_REFRESH_CHECK_SECONDS: float = 60
+    # 換發失敗後的重試間隔上限 (指數退避)
+    TOKEN_REFRESH_MAX_BACKOFF_SECONDS: float = 3600
+
+    # Auto-Snapshot 合併寫入間隔 (秒)
+    SNAPSHOT_FLUSH_SECONDS: float = 60
+
+    # 執行池：I/O 執行緒數與 CPU 計算行程數
+    IO_WORKERS: int = 16
+    CPU_WORKERS: int = 2
+
+    # 回應壓縮：超過門檻 (bytes) 的回應以 gzip 壓縮
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 6
+
+    # 持倉增量 feed：每個帳戶保留的版本數
+    POSITIONS_FEED_HISTORY: int = 8
+
+    # SSE 推播：上游刷新間隔、heartbeat、每個連線的佇列上限與重連間隔
+    LIVE_REFRESH_SECONDS: float = 30
+    STREAM_HEARTBEAT_SECONDS: float = 15
+    STREAM_QUEUE_SIZE: int = 100
+    STREAM_RETRY_MS: int = 5000
+
+    # 串流報價 (Schwab streamer)：預設關閉；REPLAY_FILE 設定時改以本地重播替代真實串流
+    QUOTE_STREAM_ENABLED: bool = False
+    QUOTE_STREAM_PUBLISH_SECONDS: float = 1.0
+    QUOTE_STREAM_REPLAY_FILE: Optional[str] = None
+    QUOTE_STREAM_RECORD_FILE: Optional[str] = None
+
+    # 資料匯出：每批讀取列數與續傳快取保留時間 (秒)
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_CACHE_SECONDS: float = 3600
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         print(f"🔥 [CONFIG] 最終生效模式 APP_MODE = {self.APP_MODE}")
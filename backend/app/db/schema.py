@@ -0,0 +1,47 @@
+from sqlalchemy import inspect, text
+
+# create_all 只會建立不存在的資料表，既有資料表新增的欄位與索引需在這裡補上
+# 依資料表列出 (欄位名稱, 欄位型別) 與 CREATE INDEX 語句，資料表不存在時略過
+_ADDED_COLUMNS = {
+    "holding_snapshots": [("account_id", "VARCHAR")],
+}
+
+_ADDED_INDEXES = {
+    "holding_snapshots": [
+        "CREATE INDEX IF NOT EXISTS ix_holding_snapshots_account_id ON holding_snapshots (account_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_holding_snapshots_date_account_symbol "
+        "ON holding_snapshots (date, account_id, symbol)",
+    ],
+    # /transactions keyset 分頁 (account, date, rowid)
+    "transaction_history": [
+        "CREATE INDEX IF NOT EXISTS ix_transaction_history_account_date ON transaction_history (account_id, date)",
+    ],
+    "trade_history": [
+        "CREATE INDEX IF NOT EXISTS ix_trade_history_account_date ON trade_history (account_hash, date)",
+    ],
+    "dividends": [
+        "CREATE INDEX IF NOT EXISTS ix_dividends_account_date ON dividends (account_hash, date)",
+    ],
+}
+
+
+def ensure_schema(engine):
+    """
+    為既有的 SQLite 資料庫補上新版模型的欄位與索引 (可重複執行)
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table, columns in _ADDED_COLUMNS.items():
+            if table not in tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            for name, column_type in columns:
+                if name not in existing:
+                    print(f"🔧 [SCHEMA] Adding column {table}.{name}")
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+        for table, statements in _ADDED_INDEXES.items():
+            if table not in tables:
+                continue
+            for statement in statements:
+                conn.execute(text(statement))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 import datetime
@@ -19,12 +19,17 @@ class AssetHistory(Base):
 
 class HoldingSnapshot(Base):
     """
-    紀錄每日持股快照
+    紀錄每日持股快照，以 (date, account_id, symbol) 唯一
+    舊版資料沒有 account_id (NULL)，由 app.db.schema.ensure_schema 補上欄位與索引
     """
     __tablename__ = "holding_snapshots"
+    __table_args__ = (
+        Index("ix_holding_snapshots_date_account_symbol", "date", "account_id", "symbol", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, index=True, nullable=False)
+    account_id = Column(String, index=True, nullable=True) # 關聯帳戶
     symbol = Column(String, index=True, nullable=False)
     name = Column(String)
     quantity = Column(Float, nullable=False)
@@ -41,6 +46,10 @@ class Dividend(Base):
     紀錄股息收入
     """
     __tablename__ = "dividends"
+    __table_args__ = (
+        # /transactions 以 (account, date, id) keyset 分頁；id 為 rowid，已隱含於索引中
+        Index("ix_dividends_account_date", "account_hash", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(String, index=True, unique=True, nullable=True)
@@ -56,6 +65,9 @@ class TradeHistory(Base):
     紀錄交易歷史 (買入/賣出)
     """
     __tablename__ = "trade_history"
+    __table_args__ = (
+        Index("ix_trade_history_account_date", "account_hash", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(String, index=True, nullable=True) # Schwab activityId
@@ -101,6 +113,9 @@ class TransactionHistory(Base):
     紀錄完整交易與資金流動紀錄 (從 CSV 匯入)
     """
     __tablename__ = "transaction_history"
+    __table_args__ = (
+        Index("ix_transaction_history_account_date", "account_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(String, index=True, nullable=False)
@@ -111,3 +126,30 @@ class TransactionHistory(Base):
     amount = Column(Float, nullable=False)
     unique_id = Column(String, unique=True, index=True, nullable=False) # 防止重複匯入
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ImportLedger(Base):
+    """
+    紀錄已匯入的 CSV 檔案內容雜湊 (同帳戶重複上傳相同檔案時直接略過)
+    """
+    __tablename__ = "import_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_hash = Column(String, index=True, nullable=False) # SHA-256 of raw bytes
+    account_id = Column(String, index=True, nullable=False)
+    filename = Column(String)
+    kind = Column(String) # 'transactions' or 'balances'
+    row_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ImportChunk(Base):
+    """
+    紀錄已匯入的 CSV 區塊雜湊 (內容定義切塊，重疊的匯出檔只處理未見過的區塊)
+    """
+    __tablename__ = "import_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chunk_hash = Column(String, index=True, nullable=False)
+    account_id = Column(String, index=True, nullable=False)
+    kind = Column(String, nullable=False)
+    row_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,123 @@
+import io
+import os
+import zipfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.services.importer import importer_service, parse_csv_file
+
+
+class BulkImporter:
+    """
+    批次匯入：一次處理多個帳戶的 Balances / Transactions CSV
+    解析在行程池中平行進行，寫入則統一交由 importer 的單一寫入者序列化處理
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.BULK_IMPORT_WORKERS
+
+    def collect_from_zip(self, archive: bytes) -> List[Tuple[str, bytes]]:
+        """
+        從 ZIP 檔取出所有 CSV (忽略目錄與 macOS 產生的隱藏檔)
+        """
+        files = []
+        with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+            for info in zf.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name.startswith('.') or "__MACOSX" in info.filename:
+                    continue
+                if not name.lower().endswith('.csv'):
+                    continue
+                files.append((name, zf.read(info)))
+        return files
+
+    def collect_from_directory(self, directory: str) -> List[Tuple[str, bytes]]:
+        """
+        讀取目錄下所有 CSV 檔 (不分大小寫副檔名)
+        """
+        files = []
+        for path in sorted(Path(directory).iterdir()):
+            if path.is_file() and path.suffix.lower() == '.csv':
+                files.append((path.name, path.read_bytes()))
+        return files
+
+    def import_zip(self, archive: bytes, job=None) -> Dict[str, Any]:
+        return self.import_files(self.collect_from_zip(archive), job=job)
+
+    def import_directory(self, directory: str, job=None) -> Dict[str, Any]:
+        return self.import_files(self.collect_from_directory(directory), job=job)
+
+    def import_files(self, files: List[Tuple[str, bytes]], job=None,
+                     account_map: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        依檔名對應帳戶 (SCHWAB_ACCOUNT_MAP)，平行解析後依序寫入資料庫
+        """
+        if account_map is None:
+            account_map = importer_service._load_account_map()
+
+        results = []
+        targets = []
+        for filename, content in files:
+            account_hash = importer_service._get_account_hash_from_filename(filename, account_map)
+            if not account_hash:
+                print(f"⚠️ [BULK-IMPORT] No account matched for '{filename}', skipped.")
+                results.append({"filename": filename, "success": False, "error": "找不到對應的帳戶 (SCHWAB_ACCOUNT_MAP)"})
+                continue
+            duplicate = importer_service.check_duplicate_file(content, account_hash)
+            if duplicate:
+                if job: job.record(skipped=duplicate["stats"]["skipped"])
+                duplicate.update({"filename": filename, "account_hash": account_hash})
+                results.append(duplicate)
+                continue
+            targets.append((filename, content, account_hash))
+
+        print(f"🚀 [BULK-IMPORT] Parsing {len(targets)} files with {self.max_workers} workers")
+        for filename, account_hash, parsed in self._parse_all(targets):
+            if job: job.check_cancelled()
+            # 單一寫入者：import_parsed 內部以 _write_lock 序列化所有寫入
+            res = importer_service.import_parsed(parsed, account_hash, job=job)
+            res.update({"filename": filename, "account_hash": account_hash, "kind": parsed.get("kind")})
+            results.append(res)
+
+        imported = sum(1 for r in results if r.get("success"))
+        print(f"✅ [BULK-IMPORT] {imported}/{len(files)} files imported.")
+        return {
+            "success": all(r.get("success") for r in results) if results else False,
+            "files": results,
+            "imported": imported,
+            "total": len(files)
+        }
+
+    def _parse_all(self, targets: List[Tuple[str, bytes, str]]):
+        """
+        產生 (filename, account_hash, parsed)，完成一個就交給寫入者一個
+        行程池無法使用時 (例如受限環境) 退回目前行程依序解析
+        """
+        if len(targets) <= 1 or self.max_workers <= 1:
+            for filename, content, account_hash in targets:
+                yield filename, account_hash, parse_csv_file(content, filename)
+            return
+
+        try:
+            executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(targets)))
+        except (OSError, NotImplementedError) as e:
+            print(f"⚠️ [BULK-IMPORT] Process pool unavailable ({e}), parsing in-process.")
+            for filename, content, account_hash in targets:
+                yield filename, account_hash, parse_csv_file(content, filename)
+            return
+
+        with executor:
+            futures = {
+                executor.submit(parse_csv_file, content, filename): (filename, account_hash)
+                for filename, content, account_hash in targets
+            }
+            for future in as_completed(futures):
+                filename, account_hash = futures[future]
+                try:
+                    parsed = future.result()
+                except Exception as e:
+                    parsed = {"success": False, "filename": filename, "error": f"解析失敗: {e}"}
+                yield filename, account_hash, parsed
+
+
+bulk_importer = BulkImporter()
@@ -0,0 +1,107 @@
+import time
+import threading
+from typing import Dict, Any
+from app.core.config import settings
+
+
+class CircuitOpenError(Exception):
+    """
+    斷路器開啟時拋出，呼叫端應改用最後一次成功的快照
+    """
+    pass
+
+
+class CircuitBreaker:
+    """
+    券商 API 斷路器
+    - CLOSED：正常呼叫；連續失敗 (例外、5xx、429) 或連續慢速呼叫達門檻即開啟
+    - OPEN：直接拋出 CircuitOpenError，不再等待 HTTP 逾時
+    - HALF_OPEN：經過 recovery_timeout 後放行單一探測請求，成功即關閉，失敗則重新開啟
+    """
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, name: str, failure_threshold: int = 5, slow_call_seconds: float = 10.0,
+                 recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """
+        呼叫前檢查，斷路器開啟 (或半開且已有探測中) 時拋出 CircuitOpenError
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                print(f"🔌 [BREAKER] {self.name} half-open, probing broker...")
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"{self.name} 暫時無法使用 (斷路器開啟)")
+
+    def record_success(self, latency: float):
+        if latency >= self.slow_call_seconds:
+            # 慢速呼叫視同失敗，延遲飆高時也會開啟斷路器
+            self.record_failure(f"slow call {latency:.1f}s")
+            return
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"✅ [BREAKER] {self.name} recovered, circuit closed.")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, reason: str = ""):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"🔌 [BREAKER] {self.name} circuit opened after {self._failures} failures ({reason}).")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+schwab_breaker = CircuitBreaker(
+    "Schwab API",
+    failure_threshold=settings.SCHWAB_BREAKER_FAILURE_THRESHOLD,
+    slow_call_seconds=settings.SCHWAB_BREAKER_SLOW_CALL_SECONDS,
+    recovery_timeout=settings.SCHWAB_BREAKER_RECOVERY_SECONDS
+)
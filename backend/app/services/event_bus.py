@@ -0,0 +1,89 @@
+import time
+import asyncio
+import itertools
+import threading
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+
+class Subscription:
+    """
+    單一串流連線 (例如一個瀏覽器分頁) 的事件佇列，綁定建立它的 event loop
+    佇列有上限：慢速客戶端塞滿時丟棄最舊事件並累計 dropped，由串流端通知客戶端重新同步
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, account_key: Optional[str], maxsize: int):
+        self.loop = loop
+        self.account_key = account_key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _offer(self, event: Dict[str, Any]):
+        # 只在 event loop 執行緒中呼叫
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        account = event.get("account")
+        return account is None or self.account_key is None or account == self.account_key
+
+
+class EventBus:
+    """
+    程序內的發布 / 訂閱中心
+    publish 可由任何執行緒呼叫 (排程器、匯入工作、LivePublisher)，
+    事件以 call_soon_threadsafe 分送到各訂閱者的 event loop
+    """
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscriptions: List[Subscription] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, account_key: Optional[str] = None) -> Subscription:
+        """
+        必須在 event loop 中呼叫 (例如 SSE handler)
+        """
+        sub = Subscription(asyncio.get_running_loop(), account_key, self.queue_size)
+        with self._lock:
+            self._subscriptions.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+
+    def publish(self, event_type: str, data: Any, account_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        發布事件；account_key 為 None 時送給所有訂閱者 (例如排程工作完成)
+        """
+        event = {"id": next(self._ids), "type": event_type, "account": account_key,
+                 "data": data, "ts": time.time()}
+        with self._lock:
+            self.published += 1
+            targets = [s for s in self._subscriptions if s.accepts(event)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:
+                # event loop 已關閉 (連線中斷尚未清理)
+                self.unsubscribe(sub)
+        return event
+
+    def subscribed_accounts(self) -> List[Optional[str]]:
+        with self._lock:
+            return list(dict.fromkeys(s.account_key for s in self._subscriptions))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscriptions),
+                "published": self.published,
+                "dropped": sum(s.dropped for s in self._subscriptions),
+            }
+
+
+event_bus = EventBus(queue_size=settings.STREAM_QUEUE_SIZE)
@@ -0,0 +1,181 @@
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+
+
+class _PoolStats:
+    """
+    單一執行池的佇列指標 (等待中 / 執行中 / 完成數與平均等待、執行時間)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_wait = 0.0
+
+    def on_submit(self):
+        with self._lock:
+            self.submitted += 1
+
+    def on_start(self, waited: float):
+        with self._lock:
+            self.started += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def on_finish(self, ran: float, ok: bool):
+        with self._lock:
+            self.completed += 1
+            self.total_run += ran
+            if not ok:
+                self.failed += 1
+
+    def snapshot(self, workers: int, queued: Optional[int] = None, active: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": workers,
+                "queued": self.submitted - self.started if queued is None else queued,
+                "active": self.started - self.completed if active is None else active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait": round(self.total_wait / self.started, 4) if self.started else 0.0,
+                "max_wait": round(self.max_wait, 4),
+                "avg_run": round(self.total_run / self.completed, 4) if self.completed else 0.0,
+            }
+
+
+def _run_in_worker(func: Callable, submitted_at: float, *args):
+    """
+    在行程池的 worker 中執行，回傳 (成功與否, 結果或例外, 等待時間, 執行時間)
+    跨行程比較時間使用 time.time()；例外一併帶回，讓父行程也能記錄等待時間
+    """
+    started = time.time()
+    try:
+        payload, ok = func(*args), True
+    except Exception as e:
+        payload, ok = e, False
+    return ok, payload, max(0.0, started - submitted_at), time.time() - started
+
+
+class ExecutionManager:
+    """
+    將阻塞工作移出 event loop
+    - io：有上限的執行緒池，用於 repository / Schwab API / SQLite 等 I/O 呼叫
+    - cpu：行程池，用於 pandas 風險指標等 CPU 密集計算 (無法建立時退回 io 池)
+    """
+    def __init__(self, io_workers: int = 16, cpu_workers: int = 2):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io-worker")
+        self._cpu: Optional[ProcessPoolExecutor] = None
+        self._cpu_lock = threading.Lock()
+        self._io_stats = _PoolStats()
+        self._cpu_stats = _PoolStats()
+        # 行程池尚未完成的 future：worker 無法回報開始時間，即時的等待/執行中數量由此計算
+        self._cpu_pending = set()
+
+    def _timed(self, stats: _PoolStats, submitted_at: float, func: Callable, *args, **kwargs):
+        started = time.monotonic()
+        stats.on_start(started - submitted_at)
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            stats.on_finish(time.monotonic() - started, ok)
+
+    async def run_io(self, func: Callable, *args, **kwargs):
+        """
+        在 io 執行緒池中執行阻塞函式；複製目前的 context (例如 Schwab 請求優先順序)
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        self._io_stats.on_submit()
+        call = functools.partial(ctx.run, self._timed, self._io_stats, time.monotonic(), func, *args, **kwargs)
+        return await loop.run_in_executor(self._io, call)
+
+    def _get_cpu_pool(self) -> Optional[ProcessPoolExecutor]:
+        with self._cpu_lock:
+            if self._cpu is None and self.cpu_workers > 0:
+                try:
+                    # spawn：避免在已有背景執行緒的程序中 fork
+                    self._cpu = ProcessPoolExecutor(
+                        max_workers=self.cpu_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                except (OSError, NotImplementedError, ValueError) as e:
+                    print(f"⚠️ [EXECUTOR] Process pool unavailable ({e}), CPU work runs in threads.")
+                    self.cpu_workers = 0
+            return self._cpu
+
+    def run_cpu_blocking(self, func: Callable, *args):
+        """
+        在行程池中執行 CPU 密集函式並等待結果 (供同步 handler 使用)
+        func 與參數必須可 pickle；行程池無法使用時改在目前執行緒執行
+        """
+        pool = self._get_cpu_pool()
+        if pool is None:
+            return func(*args)
+        submitted_at, submitted_mono = time.time(), time.monotonic()
+        self._cpu_stats.on_submit()
+        future = None
+        try:
+            future = pool.submit(_run_in_worker, func, submitted_at, *args)
+            with self._cpu_lock:
+                self._cpu_pending.add(future)
+            ok, payload, waited, ran = future.result()
+        except BrokenProcessPool as e:
+            print(f"⚠️ [EXECUTOR] Process pool broken ({e}), retrying in-thread.")
+            with self._cpu_lock:
+                self._cpu = None
+            return self._timed(self._cpu_stats, submitted_mono, func, *args)
+        finally:
+            if future is not None:
+                with self._cpu_lock:
+                    self._cpu_pending.discard(future)
+        self._cpu_stats.on_start(waited)
+        self._cpu_stats.on_finish(ran, ok)
+        if not ok:
+            raise payload
+        return payload
+
+    async def run_cpu(self, func: Callable, *args):
+        """
+        async handler 使用：於 io 執行緒中等待行程池結果，不阻塞 event loop
+        """
+        return await self.run_io(self.run_cpu_blocking, func, *args)
+
+    def _cpu_pending_counts(self) -> Dict[str, int]:
+        # 行程池會預先把 max_workers + 1 個工作送進呼叫佇列並標記為 running，執行中數量可能多算一個
+        with self._cpu_lock:
+            pending = list(self._cpu_pending)
+        active = sum(1 for f in pending if f.running())
+        return {"queued": len(pending) - active, "active": active}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "io": self._io_stats.snapshot(self.io_workers),
+            "cpu": self._cpu_stats.snapshot(self.cpu_workers, **self._cpu_pending_counts()),
+        }
+
+    def shutdown(self):
+        self._io.shutdown(wait=False)
+        with self._cpu_lock:
+            if self._cpu is not None:
+                self._cpu.shutdown(wait=False, cancel_futures=True)
+                self._cpu = None
+
+
+execution_manager = ExecutionManager(io_workers=settings.IO_WORKERS, cpu_workers=settings.CPU_WORKERS)
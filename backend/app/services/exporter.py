@@ -0,0 +1,239 @@
+import io
+import os
+import csv
+import json
+import time
+import hashlib
+import tempfile
+import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.persistence import TransactionHistory, TradeHistory, Dividend, HistoricalBalance, AssetHistory
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 資料集：(模型, 帳戶欄位, 匯出欄位)
+EXPORT_DATASETS = {
+    "transactions": (TransactionHistory, "account_id",
+                     ["id", "account_id", "date", "action", "symbol", "description", "amount"]),
+    "trades": (TradeHistory, "account_hash",
+               ["id", "account_hash", "date", "symbol", "side", "quantity", "price", "average_cost",
+                "realized_pnl", "commission", "description"]),
+    "dividends": (Dividend, "account_hash", ["id", "account_hash", "date", "symbol", "amount", "description"]),
+    "balances": (HistoricalBalance, "account_id", ["id", "account_id", "date", "balance"]),
+    "asset_history": (AssetHistory, "account_id", ["id", "account_id", "date", "total_value", "cash_balance"]),
+}
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportUnavailable(Exception):
+    """
+    匯出格式所需的選用套件未安裝 (例如 Parquet 需要 pyarrow)
+    """
+    pass
+
+
+def format_available(fmt: str) -> bool:
+    """
+    Parquet 為選用格式，需安裝 pyarrow
+    """
+    if fmt != "parquet":
+        return fmt in EXPORT_FORMATS
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _DrainableBuffer(io.RawIOBase):
+    """
+    供 ParquetWriter 寫入的緩衝區，每寫完一個 row group 就取出已寫入的位元組送出
+    """
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class Exporter:
+    """
+    以伺服器端游標分批讀取資料庫，串流輸出 CSV / NDJSON / Parquet，記憶體用量與資料量無關
+    串流同時寫入快取檔 (以資料版本為鍵)，續傳 (Range) 請求直接由快取檔提供
+    """
+    def __init__(self, session_factory=SessionLocal, cache_dir: Optional[str] = None,
+                 batch_size: int = 1000, cache_seconds: float = 3600):
+        self._session_factory = session_factory
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "schweb_exports")
+        self.batch_size = batch_size
+        self.cache_seconds = cache_seconds
+        self.hits = 0
+        self.misses = 0
+
+    # --- 讀取 ---
+
+    def iter_batches(self, dataset: str, account_hash: Optional[str] = None,
+                     start_date: Optional[datetime.date] = None,
+                     end_date: Optional[datetime.date] = None) -> Iterator[List[Tuple]]:
+        model, account_column, columns = EXPORT_DATASETS[dataset]
+        stmt = select(*[getattr(model, c) for c in columns])
+        if account_hash:
+            stmt = stmt.where(getattr(model, account_column) == account_hash)
+        if start_date:
+            stmt = stmt.where(model.date >= start_date)
+        if end_date:
+            stmt = stmt.where(model.date <= end_date)
+        stmt = stmt.order_by(model.date, model.id).execution_options(yield_per=self.batch_size)
+
+        db = self._session_factory()
+        try:
+            for partition in db.execute(stmt).partitions():
+                yield [tuple(row) for row in partition]
+        finally:
+            db.close()
+
+    # --- 格式 ---
+
+    def iter_chunks(self, dataset: str, fmt: str, **filters) -> Iterator[bytes]:
+        columns = EXPORT_DATASETS[dataset][2]
+        batches = self.iter_batches(dataset, **filters)
+        if fmt == "csv":
+            return self._csv(columns, batches)
+        if fmt == "ndjson":
+            return self._ndjson(columns, batches)
+        if fmt == "parquet":
+            return self._parquet(dataset, columns, batches)
+        raise ValueError(f"不支援的匯出格式: {fmt}")
+
+    def _csv(self, columns, batches) -> Iterator[bytes]:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode("utf-8")
+
+    def _ndjson(self, columns, batches) -> Iterator[bytes]:
+        for batch in batches:
+            if orjson is not None:
+                yield b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in batch)
+            else:
+                yield "".join(json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n"
+                              for row in batch).encode("utf-8")
+
+    def _parquet(self, dataset, columns, batches) -> Iterator[bytes]:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ExportUnavailable("Parquet 匯出需要安裝 pyarrow")
+        model = EXPORT_DATASETS[dataset][0]
+        types = {"Integer": pa.int64(), "Float": pa.float64(), "Date": pa.date32(), "String": pa.string()}
+        schema = pa.schema([(c, types.get(type(getattr(model, c).type).__name__, pa.string())) for c in columns])
+        sink = _DrainableBuffer()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for batch in batches:
+                arrays = [pa.array([row[i] for row in batch], type=schema.field(i).type) for i in range(len(columns))]
+                # 每批一個 row group，寫完即送出
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    # --- 快取 (續傳) ---
+
+    def cache_path(self, key: str, fmt: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.cache_dir, f"{digest}.{fmt}")
+
+    def cached(self, key: str, fmt: str) -> Optional[str]:
+        path = self.cache_path(key, fmt)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def stream(self, key: str, dataset: str, fmt: str, **filters) -> Iterator[bytes]:
+        """
+        串流輸出並同時寫入快取；完整送出後才將 .part 檔改名為正式快取檔
+        客戶端中途斷線時捨棄未完成的檔案
+        """
+        self.prune()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.cache_path(key, fmt)
+        part = f"{path}.{os.getpid()}.{time.monotonic_ns()}.part"
+        completed = False
+        try:
+            with open(part, "wb") as f:
+                for chunk in self.iter_chunks(dataset, fmt, **filters):
+                    if chunk:
+                        f.write(chunk)
+                        yield chunk
+            os.replace(part, path)
+            completed = True
+        finally:
+            if not completed and os.path.exists(part):
+                os.remove(part)
+
+    def materialize(self, key: str, dataset: str, fmt: str, **filters) -> str:
+        """
+        產生完整快取檔並回傳路徑 (續傳請求但快取不存在時使用)
+        """
+        for _ in self.stream(key, dataset, fmt, **filters):
+            pass
+        return self.cache_path(key, fmt)
+
+    def prune(self):
+        """
+        刪除過期的快取檔與遺留的 .part 檔
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        cutoff = time.time() - self.cache_seconds
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+exporter = Exporter(batch_size=settings.EXPORT_BATCH_SIZE, cache_seconds=settings.EXPORT_CACHE_SECONDS)
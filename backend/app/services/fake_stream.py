@@ -0,0 +1,128 @@
+import json
+import random
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+EQUITY_SERVICE = "LEVELONE_EQUITIES"
+OPTION_SERVICE = "LEVELONE_OPTIONS"
+
+
+class StreamExhausted(Exception):
+    """
+    重播訊息已全部送出 (相當於真實串流連線關閉)
+    """
+    pass
+
+
+class FakeStreamClient:
+    """
+    schwab.streaming.StreamClient 的本地替身，供測試與效能量測使用
+    依序重播錄製 (或合成) 的 Level One 訊息，只送出已訂閱代碼的內容
+    speed=0 時全速重播；speed=1 依訊息 timestamp 以實際時間間隔重播
+    """
+    def __init__(self, messages: Iterable[Dict[str, Any]], speed: float = 0.0, loop_forever: bool = False):
+        self._messages = list(messages)
+        self.speed = speed
+        self.loop_forever = loop_forever
+        self._pos = 0
+        self._last_ts: Optional[int] = None
+        self._subs = {EQUITY_SERVICE: set(), OPTION_SERVICE: set()}
+        self._handlers: Dict[str, List[Callable]] = {EQUITY_SERVICE: [], OPTION_SERVICE: []}
+        self.logged_in = False
+        self.delivered = 0
+
+    async def login(self, websocket_connect_args=None):
+        self.logged_in = True
+
+    async def logout(self):
+        self.logged_in = False
+
+    async def level_one_equity_subs(self, symbols, *, fields=None):
+        self._subs[EQUITY_SERVICE] = set(symbols)
+
+    async def level_one_equity_add(self, symbols, *, fields=None):
+        self._subs[EQUITY_SERVICE].update(symbols)
+
+    async def level_one_equity_unsubs(self, symbols):
+        self._subs[EQUITY_SERVICE].difference_update(symbols)
+
+    async def level_one_option_subs(self, symbols, *, fields=None):
+        self._subs[OPTION_SERVICE] = set(symbols)
+
+    async def level_one_option_add(self, symbols, *, fields=None):
+        self._subs[OPTION_SERVICE].update(symbols)
+
+    async def level_one_option_unsubs(self, symbols):
+        self._subs[OPTION_SERVICE].difference_update(symbols)
+
+    def add_level_one_equity_handler(self, handler):
+        self._handlers[EQUITY_SERVICE].append(handler)
+
+    def add_level_one_option_handler(self, handler):
+        self._handlers[OPTION_SERVICE].append(handler)
+
+    def subscriptions(self, service: str = EQUITY_SERVICE) -> set:
+        return set(self._subs[service])
+
+    async def handle_message(self):
+        """
+        送出下一則含已訂閱代碼的訊息並呼叫 handler；重播結束時拋出 StreamExhausted
+        """
+        while True:
+            if self._pos >= len(self._messages):
+                if not self.loop_forever or not self._messages:
+                    raise StreamExhausted()
+                self._pos = 0
+                self._last_ts = None
+            raw = self._messages[self._pos]
+            self._pos += 1
+            service = raw.get("service")
+            content = [c for c in raw.get("content", []) if c.get("key") in self._subs.get(service, ())]
+            if not content:
+                continue
+
+            ts = raw.get("timestamp")
+            if self.speed > 0 and ts is not None and self._last_ts is not None:
+                await asyncio.sleep(max(0.0, (ts - self._last_ts) / 1000.0 / self.speed))
+            self._last_ts = ts
+
+            message = {**raw, "content": content}
+            for handler in self._handlers.get(service, []):
+                result = handler(message)
+                if inspect.isawaitable(result):
+                    await result
+            self.delivered += 1
+            return message
+
+
+def load_replay(path: str) -> List[Dict[str, Any]]:
+    """
+    讀取錄製的串流訊息 (JSONL，每行一則)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_ticks(prices: Dict[str, float], count: int, seed: int = 42,
+                    start_ts: int = 1_767_225_600_000, interval_ms: int = 100) -> List[Dict[str, Any]]:
+    """
+    以隨機漫步產生可重現的 Level One 訊息 (基準測試用)
+    含空白的 OCC 代碼視為選擇權，送往 LEVELONE_OPTIONS 並帶 MARK
+    """
+    rng = random.Random(seed)
+    current = dict(prices)
+    symbols = list(current)
+    messages = []
+    for i in range(count):
+        symbol = rng.choice(symbols)
+        current[symbol] = round(max(0.01, current[symbol] * (1 + rng.gauss(0, 0.001))), 4)
+        is_option = " " in symbol
+        field = "MARK" if is_option else "LAST_PRICE"
+        messages.append({
+            "service": OPTION_SERVICE if is_option else EQUITY_SERVICE,
+            "timestamp": start_ts + i * interval_ms,
+            "command": "SUBS",
+            "content": [{"key": symbol, field: current[symbol]}],
+        })
+    return messages
@@ -0,0 +1,186 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from app.core.config import settings
+from app.utils.metrics import job_duration
+
+
+class ImportCancelled(Exception):
+    """
+    匯入工作被使用者取消時拋出，由匯入流程捕捉後回滾交易
+    """
+    pass
+
+
+class ImportJob:
+    """
+    單一背景匯入工作的狀態與進度
+    inserted / skipped 以「資料表列」計算，Transactions CSV 一列會同時寫入多張表
+    """
+    def __init__(self, filename: str, account_hash: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.account_hash = account_hash
+        self.status = "queued"  # queued / running / completed / failed / cancelled
+        self.rows_parsed = 0
+        self.rows_inserted = 0
+        self.rows_skipped = 0
+        self.rows_errored = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def record(self, parsed: int = 0, inserted: int = 0, skipped: int = 0, errored: int = 0):
+        with self._lock:
+            self.rows_parsed += parsed
+            self.rows_inserted += inserted
+            self.rows_skipped += skipped
+            self.rows_errored += errored
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """
+        匯入迴圈中定期呼叫，若已要求取消則中斷處理
+        """
+        if self._cancel_event.is_set():
+            raise ImportCancelled(f"Import job {self.id} cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            elapsed = (end - self.started_at) if self.started_at else 0.0
+            throughput = (self.rows_parsed / elapsed) if elapsed > 0 else 0.0
+            return {
+                "job_id": self.id,
+                "filename": self.filename,
+                "account_hash": self.account_hash,
+                "status": self.status,
+                "rows_parsed": self.rows_parsed,
+                "rows_inserted": self.rows_inserted,
+                "rows_skipped": self.rows_skipped,
+                "rows_errored": self.rows_errored,
+                "elapsed_seconds": round(elapsed, 3),
+                "rows_per_second": round(throughput, 1),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+            }
+
+
+class ImportJobManager:
+    """
+    背景匯入工作管理器：以執行緒池處理 CSV 匯入，HTTP 請求只需取得 job_id 即可返回
+    """
+    def __init__(self, max_workers: int = 2, max_history: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="import-job")
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._futures = {}
+        self._max_history = max_history
+        self._lock = threading.Lock()
+
+    def submit(self, file_content: bytes, filename: str, account_hash: str) -> ImportJob:
+        from app.services.importer import importer_service
+
+        job = ImportJob(filename, account_hash)
+        return self._enqueue(job, lambda: importer_service.process_csv(file_content, filename, account_hash, job=job))
+
+    def submit_bulk(self, archive: bytes, filename: str) -> ImportJob:
+        """
+        批次匯入 ZIP，帳戶依檔名由 SCHWAB_ACCOUNT_MAP 自動對應
+        """
+        from app.services.bulk_importer import bulk_importer
+
+        job = ImportJob(filename, None)
+        return self._enqueue(job, lambda: bulk_importer.import_zip(archive, job=job))
+
+    def _enqueue(self, job: ImportJob, runner) -> ImportJob:
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+            self._futures[job.id] = self._executor.submit(self._run, job, runner)
+        print(f"🚀 [IMPORT-JOB] Queued job {job.id[:8]} for '{job.filename}'")
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j.to_dict() for j in reversed(jobs)]
+
+    def cancel(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+        if not job:
+            return None
+        job.cancel()
+        # 尚未開始執行的工作可直接從佇列移除
+        if future is not None and future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return job
+
+    def _run(self, job: ImportJob, runner):
+        if job.is_cancelled:
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            result = runner()
+            job.result = result
+            if job.is_cancelled:
+                job.status = "cancelled"
+            elif result.get("success"):
+                job.status = "completed"
+            else:
+                job.status = "failed"
+                job.error = result.get("error")
+        except ImportCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"❌ [IMPORT-JOB] Job {job.id[:8]} crashed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job_duration.observe(job.finished_at - job.started_at, "import", job.status)
+            with self._lock:
+                self._futures.pop(job.id, None)
+            print(f"✅ [IMPORT-JOB] Job {job.id[:8]} finished with status '{job.status}'")
+            from app.services.event_bus import event_bus
+            event_bus.publish("job", {"job": "import", "job_id": job.id, "status": job.status,
+                                      "account": job.account_hash})
+
+    def _trim_history(self):
+        # 僅保留最近的已結束工作，避免記憶體無限成長
+        while len(self._jobs) > self._max_history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            self._jobs.pop(oldest_id)
+
+    def shutdown(self):
+        for job_id in list(self._futures.keys()):
+            self.cancel(job_id)
+        self._executor.shutdown(wait=False)
+
+
+import_job_manager = ImportJobManager(max_workers=settings.IMPORT_WORKERS)
@@ -1,16 +1,67 @@
 import csv
 import io
 import os
+import re
+import json
 import hashlib
+import threading
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
 from app.models.persistence import (
     Dividend, TradeHistory, AssetHistory, HoldingSnapshot,
-    HistoricalBalance, TransactionHistory
+    HistoricalBalance, TransactionHistory,
+    ImportLedger, ImportChunk
 )
-from app.services.schwab_client import schwab_client
+
+# 單一寫入者：所有匯入路徑 (同步、背景工作、批次) 共用此鎖，避免 SQLite 寫入互相競爭
+_write_lock = threading.Lock()
+
+# 內容定義切塊參數：平均每 32 列一個區塊，單一區塊最多 256 列
+CHUNK_ANCHOR_MODULUS = 32
+CHUNK_MAX_ROWS = 256
+
+class _RecordChunker:
+    """
+    以「錨點列」(列內容雜湊 % CHUNK_ANCHOR_MODULUS == 0) 作為區塊結尾切分 CSV。
+    區塊邊界只取決於列內容，新匯出檔在前方插入新列時，只有插入點所在的區塊雜湊會改變。
+    """
+    def __init__(self, fieldnames: Optional[List[str]]):
+        self._header = "\x1f".join(fieldnames or []).encode('utf-8')
+        self._current = None
+        self._count = 0
+        self.hashes: List[str] = []
+        self.row_counts: List[int] = []
+
+    def add(self, values: List[Any]) -> int:
+        """
+        加入一列 (依欄位順序的值) 並回傳其所屬區塊索引
+        """
+        if self._current is None:
+            self._current = hashlib.sha256(self._header)
+        text = "\x1f".join("" if v is None else str(v) for v in values).encode('utf-8')
+        self._current.update(text + b"\n")
+        self._count += 1
+        chunk_index = len(self.hashes)
+
+        anchor = int.from_bytes(hashlib.md5(text).digest()[:4], 'big') % CHUNK_ANCHOR_MODULUS == 0
+        if anchor or self._count >= CHUNK_MAX_ROWS:
+            self._close()
+        return chunk_index
+
+    def finish(self) -> List[str]:
+        if self._current is not None:
+            self._close()
+        return self.hashes
+
+    def _close(self):
+        self.hashes.append(self._current.hexdigest())
+        self.row_counts.append(self._count)
+        self._current = None
+        self._count = 0
 
 class ImporterService:
     def __init__(self):
@@ -44,112 +95,484 @@ class ImporterService:
             except ValueError:
                 return None
 
-    def process_csv(self, file_content: bytes, filename: str, target_account_hash: str) -> Dict[str, Any]:
+    def process_csv(self, file_content: bytes, filename: str, target_account_hash: str, job=None) -> Dict[str, Any]:
         """
         處理上傳的 CSV 內容。
         強制使用使用者從前端指定的 target_account_hash，不再進行任何猜測。
+        job 為選用的 ImportJob，用於回報進度與支援取消 (背景匯入工作)。
         """
-        content_str = file_content.decode('utf-8-sig')
-        
         print(f"🚀 [IMPORTER] Forced match: File '{filename}' -> Account '{target_account_hash[:8]}...'")
 
+        # 內容完全相同的檔案已匯入過該帳戶，直接略過 (不解析、不查詢去重)
+        duplicate = self.check_duplicate_file(file_content, target_account_hash)
+        if duplicate:
+            if job: job.record(skipped=duplicate["stats"]["skipped"])
+            return duplicate
+
+        parsed = self.parse_csv(file_content, filename)
+        return self.import_parsed(parsed, target_account_hash, job=job)
+
+    def check_duplicate_file(self, file_content: bytes, account_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        依檔案 SHA-256 查詢匯入帳本，若已匯入過則回傳略過結果，否則回傳 None
+        """
+        file_hash = hashlib.sha256(file_content).hexdigest()
+        db = SessionLocal()
+        try:
+            entry = db.query(ImportLedger).filter(
+                ImportLedger.file_hash == file_hash,
+                ImportLedger.account_id == account_hash
+            ).first()
+            if not entry:
+                return None
+            print(f"⏭️ [IMPORTER] Identical file already imported on {entry.created_at} ('{entry.filename}'), skipped.")
+            if entry.kind == "transactions":
+                stats = {"dividends": 0, "trades": 0, "skipped": entry.row_count or 0, "errors": 0, "transaction_history": 0}
+            else:
+                stats = {"history_records": 0, "skipped": entry.row_count or 0}
+            return {"success": True, "duplicate": True, "stats": stats, "message": "檔案內容與先前匯入相同，已略過"}
+        except Exception as e:
+            print(f"⚠️ [IMPORTER] Import ledger lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def parse_csv(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        """
+        解析 CSV 內容為標準化的列資料 (不接觸資料庫，可在子行程中平行執行)
+        回傳 {"success", "kind": "transactions" | "balances", "filename", "rows"}
+        Amount / Quantity / Price / Date 以欄為單位批次解析，結果與 _parse_amount / _parse_date 一致
+        """
+        content_str = file_content.decode('utf-8-sig')
+        header, records = self._read_records(content_str)
+        chunker = _RecordChunker(header)
+        chunk_ids = [chunker.add(values) for values in records]
+        meta = {"file_hash": hashlib.sha256(file_content).hexdigest(), "chunks": chunker.finish()}
+
+        def column(name: str, default: Optional[str] = None) -> List[Optional[str]]:
+            # 與 csv.DictReader.get 相同語意：欄位不存在回傳 default，列太短回傳 None
+            if name not in header:
+                return [default] * len(records)
+            idx = len(header) - 1 - header[::-1].index(name)
+            return [values[idx] for values in records]
+
         # 簡單判斷是 Transactions 還是 Balances (Positions)
         if "Transactions" in filename or "Action" in content_str:
-            # 同時匯入舊有的 TradeHistory/Dividend 以及新的 TransactionHistory
-            res1 = self._import_transactions(content_str, target_account_hash)
-            res2 = self.import_transactions_csv(content_str, target_account_hash)
-            
-            if not res1["success"]: return res1
-            if not res2["success"]: return res2
-            
-            # 合併統計
-            res1["stats"].update({"transaction_history": res2["stats"]["added"]})
-            return res1
+            dates = self._parse_date_column(column('Date'))
+            amounts = self._parse_amount_column(column('Amount'))
+            quantities = self._parse_amount_column(column('Quantity', '0'))
+            prices = self._parse_amount_column(column('Price', '0'))
+            actions = column('Action')
+            symbols = column('Symbol')
+            descriptions = column('Description')
+
+            rows = []
+            # index 為原始列序號，用於產生 TransactionHistory 的 unique_id
+            for i in range(len(records)):
+                action = (actions[i] or '').strip()
+                if not action:
+                    continue
+                symbol = symbols[i]
+                rows.append({
+                    "index": i,
+                    "chunk": chunk_ids[i],
+                    "date": dates[i],
+                    "action": action,
+                    "symbol": symbol.strip() if symbol is not None else None,
+                    "description": (descriptions[i] or '').strip(),
+                    "amount": amounts[i],
+                    "quantity": quantities[i],
+                    "price": prices[i],
+                })
+            return {"success": True, "kind": "transactions", "filename": filename, "rows": rows, **meta}
         elif "Balances" in filename or "Market Value" in content_str or "Amount" in content_str:
-            return self._import_balances(content_str, target_account_hash)
+            # 支援多種金額欄位名稱
+            values = [mv or amt for mv, amt in zip(column('Market Value'), column('Amount'))]
+            dates = self._parse_date_column(column('Date'))
+            balances = self._parse_amount_column(values)
+            rows = [
+                {"chunk": chunk_ids[i], "date": dates[i], "balance": balances[i]}
+                for i in range(len(records))
+            ]
+            return {"success": True, "kind": "balances", "filename": filename, "rows": rows, **meta}
         else:
-            return {"success": False, "error": "無法判斷 CSV 類型 (Transactions 或 Balances)"}
+            return {"success": False, "filename": filename, "error": "無法判斷 CSV 類型 (Transactions 或 Balances)"}
+
+    def _read_records(self, content_str: str) -> Tuple[List[str], List[List[Optional[str]]]]:
+        """
+        讀取 CSV 為 (表頭, 資料列)，資料列補齊/收合為表頭長度 (與 csv.DictReader 相同：
+        空白列略過、缺少的欄位為 None、多出的欄位收合為最後一個 list 值)
+        """
+        reader = csv.reader(io.StringIO(content_str))
+        header = next(reader, [])
+        width = len(header)
+        records = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [None] * (width - len(row))
+            elif len(row) > width:
+                row = row[:width] + [row[width:]]
+            records.append(row)
+        return header, records
+
+    def _parse_amount_column(self, values: List[Optional[str]]) -> List[float]:
+        """
+        批次版 _parse_amount：一次移除引號、$ 與逗號並轉換為數值
+        向量化無法解析的非空儲存格退回逐格解析，確保結果完全一致
+        """
+        if not values:
+            return []
+        raw = pd.Series(values, dtype=object)
+        cleaned = (raw.where(raw.notna(), '').astype(str)
+                   .str.replace('"', '', regex=False)
+                   .str.replace('$', '', regex=False)
+                   .str.replace(',', '', regex=False)
+                   .str.strip())
+        numbers = pd.to_numeric(cleaned, errors='coerce')
+        result = numbers.fillna(0.0).to_numpy(dtype=float)
+        for i in np.flatnonzero((numbers.isna() & (cleaned != '')).to_numpy()):
+            result[i] = self._parse_amount(values[i])
+        return result.tolist()
+
+    def _parse_date_column(self, values: List[Optional[str]]) -> List[Optional[datetime.date]]:
+        """
+        批次版 _parse_date：移除 "as of" 後綴後一次以 MM/DD/YYYY 解析
+        其他格式 (例如 ISO) 退回逐格解析
+        """
+        if not values:
+            return []
+        raw = pd.Series(values, dtype=object)
+        cleaned = (raw.where(raw.notna(), '').astype(str)
+                   .str.replace('"', '', regex=False)
+                   .str.split(' as of ', n=1, regex=False).str[0]
+                   .str.strip())
+        parsed = pd.to_datetime(cleaned, format='%m/%d/%Y', errors='coerce')
+        missing = parsed.isna().to_numpy()
+        result = [None if missing[i] else d for i, d in enumerate(parsed.dt.date.tolist())]
+        for i in np.flatnonzero(missing & (cleaned != '').to_numpy()):
+            result[i] = self._parse_date(values[i])
+        return result
+
+    def import_parsed(self, parsed: Dict[str, Any], account_hash: str, job=None) -> Dict[str, Any]:
+        """
+        將 parse_csv 的結果寫入資料庫 (透過單一寫入鎖序列化)
+        """
+        if not parsed.get("success"):
+            return {"success": False, "error": parsed.get("error", "解析失敗")}
+
+        rows = parsed["rows"]
+        if job: job.record(parsed=len(rows))
+
+        with _write_lock:
+            # 只處理匯入帳本中未出現過的區塊
+            chunks = parsed.get("chunks") or []
+            seen = self._load_seen_chunks(account_hash, parsed["kind"], chunks)
+            if seen:
+                fresh_rows = [r for r in rows if chunks[r["chunk"]] not in seen]
+                skipped_rows = len(rows) - len(fresh_rows)
+                rows = fresh_rows
+                if job: job.record(skipped=skipped_rows)
+                print(f"⏭️ [IMPORTER] {len(seen)}/{len(set(chunks))} chunks already imported, {skipped_rows} rows skipped.")
+            else:
+                skipped_rows = 0
+
+            if parsed["kind"] == "transactions":
+                # 同時匯入舊有的 TradeHistory/Dividend 以及新的 TransactionHistory
+                result = self._import_transactions(rows, account_hash, job=job)
+                if not result["success"]: return result
+                res2 = self._import_transaction_history(rows, account_hash, job=job)
+                if not res2["success"]: return res2
+
+                # 合併統計
+                result["stats"].update({"transaction_history": res2["stats"]["added"]})
+            else:
+                result = self._import_balances(rows, account_hash, job=job)
+                if not result["success"]: return result
+
+            result["stats"]["skipped"] += skipped_rows
+            result["stats"]["skipped_chunks"] = len(seen)
+            self._record_ledger(parsed, account_hash, seen)
+            return result
+
+    def preview_csv(self, file_content: bytes, filename: str, account_hash: str, sample_size: int = 20) -> Dict[str, Any]:
+        """
+        試算匯入 (dry-run)：比對資料庫計算將新增 / 重複 / 更新的列數，不寫入任何資料
+        """
+        parsed = self.parse_csv(file_content, filename)
+        result = self.preview_parsed(parsed, account_hash, sample_size=sample_size)
+        if result.get("success"):
+            result["duplicate_file"] = self.check_duplicate_file(file_content, account_hash) is not None
+        return result
+
+    def preview_parsed(self, parsed: Dict[str, Any], account_hash: str, sample_size: int = 20) -> Dict[str, Any]:
+        """
+        使用與實際匯入相同的分類邏輯 (_classify_*)，僅以批次查詢讀取既有鍵值
+        回傳各狀態的列數與每種狀態最多 sample_size 筆範例
+        """
+        if not parsed.get("success"):
+            return {"success": False, "error": parsed.get("error", "解析失敗")}
+
+        rows = parsed["rows"]
+        chunks = parsed.get("chunks") or []
+        seen = self._load_seen_chunks(account_hash, parsed["kind"], chunks)
+        if seen:
+            fresh_rows = [r for r in rows if chunks[r["chunk"]] not in seen]
+        else:
+            fresh_rows = rows
+
+        summary: Dict[str, Any] = {"rows": len(rows), "already_imported": len(rows) - len(fresh_rows)}
+        samples: Dict[str, List[Dict[str, Any]]] = {}
+
+        def sample(status: str, item: Dict[str, Any]):
+            bucket = samples.setdefault(status, [])
+            if len(bucket) < sample_size:
+                bucket.append(item)
 
-    def _import_transactions(self, csv_content: str, account_hash: str) -> Dict[str, Any]:
         db = SessionLocal()
-        stats = {"dividends": 0, "trades": 0, "skipped": 0, "errors": 0}
-        
         try:
-            reader = csv.DictReader(io.StringIO(csv_content))
-            for row in reader:
-                action = row.get('Action', '').strip()
-                if not action: continue
-                
-                action_lower = action.lower()
-                symbol = row.get('Symbol', 'CASH').strip()
-                date_obj = self._parse_date(row.get('Date'))
-                amount = self._parse_amount(row.get('Amount'))
-                description = row.get('Description', '').strip()
-                
-                if not date_obj:
+            if parsed["kind"] == "transactions":
+                existing = self._load_transaction_keys(db, fresh_rows, account_hash)
+                counts = {"new_dividends": 0, "new_trades": 0, "duplicates": 0, "ignored": 0, "errors": 0}
+                for row, kind, fields, status in self._classify_transactions(fresh_rows, account_hash, existing):
+                    if status == "new":
+                        counts["new_dividends" if kind == "dividend" else "new_trades"] += 1
+                    elif status == "duplicate":
+                        counts["duplicates"] += 1
+                    elif status == "ignored":
+                        counts["ignored"] += 1
+                    else:
+                        counts["errors"] += 1
+                    item = {k: row[k] for k in ("date", "action", "symbol", "amount")}
+                    item["target"] = kind
+                    sample(status, item)
+
+                ids = self._load_transaction_history_ids(
+                    db, [self._transaction_history_id(r) for r in fresh_rows if r["date"]]
+                )
+                history = {"new": 0, "duplicate": 0, "error": 0}
+                for _, _, status in self._classify_transaction_history(fresh_rows, ids):
+                    history[status] += 1
+                counts["new_transaction_history"] = history["new"]
+                counts["duplicate_transaction_history"] = history["duplicate"]
+                summary.update(counts)
+            else:
+                clean_hash = str(account_hash).strip()
+                current = {d: r.balance for d, r in self._load_balances(db, fresh_rows, clean_hash).items()}
+                counts = {"new": 0, "updated": 0, "unchanged": 0, "ignored": 0}
+                for row, status, previous in self._classify_balances(fresh_rows, current):
+                    counts[status] += 1
+                    sample(status, {"date": row["date"], "balance": row["balance"], "previous_balance": previous})
+                summary.update(counts)
+        except Exception as e:
+            print(f"❌ [IMPORTER] Dry-run failed: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            db.close()
+
+        return {
+            "success": True,
+            "dry_run": True,
+            "kind": parsed["kind"],
+            "summary": summary,
+            "samples": samples
+        }
+
+    def _load_seen_chunks(self, account_hash: str, kind: str, chunk_hashes: List[str]) -> set:
+        if not chunk_hashes:
+            return set()
+        db = SessionLocal()
+        try:
+            seen = set()
+            unique_hashes = list(set(chunk_hashes))
+            # 分批查詢，避免超過 SQLite 參數數量上限
+            for start in range(0, len(unique_hashes), 500):
+                batch = unique_hashes[start:start + 500]
+                found = db.query(ImportChunk.chunk_hash).filter(
+                    ImportChunk.account_id == account_hash,
+                    ImportChunk.kind == kind,
+                    ImportChunk.chunk_hash.in_(batch)
+                ).all()
+                seen.update(r.chunk_hash for r in found)
+            return seen
+        except Exception as e:
+            print(f"⚠️ [IMPORTER] Import chunk lookup failed: {e}")
+            return set()
+        finally:
+            db.close()
+
+    def _record_ledger(self, parsed: Dict[str, Any], account_hash: str, seen: set):
+        """
+        匯入成功後寫入檔案雜湊與新區塊雜湊
+        """
+        db = SessionLocal()
+        try:
+            chunks = parsed.get("chunks") or []
+            row_counts = {}
+            for r in parsed["rows"]:
+                h = chunks[r["chunk"]]
+                row_counts[h] = row_counts.get(h, 0) + 1
+            for h in dict.fromkeys(chunks):
+                if h in seen:
                     continue
+                db.add(ImportChunk(
+                    chunk_hash=h,
+                    account_id=account_hash,
+                    kind=parsed["kind"],
+                    row_count=row_counts.get(h, 0)
+                ))
+            if parsed.get("file_hash"):
+                db.add(ImportLedger(
+                    file_hash=parsed["file_hash"],
+                    account_id=account_hash,
+                    filename=parsed.get("filename"),
+                    kind=parsed["kind"],
+                    row_count=len(parsed["rows"])
+                ))
+            db.commit()
+        except Exception as e:
+            print(f"⚠️ [IMPORTER] Failed to record import ledger: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _get_account_hash_from_filename(self, filename: str, account_map: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        依檔名中的帳號末三碼 (例如 yuang_XXX323_Transactions.csv -> 323) 對應帳戶 Hash
+        account_map 預設讀取 SCHWAB_ACCOUNT_MAP 設定 (由 get_linked_accounts 寫入)
+        """
+        if account_map is None:
+            account_map = self._load_account_map()
+        if not account_map:
+            return None
+
+        base = os.path.basename(filename)
+        # 優先比對遮罩帳號 (XXX323 / XXXX024)
+        match = re.search(r"X+(\d{3,})", base, re.IGNORECASE)
+        if match and match.group(1)[-3:] in account_map:
+            return account_map[match.group(1)[-3:]]
+
+        for suffix, acc_hash in account_map.items():
+            if suffix and suffix in base:
+                return acc_hash
+        return None
+
+    def _load_account_map(self) -> Dict[str, str]:
+        from app.services.settings_store import settings_store
+        try:
+            value = settings_store.get("SCHWAB_ACCOUNT_MAP")
+            if value:
+                return json.loads(value)
+        except Exception as e:
+            print(f"⚠️ [IMPORTER] Failed to load account map: {e}")
+        return {}
+
+    def _trade_side(self, action_lower: str) -> Optional[str]:
+        if action_lower == 'buy': return 'BUY'
+        if action_lower == 'sell': return 'SELL'
+        if action_lower == 'reinvest shares': return 'BUY'
+        if any(kw in action_lower for kw in ['deposit', 'credit interest', 'funds received', 'ach receipt']):
+            return 'DEPOSIT'
+        if any(kw in action_lower for kw in ['withdrawal', 'cash disbursement', 'atm']):
+            return 'WITHDRAWAL'
+        return None
+
+    def _transaction_record(self, row: Dict[str, Any], account_hash: str) -> Optional[Tuple[str, tuple, Dict[str, Any]]]:
+        """
+        將交易列對應為 ("dividend" | "trade", 去重鍵, 欄位)，無法對應的動作回傳 None
+        去重鍵與先前逐列查詢的條件相同 (CSV 通常沒有 activityId，使用組合鍵)
+        """
+        action = row["action"]
+        action_lower = action.lower()
+        symbol = row["symbol"] if row["symbol"] is not None else 'CASH'
+        date_obj = row["date"]
+        amount = row["amount"]
+        description = f"{action}: {row['description']}"
+
+        # 1. 股息處理
+        if any(kw in action_lower for kw in self.div_keywords) and amount > 0:
+            fields = dict(account_hash=account_hash, date=date_obj, symbol=symbol, amount=amount, description=description)
+            return "dividend", (date_obj, symbol, amount), fields
+
+        # 2. 交易處理 (買賣、入金出金、DRIP)
+        side = self._trade_side(action_lower)
+        if not side:
+            return None
+        qty = abs(row["quantity"])
+        price = abs(row["price"])
+        quantity = qty if side not in ['DEPOSIT', 'WITHDRAWAL'] else amount
+        price = price if price > 0 else 1.0
+        fields = dict(
+            account_hash=account_hash, date=date_obj, symbol=symbol, side=side,
+            quantity=quantity, price=price, realized_pnl=0.0, description=description
+        )
+        return "trade", (date_obj, symbol, side, quantity, price), fields
+
+    def _load_transaction_keys(self, db: Session, rows: List[Dict[str, Any]], account_hash: str) -> Dict[str, set]:
+        """
+        一次載入該帳戶在檔案日期範圍內既有的股息與交易去重鍵
+        """
+        keys = {"dividend": set(), "trade": set()}
+        dates = [r["date"] for r in rows if r["date"]]
+        if not dates:
+            return keys
+        start, end = min(dates), max(dates)
+        for r in db.query(Dividend.date, Dividend.symbol, Dividend.amount).filter(
+            Dividend.account_hash == account_hash,
+            Dividend.date >= start, Dividend.date <= end
+        ):
+            keys["dividend"].add((r.date, r.symbol, r.amount))
+        for r in db.query(TradeHistory.date, TradeHistory.symbol, TradeHistory.side,
+                          TradeHistory.quantity, TradeHistory.price).filter(
+            TradeHistory.account_hash == account_hash,
+            TradeHistory.date >= start, TradeHistory.date <= end
+        ):
+            keys["trade"].add((r.date, r.symbol, r.side, r.quantity, r.price))
+        return keys
+
+    def _classify_transactions(self, rows: List[Dict[str, Any]], account_hash: str, existing: Dict[str, set]):
+        """
+        逐列產生 (row, kind, fields, status)，status 為 new / duplicate / ignored / error
+        只與資料庫既有的鍵比對：同一檔案內相同的兩筆 (例如同日同價的兩次成交) 都是真實交易，皆視為 new
+        """
+        for row in rows:
+            if not row["date"]:
+                yield row, None, None, "error"
+                continue
+            record = self._transaction_record(row, account_hash)
+            if record is None:
+                yield row, None, None, "ignored"
+                continue
+            kind, key, fields = record
+            if key in existing[kind]:
+                yield row, kind, fields, "duplicate"
+            else:
+                yield row, kind, fields, "new"
+
+    def _import_transactions(self, rows: List[Dict[str, Any]], account_hash: str, job=None) -> Dict[str, Any]:
+        db = SessionLocal()
+        stats = {"dividends": 0, "trades": 0, "skipped": 0, "errors": 0}
 
-                # 1. 股息處理
-                if any(kw in action_lower for kw in self.div_keywords) and amount > 0:
-                    # 去重檢查 (CSV 通常沒有 activityId，使用組合鍵)
-                    existing = db.query(Dividend).filter(
-                        Dividend.account_hash == account_hash,
-                        Dividend.date == date_obj,
-                        Dividend.symbol == symbol,
-                        Dividend.amount == amount
-                    ).first()
-                    
-                    if not existing:
-                        db.add(Dividend(
-                            account_hash=account_hash,
-                            date=date_obj,
-                            symbol=symbol,
-                            amount=amount,
-                            description=f"{action}: {description}"
-                        ))
+        try:
+            existing = self._load_transaction_keys(db, rows, account_hash)
+            for row, kind, fields, status in self._classify_transactions(rows, account_hash, existing):
+                if job: job.check_cancelled()
+
+                if status == "error":
+                    stats["errors"] += 1
+                    if job: job.record(errored=1)
+                elif status == "duplicate":
+                    stats["skipped"] += 1
+                    if job: job.record(skipped=1)
+                elif status == "new":
+                    if kind == "dividend":
+                        db.add(Dividend(**fields))
                         stats["dividends"] += 1
                     else:
-                        stats["skipped"] += 1
-                
-                # 2. 交易處理 (買賣、入金出金、DRIP)
-                else:
-                    side = None
-                    if action_lower == 'buy': side = 'BUY'
-                    elif action_lower == 'sell': side = 'SELL'
-                    elif action_lower == 'reinvest shares': side = 'BUY'
-                    elif any(kw in action_lower for kw in ['deposit', 'credit interest', 'funds received', 'ach receipt']): 
-                        side = 'DEPOSIT'
-                    elif any(kw in action_lower for kw in ['withdrawal', 'cash disbursement', 'atm']): 
-                        side = 'WITHDRAWAL'
-                    
-                    if side:
-                        qty = abs(self._parse_amount(row.get('Quantity', '0')))
-                        price = abs(self._parse_amount(row.get('Price', '0')))
-                        
-                        # 唯一性檢查
-                        existing = db.query(TradeHistory).filter(
-                            TradeHistory.account_hash == account_hash,
-                            TradeHistory.date == date_obj,
-                            TradeHistory.symbol == symbol,
-                            TradeHistory.side == side,
-                            TradeHistory.quantity == (qty if side not in ['DEPOSIT', 'WITHDRAWAL'] else amount),
-                            TradeHistory.price == (price if price > 0 else 1.0)
-                        ).first()
-                        
-                        if not existing:
-                            db.add(TradeHistory(
-                                account_hash=account_hash,
-                                date=date_obj,
-                                symbol=symbol,
-                                side=side,
-                                quantity=qty if side not in ['DEPOSIT', 'WITHDRAWAL'] else amount,
-                                price=price if price > 0 else 1.0,
-                                realized_pnl=0.0,
-                                description=f"{action}: {description}"
-                            ))
-                            stats["trades"] += 1
-                        else:
-                            stats["skipped"] += 1
+                        db.add(TradeHistory(**fields))
+                        stats["trades"] += 1
+                    if job: job.record(inserted=1)
 
             db.commit()
             return {"success": True, "stats": stats}
@@ -159,7 +582,46 @@ class ImporterService:
         finally:
             db.close()
 
-    def _import_balances(self, csv_content: str, account_hash: str) -> Dict[str, Any]:
+    def _load_balances(self, db: Session, rows: List[Dict[str, Any]], account_id: str) -> Dict[Any, HistoricalBalance]:
+        """
+        一次載入該帳戶在檔案日期範圍內的 HistoricalBalance (同一日期保留最早的一筆)
+        """
+        dates = [r["date"] for r in rows if r["date"]]
+        if not dates:
+            return {}
+        records = {}
+        for record in db.query(HistoricalBalance).filter(
+            HistoricalBalance.account_id == account_id,
+            HistoricalBalance.date >= min(dates),
+            HistoricalBalance.date <= max(dates)
+        ).order_by(HistoricalBalance.id):
+            records.setdefault(record.date, record)
+        return records
+
+    def _classify_balances(self, rows: List[Dict[str, Any]], current: Dict[Any, float]):
+        """
+        逐列產生 (row, status, previous_balance)，status 為 new / updated / unchanged / ignored
+        current 為日期 -> 餘額，會隨新增與更新同步修改
+        """
+        for row in rows:
+            total_val = row["balance"]
+            date_obj = row["date"]
+            if not date_obj or total_val <= 0:
+                yield row, "ignored", None
+                continue
+            if date_obj not in current:
+                current[date_obj] = total_val
+                yield row, "new", None
+                continue
+            previous = current[date_obj]
+            # 如果已存在且數值不同，則更新 (處理浮點數微差)
+            if abs(previous - total_val) > 0.01:
+                current[date_obj] = total_val
+                yield row, "updated", previous
+            else:
+                yield row, "unchanged", previous
+
+    def _import_balances(self, rows: List[Dict[str, Any]], account_hash: str, job=None) -> Dict[str, Any]:
         """
         處理資產歷史匯入 (Balances CSV)
         強制將資料寫入使用者指定的 account_hash
@@ -167,43 +629,29 @@ class ImporterService:
         db = SessionLocal()
         count = 0
         skipped = 0
+        # 清理 account_hash 確保比對一致
+        clean_hash = str(account_hash).strip()
         try:
-            reader = csv.DictReader(io.StringIO(csv_content))
-            for row in reader:
-                # 嘉信 Balances CSV 通常有 'Date' 和 'Market Value' 或 'Amount' 欄位
-                date_val = row.get('Date')
-                # 支援多種金額欄位名稱
-                total_val = self._parse_amount(row.get('Market Value') or row.get('Amount'))
-                
-                date_obj = self._parse_date(date_val)
-                if not date_obj or total_val <= 0:
-                    continue
-
-                # 清理 account_hash 確保比對一致
-                clean_hash = str(account_hash).strip()
-
-                # 檢查是否已存在該帳戶在該日期的紀錄 (避免重複匯入)
-                # 務必同時包含 date 和 account_id，防止跨帳號覆蓋
-                existing = db.query(HistoricalBalance).filter(
-                    HistoricalBalance.date == date_obj,
-                    HistoricalBalance.account_id == clean_hash
-                ).first()
-
-                if existing:
-                    # 如果已存在且數值不同，則更新
-                    if abs(existing.balance - total_val) > 0.01: # 處理浮點數微差
-                        existing.balance = total_val
-                        count += 1
-                    else:
-                        skipped += 1
-                else:
-                    # 建立新紀錄
-                    db.add(HistoricalBalance(
-                        date=date_obj,
-                        account_id=clean_hash,
-                        balance=total_val
-                    ))
+            # 務必同時以 date 和 account_id 比對，防止跨帳號覆蓋
+            records = self._load_balances(db, rows, clean_hash)
+            current = {d: r.balance for d, r in records.items()}
+            for row, status, _ in self._classify_balances(rows, current):
+                if job: job.check_cancelled()
+                if status == "new":
+                    record = HistoricalBalance(date=row["date"], account_id=clean_hash, balance=row["balance"])
+                    db.add(record)
+                    records[row["date"]] = record
+                    count += 1
+                    if job: job.record(inserted=1)
+                elif status == "updated":
+                    records[row["date"]].balance = row["balance"]
                     count += 1
+                    if job: job.record(inserted=1)
+                elif status == "unchanged":
+                    skipped += 1
+                    if job: job.record(skipped=1)
+                else:
+                    if job: job.record(skipped=1)
 
             # 確保所有變更都提交
             db.commit()
@@ -216,60 +664,87 @@ class ImporterService:
         finally:
             db.close()
 
-    def import_transactions_csv(self, csv_content: str, target_account_hash: str) -> Dict[str, Any]:
+    def import_transactions_csv(self, csv_content: str, target_account_hash: str, job=None) -> Dict[str, Any]:
         """
         匯入完整交易紀錄到 TransactionHistory 表。
         """
-        db = SessionLocal()
-        stats = {"added": 0, "skipped": 0, "errors": 0}
-        try:
-            reader = csv.DictReader(io.StringIO(csv_content))
-
-            for i, row in enumerate(reader):
-                date_str = row.get('Date')
-                action = row.get('Action', '').strip()
-                symbol = row.get('Symbol', '').strip()
-                description = row.get('Description', '').strip()
-                amount = self._parse_amount(row.get('Amount'))
-                
-                if not date_str or not action:
-                    continue
-                
-                date_obj = self._parse_date(date_str)
-                if not date_obj:
-                    continue
+        parsed = self.parse_csv(csv_content.encode('utf-8'), "Transactions.csv")
+        with _write_lock:
+            return self._import_transaction_history(parsed["rows"], target_account_hash, job=job)
+
+    def _transaction_history_id(self, row: Dict[str, Any]) -> str:
+        # 嘉信 CSV 沒給 ID，我們用 (Date, Action, Symbol, Description, Amount, RowIndex) 的 Hash
+        # 加入 row index 是為了處理同一天完全相同的多筆分錄 (例如 Journal 0.0)
+        raw_id = f"{row['date']}|{row['action']}|{row['symbol'] or ''}|{row['description']}|{row['amount']}|{row['index']}"
+        return hashlib.md5(raw_id.encode('utf-8')).hexdigest()
 
-                # 生成 unique_id 防止重複匯入
-                # 嘉信 CSV 沒給 ID，我們用 (Date, Action, Symbol, Description, Amount, RowIndex) 的 Hash
-                # 加入 row index (i) 是為了處理同一天完全相同的多筆分錄 (例如 Journal 0.0)
-                raw_id = f"{date_obj}|{action}|{symbol}|{description}|{amount}|{i}"
-                unique_id = hashlib.md5(raw_id.encode('utf-8')).hexdigest()
+    def _load_transaction_history_ids(self, db: Session, unique_ids: List[str]) -> set:
+        found = set()
+        unique_ids = list(set(unique_ids))
+        # 分批查詢，避免超過 SQLite 參數數量上限
+        for start in range(0, len(unique_ids), 500):
+            batch = unique_ids[start:start + 500]
+            found.update(r.unique_id for r in db.query(TransactionHistory.unique_id).filter(
+                TransactionHistory.unique_id.in_(batch)
+            ))
+        return found
 
-                existing = db.query(TransactionHistory).filter(
-                    TransactionHistory.unique_id == unique_id
-                ).first()
+    def _classify_transaction_history(self, rows: List[Dict[str, Any]], existing: set):
+        """
+        逐列產生 (row, unique_id, status)，status 為 new / duplicate / error
+        """
+        for row in rows:
+            if not row["date"]:
+                yield row, None, "error"
+                continue
+            unique_id = self._transaction_history_id(row)
+            if unique_id in existing:
+                yield row, unique_id, "duplicate"
+            else:
+                existing.add(unique_id)
+                yield row, unique_id, "new"
 
-                if not existing:
+    def _import_transaction_history(self, rows: List[Dict[str, Any]], target_account_hash: str, job=None) -> Dict[str, Any]:
+        db = SessionLocal()
+        stats = {"added": 0, "skipped": 0, "errors": 0}
+        try:
+            # 生成 unique_id 防止重複匯入，既有的 ID 以批次查詢一次載入
+            existing = self._load_transaction_history_ids(
+                db, [self._transaction_history_id(r) for r in rows if r["date"]]
+            )
+            for row, unique_id, status in self._classify_transaction_history(rows, existing):
+                if job: job.check_cancelled()
+                if status == "error":
+                    stats["errors"] += 1
+                elif status == "duplicate":
+                    stats["skipped"] += 1
+                    if job: job.record(skipped=1)
+                else:
                     db.add(TransactionHistory(
                         account_id=target_account_hash,
-                        date=date_obj,
-                        action=action,
-                        symbol=symbol,
-                        description=description,
-                        amount=amount,
+                        date=row["date"],
+                        action=row["action"],
+                        symbol=row["symbol"] or '',
+                        description=row["description"],
+                        amount=row["amount"],
                         unique_id=unique_id
                     ))
                     stats["added"] += 1
-                else:
-                    stats["skipped"] += 1
+                    if job: job.record(inserted=1)
 
             db.commit()
             return {"success": True, "stats": stats}
         except Exception as e:
             db.rollback()
-            print(f"❌ [IMPORTER] Error in import_transactions_csv: {e}")
+            print(f"❌ [IMPORTER] Error in _import_transaction_history: {e}")
             return {"success": False, "error": str(e)}
         finally:
             db.close()
 
 importer_service = ImporterService()
+
+def parse_csv_file(file_content: bytes, filename: str) -> Dict[str, Any]:
+    """
+    模組層級的解析入口，供 ProcessPoolExecutor 在子行程中呼叫
+    """
+    return importer_service.parse_csv(file_content, filename)
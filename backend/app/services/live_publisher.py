@@ -0,0 +1,105 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.services.event_bus import EventBus, event_bus
+from app.services.positions_feed import PositionsFeed
+from app.services.rate_limiter import Priority, request_priority
+from app.utils.metrics import time_job
+
+# 快照事件只推送摘要欄位，持倉變動另以 positions 事件送出
+SNAPSHOT_FIELDS = ("total_balance", "cash_balance", "buying_power", "day_pl", "day_pl_percent", "stale")
+
+
+class LivePublisher:
+    """
+    單一上游刷新迴圈：只刷新目前有串流訂閱者的帳戶，每個帳戶每輪抓一次資料，
+    再將變動 (snapshot / positions / quotes) 發布到 EventBus
+    N 個開啟的分頁共用同一次刷新，而不是各自輪詢
+    fetch 可替換為假資料來源，方便測試
+    """
+    def __init__(self, bus: EventBus, fetch: Optional[Callable[[Optional[str]], Dict[str, Any]]] = None,
+                 interval: float = 30):
+        self.bus = bus
+        self._fetch = fetch
+        self.interval = interval
+        self._feed = PositionsFeed(history=2)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.refreshes = 0
+
+    def fetch(self, account_hash: Optional[str]) -> Dict[str, Any]:
+        if self._fetch is not None:
+            return self._fetch(account_hash)
+        from app.services.repository import account_repo
+        return account_repo.get_account_data(account_hash)
+
+    def refresh_once(self) -> int:
+        """
+        刷新所有被訂閱的帳戶，回傳發布的事件數
+        """
+        published = 0
+        for account_key in self.bus.subscribed_accounts():
+            account_key = account_key or "default"
+            try:
+                data = self.fetch(None if account_key == "default" else account_key)
+            except Exception as e:
+                print(f"⚠️ [LIVE] Refresh failed for {account_key[-4:]}: {e}")
+                continue
+            self.refreshes += 1
+            if "error" in data or not data.get("accounts"):
+                continue
+            published += self._publish_changes(account_key, data["accounts"][0])
+        return published
+
+    def _publish_changes(self, account_key: str, account: Dict[str, Any]) -> int:
+        last = self._last.setdefault(account_key, {"snapshot": None, "version": None, "prices": {}})
+        published = 0
+
+        snapshot = {k: account.get(k) for k in SNAPSHOT_FIELDS if k in account}
+        if snapshot != last["snapshot"]:
+            self.bus.publish("snapshot", snapshot, account_key)
+            last["snapshot"] = snapshot
+            published += 1
+
+        holdings: List[Dict[str, Any]] = account.get("holdings", [])
+        delta = self._feed.delta(account_key, holdings, last["version"])
+        if delta["version"] != last["version"]:
+            self.bus.publish("positions", delta, account_key)
+            last["version"] = delta["version"]
+            published += 1
+
+        prices = {h["symbol"]: h.get("price") for h in holdings if h.get("symbol")}
+        changed = {s: p for s, p in prices.items() if last["prices"].get(s) != p}
+        if changed:
+            self.bus.publish("quotes", changed, account_key)
+            published += 1
+        last["prices"] = prices
+        return published
+
+    def _run(self):
+        with request_priority(Priority.DEFAULT):
+            while not self._stop_event.wait(self.interval):
+                try:
+                    with time_job("live_refresh"):
+                        self.refresh_once()
+                except Exception as e:
+                    print(f"❌ [LIVE] Refresh loop error: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="live-publisher")
+            self._thread.start()
+            print(f"🚀 [LIVE] Publisher started (every {self.interval}s while clients are connected)")
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"refreshes": self.refreshes, "interval": self.interval, "accounts": len(self._last)}
+
+
+live_publisher = LivePublisher(event_bus, interval=settings.LIVE_REFRESH_SECONDS)
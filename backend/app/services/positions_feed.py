@@ -0,0 +1,104 @@
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+
+class PositionsFeed:
+    """
+    持倉增量 (delta) 來源
+    每個帳戶在記憶體中保留最近幾個版本的持倉，客戶端帶上最後看過的版本，
+    伺服器只回傳變動 / 新增 / 移除的持倉；版本太舊或未知時回傳完整清單
+    版本字串含啟動識別碼，伺服器重啟後舊版本一律視為未知
+    """
+    def __init__(self, history: int = 8, max_accounts: int = 32):
+        self.history = history
+        self.max_accounts = max_accounts
+        self._boot = uuid.uuid4().hex[:8]
+        self._counter = 0
+        # account_key -> OrderedDict[version, {position_key: position}]
+        self._accounts: "OrderedDict[str, OrderedDict[str, Dict[str, Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.full_responses = 0
+        self.delta_responses = 0
+
+    @staticmethod
+    def _index(positions: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        以代碼為鍵 (OCC 選擇權代碼本身即唯一)，同代碼重複時加上序號
+        """
+        indexed: Dict[str, Dict[str, Any]] = {}
+        for p in positions:
+            key = str(p.get("symbol") or "")
+            n = 1
+            while key in indexed:
+                n += 1
+                key = f"{p.get('symbol')}#{n}"
+            indexed[key] = p
+        return indexed
+
+    def publish(self, account_key: str, positions: List[Dict[str, Any]]) -> str:
+        """
+        登記最新持倉並回傳其版本；內容與最新版本相同時沿用原版本
+        """
+        indexed = self._index(positions)
+        with self._lock:
+            versions = self._accounts.get(account_key)
+            if versions:
+                latest_version, latest = next(reversed(versions.items()))
+                if latest == indexed:
+                    self._accounts.move_to_end(account_key)
+                    return latest_version
+            else:
+                versions = OrderedDict()
+                self._accounts[account_key] = versions
+            self._counter += 1
+            version = f"{self._boot}-{self._counter}"
+            versions[version] = indexed
+            while len(versions) > self.history:
+                versions.popitem(last=False)
+            self._accounts.move_to_end(account_key)
+            while len(self._accounts) > self.max_accounts:
+                self._accounts.popitem(last=False)
+            return version
+
+    def delta(self, account_key: str, positions: List[Dict[str, Any]], since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        登記最新持倉，並回傳相對於 since 版本的差異
+        """
+        version = self.publish(account_key, positions)
+        with self._lock:
+            versions = self._accounts.get(account_key, {})
+            base = versions.get(since) if since else None
+            current = versions.get(version, {})
+
+        if base is None:
+            self.full_responses += 1
+            return {"version": version, "since": since, "full": True, "positions": list(current.values())}
+
+        self.delta_responses += 1
+        changed, added = [], []
+        for key, position in current.items():
+            previous = base.get(key)
+            if previous is None:
+                added.append(position)
+            elif previous != position:
+                changed.append(position)
+        removed = [key for key in base if key not in current]
+        return {
+            "version": version,
+            "since": since,
+            "full": False,
+            "changed": changed,
+            "added": added,
+            "removed": removed,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            accounts = len(self._accounts)
+        return {"accounts": accounts, "full_responses": self.full_responses, "delta_responses": self.delta_responses}
+
+
+positions_feed = PositionsFeed(history=settings.POSITIONS_FEED_HISTORY)
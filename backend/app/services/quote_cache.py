@@ -0,0 +1,98 @@
+import time
+import threading
+from typing import Callable, Dict, Any, List, Optional
+from app.core.config import settings
+from app.utils.sector_mapper import canonical_symbol
+
+
+class QuoteCache:
+    """
+    全程序共用的報價快取 (跨帳戶、跨端點)，依標準化代碼 (canonical_symbol) 儲存
+    同一筆報價依用途套用不同 TTL：
+    - "price"：最新價格，短 TTL
+    - "fundamental"：52 週高點、行業、名稱等基本資料，長 TTL
+    查詢時只向 API 請求缺少或已過期的代碼
+    """
+    def __init__(self, price_ttl: float = 15, fundamental_ttl: float = 3600):
+        self.ttls = {"price": price_ttl, "fundamental": fundamental_ttl}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.symbols_fetched = 0
+
+    def get_many(self, symbols: List[str], fetcher: Callable[[List[str]], Dict[str, Any]],
+                 field: str = "price") -> Dict[str, Dict[str, Any]]:
+        """
+        回傳 {canonical_symbol: quote}，fetcher 接收缺少的原始代碼清單並回傳 API 的 {symbol: quote}
+        API 沒有回傳的代碼會以空報價快取 (短 TTL)，避免無效代碼每次都重新請求
+        """
+        ttl = self.ttls[field]
+        now = time.time()
+        result: Dict[str, Dict[str, Any]] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for symbol in symbols:
+                key = canonical_symbol(symbol)
+                entry = self._entries.get(key)
+                if entry and now - entry["fetched_at"] < (ttl if entry["quote"] else self.ttls["price"]):
+                    self.hits += 1
+                    if entry["quote"]:
+                        result[key] = entry["quote"]
+                elif key not in missing:
+                    self.misses += 1
+                    missing[key] = symbol
+
+        if missing:
+            raw_quotes = fetcher(list(missing.values())) or {}
+            fetched_at = time.time()
+            with self._lock:
+                self.fetches += 1
+                self.symbols_fetched += len(missing)
+                for k, v in raw_quotes.items():
+                    key = canonical_symbol(k)
+                    if key in result:
+                        continue
+                    self._entries[key] = {"quote": v, "fetched_at": fetched_at}
+                    if key in missing:
+                        result[key] = v
+                for key in missing:
+                    if key not in result:
+                        self._entries[key] = {"quote": None, "fetched_at": fetched_at}
+        return result
+
+    def get(self, symbol: str, field: str = "price") -> Optional[Dict[str, Any]]:
+        """
+        只讀取快取 (不呼叫 API)，不存在或已過期時回傳 None
+        """
+        with self._lock:
+            entry = self._entries.get(canonical_symbol(symbol))
+            if entry and entry["quote"] and time.time() - entry["fetched_at"] < self.ttls[field]:
+                return entry["quote"]
+            return None
+
+    def invalidate(self, symbol: Optional[str] = None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(canonical_symbol(symbol), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "fetches": self.fetches,
+                "symbols_fetched": self.symbols_fetched,
+            }
+
+
+quote_cache = QuoteCache(
+    price_ttl=settings.QUOTE_PRICE_TTL_SECONDS,
+    fundamental_ttl=settings.QUOTE_FUNDAMENTAL_TTL_SECONDS
+)
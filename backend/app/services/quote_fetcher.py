@@ -0,0 +1,76 @@
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from app.core.config import settings
+from app.services.circuit_breaker import CircuitOpenError
+
+
+class QuoteFetcher:
+    """
+    大量代碼的報價抓取：切成 API 可接受的區塊並以有限的並行度同時請求
+    每個區塊獨立重試；代碼本身無效 (4xx) 時對半拆分以隔離，上游故障 (429/5xx/連線) 則放棄該區塊，最後合併所有成功的部分結果
+    """
+    def __init__(self, chunk_size: int = 100, max_workers: int = 4, retries: int = 2, backoff: float = 0.5):
+        self.chunk_size = max(1, chunk_size)
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quote-fetch")
+
+    def fetch(self, client, symbols: List[str]) -> Dict[str, Any]:
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+        if len(chunks) == 1:
+            return self._fetch_chunk(client, chunks[0])
+
+        quotes: Dict[str, Any] = {}
+        # 複製呼叫端的 context，讓工作執行緒沿用相同的請求優先順序
+        contexts = [contextvars.copy_context() for _ in chunks]
+        for partial in self._executor.map(
+            lambda ctx, chunk: ctx.run(self._fetch_chunk, client, chunk), contexts, chunks
+        ):
+            quotes.update(partial)
+        return quotes
+
+    def _fetch_chunk(self, client, symbols: List[str]) -> Dict[str, Any]:
+        last_error = None
+        for attempt in range(self.retries + 1):
+            try:
+                resp = client.get_quotes(symbols)
+            except CircuitOpenError:
+                # 斷路器開啟：重試或拆分只會浪費限流額度，交由呼叫端改用快照
+                raise
+            except Exception as e:
+                last_error = str(e)
+            else:
+                if resp.status_code == 200:
+                    return resp.json() or {}
+                last_error = f"HTTP {resp.status_code}"
+                # 4xx (429 除外) 通常是代碼本身的問題，重試無益，拆分以隔離無效代碼
+                if 400 <= resp.status_code < 500 and resp.status_code != 429:
+                    return self._split(client, symbols, last_error)
+            if attempt < self.retries:
+                time.sleep(self.backoff * (2 ** attempt))
+
+        # 429 / 5xx / 連線錯誤屬於上游問題，拆分無法改善，放棄此區塊
+        print(f"⚠️ [QUOTES] Chunk of {len(symbols)} symbols failed after retries ({last_error}), skipping.")
+        return {}
+
+    def _split(self, client, symbols: List[str], last_error: str) -> Dict[str, Any]:
+        if len(symbols) == 1:
+            print(f"⚠️ [QUOTES] Quote for {symbols[0]} failed: {last_error}")
+            return {}
+        # 對半拆分，讓單一無效代碼不會拖垮整個區塊
+        mid = len(symbols) // 2
+        print(f"⚠️ [QUOTES] Chunk of {len(symbols)} symbols failed ({last_error}), splitting.")
+        quotes = self._fetch_chunk(client, symbols[:mid])
+        quotes.update(self._fetch_chunk(client, symbols[mid:]))
+        return quotes
+
+quote_fetcher = QuoteFetcher(
+    chunk_size=settings.QUOTE_CHUNK_SIZE,
+    max_workers=settings.QUOTE_FETCH_WORKERS,
+    retries=settings.QUOTE_FETCH_RETRIES
+)
@@ -0,0 +1,282 @@
+import json
+import time
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+from app.core.config import settings
+from app.services.event_bus import EventBus, event_bus
+from app.utils.sector_mapper import canonical_symbol
+
+EQUITY_TYPES = ("EQUITY", "COLLECTIVE_INVESTMENT")
+
+
+class QuoteStreamIngestor:
+    """
+    串流報價 ingest (schwab-py StreamClient 或 FakeStreamClient)
+    - 訂閱持倉代碼的 Level One 報價 (股票 / ETF 與選擇權)，維護記憶體最新報價表
+    - 每筆 tick 只重算持有該代碼的持倉：市值、損益、當日損益與 drawdown_pct
+    - 變動的持倉定期以 positions 增量事件發布到 EventBus
+    持倉基準 (數量、成本、前收、52 週高點) 來自 REST 快照，由 track_holdings 登記
+    """
+    def __init__(self, bus: EventBus = event_bus, stream_factory: Optional[Callable[[], Any]] = None,
+                 publish_interval: float = 1.0, record_path: Optional[str] = None):
+        self.bus = bus
+        self._stream_factory = stream_factory
+        self.publish_interval = publish_interval
+        self.record_path = record_path
+        self._quotes: Dict[str, Dict[str, Any]] = {}
+        # account_key -> {canonical_symbol: state}
+        self._positions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._holders: Dict[str, Set[str]] = {}
+        self._stream_symbols: Dict[str, str] = {}
+        self._dirty: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._subs_changed = threading.Event()
+        self._thread = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event = threading.Event()
+        self.ticks = 0
+        self.recomputed = 0
+        self.last_tick_at: Optional[float] = None
+
+    # --- 持倉基準 ---
+
+    def track_holdings(self, account_key: str, holdings: List[Dict[str, Any]]):
+        """
+        以最新 REST 快照登記帳戶持倉；串流中已有報價的代碼立即套用最新價格
+        """
+        states = {}
+        for h in holdings:
+            asset_type = h.get("asset_type")
+            if asset_type not in EQUITY_TYPES and asset_type != "OPTION":
+                continue
+            key = canonical_symbol(h.get("symbol"))
+            qty = float(h.get("quantity") or 0)
+            multiplier = 100 if asset_type == "OPTION" else 1
+            price = float(h.get("price") or 0)
+            units = qty * multiplier
+            drawdown = h.get("drawdown_pct")
+            high = price / (1 + drawdown / 100) if drawdown is not None and drawdown > -100 else None
+            states[key] = {
+                "holding": dict(h),
+                "units": units,
+                "close": price - float(h.get("day_pnl") or 0) / units if units else price,
+                "high": high,
+                # 串流代碼：股票用 "/" 分隔類股 (BRK/B)，選擇權沿用 OCC 代碼
+                "stream_symbol": h["symbol"] if asset_type == "OPTION" else h["symbol"].replace(".", "/"),
+                "option": asset_type == "OPTION",
+            }
+
+        with self._lock:
+            previous = set(self._positions.get(account_key, {}))
+            self._positions[account_key] = states
+            for key in previous - set(states):
+                holders = self._holders.get(key)
+                if holders:
+                    holders.discard(account_key)
+                    if not holders:
+                        self._holders.pop(key, None)
+                        self._stream_symbols.pop(key, None)
+            for key, state in states.items():
+                self._holders.setdefault(key, set()).add(account_key)
+                self._stream_symbols[key] = state["stream_symbol"]
+                quote = self._quotes.get(key)
+                if quote:
+                    self._recompute(state, quote)
+            if set(states) != previous:
+                self._subs_changed.set()
+
+    def desired_symbols(self) -> Dict[str, List[str]]:
+        with self._lock:
+            equities, options = [], []
+            for key, stream_symbol in self._stream_symbols.items():
+                account = next(iter(self._holders[key]))
+                (options if self._positions[account][key]["option"] else equities).append(stream_symbol)
+            return {"equity": sorted(equities), "option": sorted(options)}
+
+    # --- tick 處理 ---
+
+    def on_message(self, message: Dict[str, Any]):
+        """
+        StreamClient handler：content 中每筆為單一代碼的部分欄位更新
+        """
+        if self.record_path:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(message, default=str) + "\n")
+        for item in message.get("content", []):
+            self.on_tick(item.get("key"), item)
+
+    def on_tick(self, symbol: Optional[str], fields: Dict[str, Any]):
+        if not symbol:
+            return
+        key = canonical_symbol(symbol)
+        with self._lock:
+            self.ticks += 1
+            self.last_tick_at = time.time()
+            quote = self._quotes.setdefault(key, {})
+            # 串流只送出變動的欄位，與上一筆合併
+            quote.update({k: v for k, v in fields.items() if k != "key" and v is not None})
+            for account_key in self._holders.get(key, ()):
+                state = self._positions[account_key][key]
+                if self._recompute(state, quote):
+                    self._dirty.setdefault(account_key, set()).add(key)
+
+    def _recompute(self, state: Dict[str, Any], quote: Dict[str, Any]) -> bool:
+        """
+        依最新報價增量更新單一持倉，價格未變時回傳 False
+        """
+        fields = ("MARK", "LAST_PRICE") if state["option"] else ("LAST_PRICE", "MARK")
+        price = next((float(quote[f]) for f in fields if quote.get(f)), None)
+        if price is None:
+            return False
+        if quote.get("CLOSE_PRICE"):
+            state["close"] = float(quote["CLOSE_PRICE"])
+        if quote.get("HIGH_PRICE_52_WEEK"):
+            state["high"] = float(quote["HIGH_PRICE_52_WEEK"])
+        if state["high"] is not None and price > state["high"]:
+            state["high"] = price
+
+        h = state["holding"]
+        if h.get("price") == price:
+            return False
+        units = state["units"]
+        total_cost = float(h.get("cost_basis") or 0)
+        market_value = units * price
+        day_pnl = units * (price - state["close"])
+        start_value = market_value - day_pnl
+        h.update({
+            "price": price,
+            "market_value": market_value,
+            "total_pnl": market_value - total_cost,
+            "total_pnl_pct": (market_value - total_cost) / abs(total_cost) * 100 if total_cost else h.get("total_pnl_pct", 0),
+            "day_pnl": day_pnl,
+            "day_pnl_pct": day_pnl / abs(start_value) * 100 if start_value else 0,
+            "drawdown_pct": (price - state["high"]) / state["high"] * 100 if state["high"] else h.get("drawdown_pct"),
+        })
+        self.recomputed += 1
+        return True
+
+    def positions(self, account_key: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(s["holding"]) for s in self._positions.get(account_key, {}).values()]
+
+    def last_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            quote = self._quotes.get(canonical_symbol(symbol))
+            return dict(quote) if quote else None
+
+    def publish_changes(self) -> int:
+        """
+        將累積的變動持倉以 positions 增量事件發布 (每帳戶一則)
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            batches = {
+                account_key: [dict(self._positions[account_key][k]["holding"]) for k in keys
+                              if k in self._positions.get(account_key, {})]
+                for account_key, keys in dirty.items()
+            }
+        for account_key, changed in batches.items():
+            if changed:
+                self.bus.publish("positions", {"version": None, "full": False, "changed": changed,
+                                               "added": [], "removed": [], "source": "stream"}, account_key)
+        return len(batches)
+
+    # --- 串流連線 ---
+
+    def _create_stream(self):
+        if self._stream_factory is not None:
+            return self._stream_factory()
+        if settings.QUOTE_STREAM_REPLAY_FILE:
+            from app.services.fake_stream import FakeStreamClient, load_replay
+            return FakeStreamClient(load_replay(settings.QUOTE_STREAM_REPLAY_FILE), speed=1.0, loop_forever=True)
+        from schwab.streaming import StreamClient
+        from app.services.schwab_client import schwab_client
+        client = schwab_client.get_client()
+        return StreamClient(getattr(client, "raw_client", client))
+
+    async def _sync_subscriptions(self, stream, subscribed: Dict[str, Set[str]]):
+        desired = self.desired_symbols()
+        for kind in ("equity", "option"):
+            want, have = set(desired[kind]), subscribed[kind]
+            add, remove = sorted(want - have), sorted(have - want)
+            if add:
+                method = f"level_one_{kind}_subs" if not have else f"level_one_{kind}_add"
+                await getattr(stream, method)(add)
+            if remove:
+                await getattr(stream, f"level_one_{kind}_unsubs")(remove)
+            subscribed[kind] = want
+
+    async def run(self, stream=None):
+        """
+        登入串流、訂閱持倉代碼並持續處理訊息，直到 stop() 或串流結束
+        """
+        stream = stream or self._create_stream()
+        await stream.login()
+        stream.add_level_one_equity_handler(self.on_message)
+        stream.add_level_one_option_handler(self.on_message)
+        subscribed = {"equity": set(), "option": set()}
+        self._subs_changed.set()
+        last_publish = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                if self._subs_changed.is_set():
+                    self._subs_changed.clear()
+                    await self._sync_subscriptions(stream, subscribed)
+                if not subscribed["equity"] and not subscribed["option"]:
+                    # 尚無持倉可訂閱，等待 REST 快照登記
+                    await asyncio.sleep(1)
+                    continue
+                await stream.handle_message()
+                if time.monotonic() - last_publish >= self.publish_interval:
+                    self.publish_changes()
+                    last_publish = time.monotonic()
+        finally:
+            self.publish_changes()
+            try:
+                await stream.logout()
+            except Exception:
+                pass
+
+    def _run_thread(self):
+        from app.services.fake_stream import StreamExhausted
+        while not self._stop_event.is_set():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.run())
+            except StreamExhausted:
+                print("ℹ️ [QUOTE-STREAM] Replay finished.")
+                break
+            except Exception as e:
+                print(f"⚠️ [QUOTE-STREAM] Stream error ({e}), reconnecting in 10s.")
+                self._stop_event.wait(10)
+            finally:
+                self._loop.close()
+                self._loop = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run_thread, daemon=True, name="quote-stream")
+            self._thread.start()
+            print("🚀 [QUOTE-STREAM] Streaming quote ingestor started")
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "symbols": len(self._stream_symbols),
+                "accounts": len(self._positions),
+                "ticks": self.ticks,
+                "recomputed": self.recomputed,
+                "last_tick_at": self.last_tick_at,
+            }
+
+
+quote_stream = QuoteStreamIngestor(publish_interval=settings.QUOTE_STREAM_PUBLISH_SECONDS,
+                                   record_path=settings.QUOTE_STREAM_RECORD_FILE)
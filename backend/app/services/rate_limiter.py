@@ -0,0 +1,164 @@
+import time
+import heapq
+import inspect
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Any, Optional
+from app.core.config import settings
+from app.utils.metrics import schwab_calls, schwab_latency
+
+
+class Priority(IntEnum):
+    """
+    Schwab API 請求優先順序 (數字越小越優先)
+    """
+    INTERACTIVE = 0  # 前端即時請求 (儀表板、持倉)
+    DEFAULT = 1
+    BACKGROUND = 2   # 排程器、交易回補等背景工作
+
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("schwab_priority", default=Priority.DEFAULT)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """
+    在此區塊內發出的 Schwab 請求使用指定的優先順序
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+class RateLimiter:
+    """
+    Token bucket 限流器：每分鐘補充 rate_per_minute 個 token，最多累積 burst 個
+    等待中的請求依優先順序 (同優先則先到先得) 取得 token，背景工作不會搶走前端請求的額度
+    """
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(rate_per_minute // 6)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._stats = {p.name: {"requests": 0, "waited": 0, "total_wait": 0.0, "max_wait": 0.0} for p in Priority}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: Optional[Priority] = None) -> float:
+        """
+        取得一個 token，必要時阻塞等待；回傳等待秒數
+        """
+        priority = Priority(current_priority() if priority is None else priority)
+        start = time.monotonic()
+        with self._cond:
+            entry = (int(priority), next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            while True:
+                self._refill()
+                if self._waiters[0] == entry and self._tokens >= 1:
+                    heapq.heappop(self._waiters)
+                    self._tokens -= 1
+                    break
+                if self._waiters[0] == entry:
+                    self._cond.wait((1 - self._tokens) / self.rate)
+                else:
+                    self._cond.wait()
+            # 喚醒下一位等待者檢查是否輪到自己
+            self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            stat = self._stats[priority.name]
+            stat["requests"] += 1
+            if waited > 0.001:
+                stat["waited"] += 1
+            stat["total_wait"] += waited
+            stat["max_wait"] = max(stat["max_wait"], waited)
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill()
+            by_priority = {}
+            for name, s in self._stats.items():
+                by_priority[name] = {
+                    "requests": s["requests"],
+                    "waited": s["waited"],
+                    "avg_wait": round(s["total_wait"] / s["requests"], 4) if s["requests"] else 0.0,
+                    "max_wait": round(s["max_wait"], 4),
+                }
+            return {
+                "rate_per_minute": round(self.rate * 60, 2),
+                "tokens_available": round(self._tokens, 2),
+                "queue_depth": len(self._waiters),
+                "by_priority": by_priority,
+            }
+
+
+class RateLimitedClient:
+    """
+    schwab-py Client 的代理：所有 API 方法呼叫前先向限流器取得 token
+    若提供 breaker，斷路器開啟時直接拋出 CircuitOpenError，並依結果與延遲回報成功/失敗
+    其他屬性 (例如 client.Account.Fields) 直接轉交原始 client
+    """
+    def __init__(self, client, limiter: RateLimiter, breaker=None):
+        self._client = client
+        self._limiter = limiter
+        self._breaker = breaker
+
+    @property
+    def raw_client(self):
+        return self._client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not inspect.ismethod(attr):
+            return attr
+
+        def limited(*args, **kwargs):
+            breaker = self._breaker
+            if breaker is not None:
+                try:
+                    breaker.before_call()
+                except Exception:
+                    schwab_calls.inc(name, "circuit_open")
+                    raise
+            self._limiter.acquire()
+            start = time.monotonic()
+            try:
+                resp = attr(*args, **kwargs)
+            except Exception as e:
+                schwab_latency.observe(time.monotonic() - start, name)
+                schwab_calls.inc(name, "exception")
+                if breaker is not None:
+                    breaker.record_failure(str(e))
+                raise
+            elapsed = time.monotonic() - start
+            status = getattr(resp, "status_code", 200)
+            schwab_latency.observe(elapsed, name)
+            schwab_calls.inc(name, "ok" if status < 400 else ("throttled" if status == 429 else f"http_{status // 100}xx"))
+            if breaker is not None:
+                if status >= 500 or status == 429:
+                    breaker.record_failure(f"HTTP {status}")
+                else:
+                    breaker.record_success(elapsed)
+            return resp
+        limited.__name__ = name
+        return limited
+
+
+schwab_rate_limiter = RateLimiter(settings.SCHWAB_RATE_LIMIT_PER_MINUTE, settings.SCHWAB_RATE_LIMIT_BURST)
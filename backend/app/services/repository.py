@@ -124,7 +124,12 @@ class AccountRepository:
         """
         獲取帳戶摘要
         """
-        data = self.get_account_data(account_hash)
+        return self.build_summary(self.get_account_data(account_hash), account_hash)
+
+    def build_summary(self, data: Dict[str, Any], account_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        由已取得的帳戶快照計算摘要 (供 /dashboard 共用同一份快照)
+        """
         if "error" in data:
             return data
         
@@ -213,7 +218,12 @@ class AccountRepository:
         """
         獲取所有持倉
         """
-        data = self.get_account_data(account_hash)
+        return self.build_positions(self.get_account_data(account_hash))
+
+    def build_positions(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        由已取得的帳戶快照取出持倉清單
+        """
         if "error" in data:
             return []
         
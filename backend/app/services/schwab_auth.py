@@ -3,30 +3,20 @@ import json
 import time
 from typing import Optional, Tuple
 from app.core.config import settings
-from app.db.database import SessionLocal
-from app.models.persistence import SystemSetting
+from app.services.settings_store import settings_store
 from app.schemas.token import SchwabToken
 from app.utils.auth_utils import get_basic_auth_header
 
 def _get_credentials_from_db() -> Tuple[str, str, str]:
     """
-    從資料庫獲取 Schwab 憑證，若無則回退至 settings
+    從資料庫 (settings_store 快取) 獲取 Schwab 憑證，若無則回退至 settings
     回傳 (api_key, api_secret, redirect_uri)
     """
-    db = SessionLocal()
-    try:
-        setting_key = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_API_KEY").first()
-        api_key = setting_key.value if setting_key else (settings.SCHWAB_API_KEY or settings.SCHWAB_APP_KEY)
-        
-        setting_secret = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_API_SECRET").first()
-        api_secret = setting_secret.value if setting_secret else (settings.SCHWAB_API_SECRET or settings.SCHWAB_APP_SECRET)
-        
-        setting_uri = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_REDIRECT_URI").first()
-        redirect_uri = setting_uri.value if setting_uri else settings.SCHWAB_REDIRECT_URI
-        
-        return api_key, api_secret, redirect_uri
-    finally:
-        db.close()
+    values = settings_store.get_many(["SCHWAB_API_KEY", "SCHWAB_API_SECRET", "SCHWAB_REDIRECT_URI"])
+    api_key = values["SCHWAB_API_KEY"] if "SCHWAB_API_KEY" in values else (settings.SCHWAB_API_KEY or settings.SCHWAB_APP_KEY)
+    api_secret = values["SCHWAB_API_SECRET"] if "SCHWAB_API_SECRET" in values else (settings.SCHWAB_API_SECRET or settings.SCHWAB_APP_SECRET)
+    redirect_uri = values["SCHWAB_REDIRECT_URI"] if "SCHWAB_REDIRECT_URI" in values else settings.SCHWAB_REDIRECT_URI
+    return api_key, api_secret, redirect_uri
 
 def fetch_token_from_schwab(code: str) -> dict:
     """
@@ -6,11 +6,20 @@ import os
 from datetime import datetime, timedelta
 from app.core.config import settings
 from app.db.database import SessionLocal
-from app.utils.sector_mapper import get_sector as get_fallback_sector
-from app.models.persistence import SystemSetting, AssetHistory, HoldingSnapshot
+from app.utils.sector_mapper import get_sector as get_fallback_sector, canonical_symbol
+from app.services.quote_cache import quote_cache
+from app.services.quote_fetcher import quote_fetcher
+from app.services.rate_limiter import RateLimitedClient, Priority, request_priority, schwab_rate_limiter
+from app.services.circuit_breaker import CircuitOpenError, schwab_breaker
+from app.services.token_manager import token_manager
+from app.services.settings_store import settings_store
+from app.services.snapshot_buffer import SnapshotBuffer
+from app.models.persistence import AssetHistory, HoldingSnapshot
 from typing import List, Dict, Any, Optional
 
 class SchwabClient:
+    CREDENTIAL_KEYS = ("SCHWAB_API_KEY", "SCHWAB_API_SECRET", "SCHWAB_REDIRECT_URI")
+
     def __init__(self):
         self._api_key = None
         self._api_secret = None
@@ -18,38 +27,47 @@ class SchwabClient:
         self.backend_dir = pathlib.Path(__file__).parent.parent.parent
         self.root_dir = self.backend_dir.parent
         self._client = None
+        # 憑證快取：載入一次後沿用，直到 /settings 更新或 reload_token 明確失效
+        self._config_loaded = False
 
     def _refresh_config(self):
-        db = SessionLocal()
-        try:
-            setting_key = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_API_KEY").first()
-            self._api_key = setting_key.value if setting_key else settings.SCHWAB_API_KEY
-            setting_secret = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_API_SECRET").first()
-            self._api_secret = setting_secret.value if setting_secret else settings.SCHWAB_API_SECRET
-            setting_uri = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_REDIRECT_URI").first()
-            self._redirect_uri = setting_uri.value if setting_uri else settings.SCHWAB_REDIRECT_URI
-            
-            key_preview = self._api_key[:4] if self._api_key else "None"
-            secret_preview = self._api_secret[:4] if self._api_secret else "None"
-            print(f"🚀 [DEBUG] Config Loaded: Key={key_preview}***, Secret={secret_preview}***")
-            self._client = None
-        finally:
-            db.close()
+        values = settings_store.get_many(self.CREDENTIAL_KEYS)
+        self._api_key = values["SCHWAB_API_KEY"] if "SCHWAB_API_KEY" in values else settings.SCHWAB_API_KEY
+        self._api_secret = values["SCHWAB_API_SECRET"] if "SCHWAB_API_SECRET" in values else settings.SCHWAB_API_SECRET
+        self._redirect_uri = values["SCHWAB_REDIRECT_URI"] if "SCHWAB_REDIRECT_URI" in values else settings.SCHWAB_REDIRECT_URI
+
+        key_preview = self._api_key[:4] if self._api_key else "None"
+        secret_preview = self._api_secret[:4] if self._api_secret else "None"
+        print(f"🚀 [DEBUG] Config Loaded: Key={key_preview}***, Secret={secret_preview}***")
+        self._config_loaded = True
+        self._client = None
+
+    def invalidate_config(self):
+        """
+        憑證設定變更後呼叫，下次使用時重新載入並重建 client
+        """
+        self._config_loaded = False
+        self._client = None
+
+    def _on_settings_changed(self, changed: Dict[str, Optional[str]], version: int):
+        # 只有憑證變動才需要重建 client，Token 與帳戶映射的更新不影響
+        if any(key in changed for key in self.CREDENTIAL_KEYS):
+            print(f"🔄 [DEBUG] Credentials changed (settings v{version}), client will be rebuilt.")
+            self.invalidate_config()
 
     @property
     def api_key(self):
-        if not self._api_key:
+        if not self._config_loaded:
             self._refresh_config()
         return self._api_key
 
     @property
     def api_secret(self):
-        if not self._api_secret:
+        if not self._config_loaded:
             self._refresh_config()
         return self._api_secret
 
     def _save_token_to_db(self, token_dict: Dict[str, Any], **kwargs):
-        db = SessionLocal()
         try:
             # 偵錯
             # print(f"🚀 [DEBUG] _save_token_to_db received: {list(token_dict.keys())}")
@@ -68,27 +86,17 @@ class SchwabClient:
             else:
                 token_to_save = token_dict
 
-            token_json = json.dumps(token_to_save)
-            setting = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_TOKEN_DATA").first()
-            if setting:
-                setting.value = token_json
-            else:
-                setting = SystemSetting(key="SCHWAB_TOKEN_DATA", value=token_json)
-                db.add(setting)
-            db.commit()
+            settings_store.set("SCHWAB_TOKEN_DATA", json.dumps(token_to_save))
+            token_manager.set(token_to_save)
             print("✅ [DEBUG] Database Token updated.")
         except Exception as e:
             print(f"❌ [ERROR] Failed to save token to DB: {e}")
-            db.rollback()
-        finally:
-            db.close()
 
     def _load_token_from_db(self) -> Optional[Dict[str, Any]]:
-        db = SessionLocal()
         try:
-            setting = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_TOKEN_DATA").first()
-            if setting and setting.value:
-                data = json.loads(setting.value)
+            value = settings_store.get("SCHWAB_TOKEN_DATA")
+            if value:
+                data = json.loads(value)
                 # 這裡必須回傳最外層包含 'token' 的 Dict，滿足 schwab.auth 的格式驗證
                 if isinstance(data, dict) and "token" in data:
                     return data
@@ -100,8 +108,6 @@ class SchwabClient:
                     }
         except Exception as e:
             print(f"❌ [ERROR] Failed to load token from DB: {e}")
-        finally:
-            db.close()
         return None
 
     def _archive_token_file(self, file_path: pathlib.Path):
@@ -150,21 +156,15 @@ class SchwabClient:
         return None
 
     def _save_account_map_to_db(self, account_map: Dict[str, str]):
-        db = SessionLocal()
         try:
             mapping_json = json.dumps(account_map)
-            setting = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_ACCOUNT_MAP").first()
-            if setting:
-                setting.value = mapping_json
-            else:
-                setting = SystemSetting(key="SCHWAB_ACCOUNT_MAP", value=mapping_json)
-                db.add(setting)
-            db.commit()
+            # 內容相同時不重複寫入
+            if settings_store.get("SCHWAB_ACCOUNT_MAP") == mapping_json:
+                return
+            settings_store.set("SCHWAB_ACCOUNT_MAP", mapping_json)
             print(f"✅ [DEBUG] Account Map updated in DB: {list(account_map.keys())}")
         except Exception as e:
             print(f"❌ [ERROR] Failed to save account map: {e}")
-        finally:
-            db.close()
 
     def _get_52_week_high(self, data: Dict[str, Any]) -> Optional[float]:
         val = data.get("quote", {}).get("52WeekHigh") or \
@@ -176,28 +176,50 @@ class SchwabClient:
 
     def reload_token(self):
         """
-        強制清除記憶體中的 client 緩存，下次請求時會重新從資料庫讀取 Token
+        強制清除記憶體中的 client 緩存，並重新從資料庫讀取 Token
+        (其他程序，例如 force_import_token.py / scripts/auth_schwab.py 寫入的 Token 也會生效)
         """
         print("🔄 [DEBUG] Reloading token from database...")
+        # 手動重新載入時才檢查是否有新的 token.json 需要遷移
+        self._migrate_token_file_if_needed()
+        # 設定快取只在啟動時載入，必須重新讀取資料庫才看得到其他程序的寫入
+        settings_store.reload()
         self._client = None
+        token_manager.invalidate()
         self._refresh_config() # 同步刷新 API Key 設定
 
+    def apply_token(self, token: Dict[str, Any]):
+        """
+        將背景換發的新 Token 套用到執行中的 client session，避免請求時才 inline refresh
+        """
+        client = self._client
+        if client is None:
+            return
+        raw_client = getattr(client, "raw_client", client)
+        try:
+            raw_client.session.token = token
+        except Exception as e:
+            print(f"⚠️ [TOKEN] Failed to apply token to live client, rebuilding: {e}")
+            self._client = None
+
     def get_client(self):
-        self._migrate_token_file_if_needed()
+        # token.json 遷移只在啟動與 reload_token 時執行，這裡只讀取記憶體快取
         if self._client: return self._client
-        token_data = self._load_token_from_db()
+        token_data = token_manager.get()
         if not token_data:
             print("❌ [DEBUG] No token data found in Database.")
             raise FileNotFoundError("找不到有效 Token，請先執行授權。")
 
         # 使用 client_from_access_functions，注意其內部會對 token_read_func 的結果做索引 ['token']
         try:
-            self._client = schwab.auth.client_from_access_functions(
+            raw_client = schwab.auth.client_from_access_functions(
                 self.api_key,
                 self.api_secret,
-                token_read_func=self._load_token_from_db,
+                token_read_func=token_manager.get,
                 token_write_func=self._save_token_to_db
             )
+            # 所有 API 呼叫統一經過限流器 (依 request_priority 排序) 與斷路器
+            self._client = RateLimitedClient(raw_client, schwab_rate_limiter, breaker=schwab_breaker)
         except Exception as e:
             # 如果初始化失敗（例如 Token 格式錯誤），嘗試清除快照
             print(f"⚠️ [DEBUG] Client initialization failed: {e}")
@@ -239,11 +261,33 @@ class SchwabClient:
                 "account_number": acc.get("accountNumber", "XXXX"),
                 "hash_value": acc.get("hashValue")
             } for acc in accounts_list]
+        except CircuitOpenError:
+            return self._get_cached_accounts()
         except Exception as e:
             print(f"❌ 獲取帳戶清單發生異常: {str(e)}")
             return []
 
+    def _get_cached_accounts(self) -> List[Dict[str, Any]]:
+        """
+        斷路器開啟時，以資料庫中的 SCHWAB_ACCOUNT_MAP 提供帳戶清單 (標記為 stale)
+        """
+        try:
+            value = settings_store.get("SCHWAB_ACCOUNT_MAP")
+            account_map = json.loads(value) if value else {}
+        except Exception as e:
+            print(f"⚠️ [BREAKER] Failed to load cached account map: {e}")
+            account_map = {}
+        return [{
+            "account_name": "Schwab Account",
+            "account_number": f"XXXX{suffix}",
+            "hash_value": hash_value,
+            "stale": True
+        } for suffix, hash_value in account_map.items()]
+
     def get_real_account_data(self, account_hash: Optional[str] = None):
+        # 券商斷線期間直接回傳最後一次的快照，不等待 HTTP 逾時
+        if schwab_breaker.is_open:
+            return self._load_last_snapshot(account_hash)
         try:
             client = self.get_client()
             if not account_hash:
@@ -278,18 +322,20 @@ class SchwabClient:
             
             quote_map = {}
             if symbols_to_quote:
+                def fetch_quotes(symbols):
+                    # 分塊並行抓取，失敗的區塊各自重試，合併部分結果
+                    return quote_fetcher.fetch(client, symbols)
+
                 try:
-                    q_resp = client.get_quotes(symbols_to_quote)
-                    if q_resp.status_code == 200:
-                        raw_quotes = q_resp.json()
-                        if raw_quotes:
-                            for p_inner in positions:
-                                s_orig = p_inner.get("instrument", {}).get("symbol")
-                                if not s_orig: continue
-                                for k, v in raw_quotes.items():
-                                    if k.replace("/", ".").upper() == s_orig.replace("/", ".").upper():
-                                        quote_map[s_orig] = v
-                                        break
+                    # 這裡只使用 52 週高點、行業與名稱，套用基本資料的長 TTL
+                    # 回傳值即為標準化代碼索引，持倉比對為 O(1) 查表
+                    quote_index = quote_cache.get_many(symbols_to_quote, fetch_quotes, field="fundamental")
+                    for p_inner in positions:
+                        s_orig = p_inner.get("instrument", {}).get("symbol")
+                        if not s_orig: continue
+                        quote = quote_index.get(canonical_symbol(s_orig))
+                        if quote is not None:
+                            quote_map[s_orig] = quote
                 except Exception as q_e: print(f"⚠️ 報價異常: {q_e}")
             
             holdings = []
@@ -349,6 +395,10 @@ class SchwabClient:
             total_balance = total_account_value
             cash_balance = current_balances.get("cashBalance", 0)
             self._sync_real_data_to_db(account_hash, total_balance, cash_balance, holdings)
+            if settings.QUOTE_STREAM_ENABLED:
+                # 更新串流報價的持倉基準 (訂閱代碼隨持倉變動)
+                from app.services.quote_stream import quote_stream
+                quote_stream.track_holdings(account_hash, holdings)
             
             # 自動同步最新交易紀錄 (TransactionHistory)
             try:
@@ -373,20 +423,96 @@ class SchwabClient:
                     "holdings": holdings
                 }]
             }
+        except CircuitOpenError:
+            return self._load_last_snapshot(account_hash)
         except Exception as e:
             print(f"❌ [DEBUG] SchwabClient.get_real_account_data 異常: {str(e)}")
             import traceback; traceback.print_exc()
+            if schwab_breaker.is_open:
+                return self._load_last_snapshot(account_hash)
+            return {"error": str(e)}
+
+    def _load_last_snapshot(self, account_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        從資料庫讀取最後一次成功同步的 AssetHistory / HoldingSnapshot，格式與即時資料相同並標記 stale
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(AssetHistory)
+            if account_hash:
+                query = query.filter(AssetHistory.account_id == account_hash)
+            else:
+                query = query.filter(AssetHistory.account_id.isnot(None))
+            hist = query.order_by(AssetHistory.date.desc(), AssetHistory.id.desc()).first()
+            if not hist:
+                return {"error": "嘉信 API 暫時無法使用，且沒有可用的快照資料"}
+
+            total_value = hist.total_value or 0.0
+            holdings = []
+            snapshots = db.query(HoldingSnapshot).filter(
+                HoldingSnapshot.date == hist.date,
+                HoldingSnapshot.account_id == hist.account_id
+            ).all()
+            if not snapshots:
+                # 舊版快照沒有 account_id，只能以日期查詢
+                snapshots = db.query(HoldingSnapshot).filter(
+                    HoldingSnapshot.date == hist.date,
+                    HoldingSnapshot.account_id.is_(None)
+                ).all()
+            for snap in snapshots:
+                qty = snap.quantity or 0.0
+                market_value = snap.market_value or 0.0
+                cost = snap.cost_basis or 0.0
+                asset_type = snap.asset_class or "EQUITY"
+                multiplier = 100 if asset_type == 'OPTION' else 1
+                total_pnl = market_value - cost
+                holdings.append({
+                    "symbol": snap.symbol, "name": snap.name or snap.symbol, "quantity": qty,
+                    "price": market_value / (qty * multiplier) if qty else 0,
+                    "cost_basis": cost, "market_value": market_value,
+                    "total_pnl_pct": (total_pnl / abs(cost) * 100) if cost else 0, "total_pnl": total_pnl,
+                    "day_pnl": 0.0, "day_pnl_pct": 0.0,
+                    "ytd_pnl_pct": None, "asset_type": asset_type,
+                    "expiration_date": self._parse_option_expiration(snap.symbol) if asset_type == "OPTION" else None,
+                    "allocation_pct": (market_value / total_value * 100) if total_value > 0 else 0,
+                    "drawdown_pct": None, "sector": snap.industry or get_fallback_sector(snap.symbol, asset_type)
+                })
+
+            print(f"🔌 [BREAKER] Serving stale snapshot from {hist.date} for {str(hist.account_id)[-4:]}")
+            return {
+                "stale": True,
+                "as_of": hist.date.isoformat(),
+                "accounts": [{
+                    "account_id": hist.account_id,
+                    "total_balance": total_value,
+                    "cash_balance": hist.cash_balance or 0.0,
+                    "buying_power": 0,
+                    "day_pl": 0.0,
+                    "day_pl_percent": 0.0,
+                    "holdings": holdings,
+                    "stale": True,
+                    "as_of": hist.date.isoformat()
+                }]
+            }
+        except Exception as e:
+            print(f"❌ [BREAKER] Failed to load last snapshot: {e}")
             return {"error": str(e)}
+        finally:
+            db.close()
 
     def _sync_real_data_to_db(self, account_hash: str, total_balance: float, cash_balance: float, holdings: List[Dict[str, Any]]):
         """
         自動快照 (Auto-Snapshot)
-        將帳戶資產與持倉快照存入資料庫，支援實時更新
+        交給 write-behind 緩衝，同一 (帳戶, 日期) 的重複快照會合併後再寫入
+        """
+        snapshot_buffer.submit(account_hash, total_balance, cash_balance, holdings)
+
+    def _write_snapshot(self, account_hash: str, today, total_balance: float, cash_balance: float, holdings: List[Dict[str, Any]]):
+        """
+        將帳戶資產與持倉快照存入資料庫 (由 SnapshotBuffer 呼叫)
         """
         db = SessionLocal()
         try:
-            today = datetime.now().date()
-            
             # 1. 更新或建立資產歷史 (AssetHistory)
             # 實作 Upsert 機制，改為以 (date, account_id) 為依據進行過濾
             hist = db.query(AssetHistory).filter(
@@ -407,21 +533,10 @@ class SchwabClient:
                 ))
                 print(f"📸 [Auto-Snapshot] Saved new AssetHistory for {today} (Account: {account_hash[-4:]}, Value: {total_balance})")
             
-            # 2. 更新持倉快照 (HoldingSnapshot)
-            # 先刪除今日該帳戶的舊紀錄（如果有的話），再寫入新的
-            # 注意：HoldingSnapshot 目前沒有 account_hash 欄位，這會導致多帳戶持倉衝突
-            # 但我們遵照現有結構先確保資料寫入並提交
-            db.query(HoldingSnapshot).filter(HoldingSnapshot.date == today).delete()
-            for h in holdings:
-                db.add(HoldingSnapshot(
-                    date=today,
-                    symbol=h["symbol"],
-                    name=h.get("name") or h["symbol"],
-                    quantity=h["quantity"],
-                    market_value=h["market_value"],
-                    cost_basis=h["cost_basis"],
-                    industry=h.get("sector", "Equity")
-                ))
+            # 2. 更新持倉快照 (HoldingSnapshot)：僅限該帳戶，依 symbol 比對差異
+            changes = self._diff_holding_snapshots(db, account_hash, today, holdings)
+            print(f"📸 [Auto-Snapshot] Holdings for {account_hash[-4:]}: "
+                  f"{changes['added']} added, {changes['updated']} updated, {changes['removed']} removed")
             
             # 3. 務必提交事務
             db.commit()
@@ -430,13 +545,69 @@ class SchwabClient:
         except Exception as e:
             print(f"❌ [Auto-Snapshot] Error during synchronization: {e}")
             db.rollback()
+            # 讓緩衝保留這筆快照，下次合併寫入時重試
+            raise
         finally:
             db.close()
 
+    def _diff_holding_snapshots(self, db, account_hash: str, today, holdings: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        比對今日該帳戶已存的持倉快照，只新增 / 更新 / 刪除有變動的列
+        """
+        desired = {}
+        for h in holdings:
+            values = {
+                "name": h.get("name") or h["symbol"],
+                "quantity": h["quantity"],
+                "market_value": h["market_value"],
+                "cost_basis": h["cost_basis"],
+                "industry": h.get("sector", "Equity"),
+                "asset_class": h.get("asset_type"),
+            }
+            if h["symbol"] in desired:
+                # 同一代碼出現多筆 (例如多空部位) 時合併數量與金額
+                merged = desired[h["symbol"]]
+                for field in ("quantity", "market_value", "cost_basis"):
+                    merged[field] = (merged[field] or 0) + (values[field] or 0)
+            else:
+                desired[h["symbol"]] = values
+
+        # 舊版未區分帳戶的今日快照已被取代
+        db.query(HoldingSnapshot).filter(
+            HoldingSnapshot.date == today,
+            HoldingSnapshot.account_id.is_(None)
+        ).delete(synchronize_session=False)
+
+        existing = {
+            row.symbol: row for row in db.query(HoldingSnapshot).filter(
+                HoldingSnapshot.date == today,
+                HoldingSnapshot.account_id == account_hash
+            )
+        }
+        changes = {"added": 0, "updated": 0, "removed": 0}
+        for symbol, values in desired.items():
+            row = existing.pop(symbol, None)
+            if row is None:
+                db.add(HoldingSnapshot(date=today, account_id=account_hash, symbol=symbol, **values))
+                changes["added"] += 1
+            elif any(getattr(row, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(row, field, value)
+                changes["updated"] += 1
+        for row in existing.values():
+            db.delete(row)
+            changes["removed"] += 1
+        return changes
+
     def sync_transactions(self, account_hash: str):
         """
         同步交易紀錄，提取股息與已實現損益
+        五年回補屬於背景流量，讓出限流額度給前端請求
         """
+        with request_priority(Priority.BACKGROUND):
+            return self._sync_transactions(account_hash)
+
+    def _sync_transactions(self, account_hash: str):
         try:
             client = self.get_client()
             db = SessionLocal()
@@ -767,3 +938,5 @@ class SchwabClient:
             return 0
 
 schwab_client = SchwabClient()
+snapshot_buffer = SnapshotBuffer(schwab_client._write_snapshot, flush_interval=settings.SNAPSHOT_FLUSH_SECONDS)
+settings_store.subscribe(schwab_client._on_settings_changed)
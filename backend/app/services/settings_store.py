@@ -0,0 +1,114 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+from app.db.database import SessionLocal
+from app.models.persistence import SystemSetting
+
+
+class SettingsStore:
+    """
+    SystemSetting 的記憶體快取
+    - 第一次使用時以單一查詢載入所有鍵值
+    - 寫入時同步寫回資料庫 (write-through) 並遞增 version
+    - 值有變動時通知訂閱者 callback(changed: Dict[str, Optional[str]], version: int)
+    """
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._values: Dict[str, str] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[Dict[str, Optional[str]], int], None]] = []
+        self.version = 0
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            db = self._session_factory()
+            try:
+                self._values = {s.key: s.value for s in db.query(SystemSetting).all()}
+                self._loaded = True
+            finally:
+                db.close()
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        self._ensure_loaded()
+        return self._values.get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        回傳存在於資料庫中的鍵值 (不存在的鍵不會出現在結果中)
+        """
+        self._ensure_loaded()
+        values = self._values
+        return {k: values[k] for k in keys if k in values}
+
+    def all(self) -> Dict[str, str]:
+        self._ensure_loaded()
+        return dict(self._values)
+
+    def set(self, key: str, value: str):
+        self.set_many({key: value})
+
+    def set_many(self, updates: Dict[str, str]):
+        """
+        以單一交易寫入多個鍵值，提交成功後才更新快取並通知訂閱者
+        """
+        if not updates:
+            return
+        self._ensure_loaded()
+        with self._lock:
+            db = self._session_factory()
+            try:
+                existing = {
+                    s.key: s for s in db.query(SystemSetting).filter(SystemSetting.key.in_(list(updates))).all()
+                }
+                for key, value in updates.items():
+                    if key in existing:
+                        existing[key].value = value
+                    else:
+                        db.add(SystemSetting(key=key, value=value))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+            changed = {k: v for k, v in updates.items() if self._values.get(k) != v}
+            self._values.update(updates)
+            if not changed:
+                return
+            self.version += 1
+            version = self.version
+        self._notify(changed, version)
+
+    def reload(self):
+        """
+        重新從資料庫載入 (例如其他程序修改了設定)，並通知有變動的鍵
+        """
+        with self._lock:
+            old = self._values
+            self._loaded = False
+            self._ensure_loaded()
+            changed = {k: self._values.get(k) for k in set(old) | set(self._values) if old.get(k) != self._values.get(k)}
+            if not changed:
+                return
+            self.version += 1
+            version = self.version
+        self._notify(changed, version)
+
+    def subscribe(self, callback: Callable[[Dict[str, Optional[str]], int], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def _notify(self, changed: Dict[str, Optional[str]], version: int):
+        for callback in list(self._subscribers):
+            try:
+                callback(changed, version)
+            except Exception as e:
+                print(f"⚠️ [SETTINGS] Subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+settings_store = SettingsStore()
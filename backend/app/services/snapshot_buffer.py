@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+
+
+class SnapshotBuffer:
+    """
+    Auto-Snapshot 的 write-behind 緩衝
+    同一 (帳戶, 日期) 的多次快照只保留最新一筆，定期合併寫入資料庫
+    - 內容與上次寫入相同時直接略過 (變更偵測)
+    - 該 (帳戶, 日期) 第一次出現時立即寫入，確保當日歷史儘快有資料
+    - 背景執行緒未啟動 (例如腳本) 時同步寫入，行為與原本相同
+    """
+    def __init__(self, writer: Callable[..., None], flush_interval: float = 60):
+        self._writer = writer
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._flushed: Dict[Tuple[str, Any], tuple] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.submitted = 0
+        self.unchanged = 0
+        self.writes = 0
+
+    @staticmethod
+    def _signature(total_balance: float, cash_balance: float, holdings: List[Dict[str, Any]]) -> tuple:
+        rows = sorted(
+            (h["symbol"], round(h["quantity"] or 0, 6), round(h["market_value"] or 0, 2), round(h["cost_basis"] or 0, 2))
+            for h in holdings
+        )
+        return (round(total_balance or 0, 2), round(float(cash_balance or 0), 2), tuple(rows))
+
+    def submit(self, account_hash: str, total_balance: float, cash_balance: float,
+               holdings: List[Dict[str, Any]], day=None):
+        day = day or datetime.now().date()
+        key = (account_hash, day)
+        signature = self._signature(total_balance, cash_balance, holdings)
+        with self._lock:
+            self.submitted += 1
+            if self._flushed.get(key) == signature:
+                # 與已寫入的內容相同，捨棄較舊的待寫入資料即可
+                self._pending.pop(key, None)
+                self.unchanged += 1
+                return
+            self._pending[key] = {
+                "account_hash": account_hash, "day": day, "total_balance": total_balance,
+                "cash_balance": cash_balance, "holdings": holdings, "signature": signature
+            }
+            immediate = key not in self._flushed or self._thread is None
+        if immediate:
+            self.flush([key])
+
+    def flush(self, keys: Optional[List[Tuple[str, Any]]] = None):
+        """
+        寫入待處理的快照 (keys 為 None 時寫入全部)
+        """
+        with self._flush_lock:
+            with self._lock:
+                targets = list(self._pending) if keys is None else [k for k in keys if k in self._pending]
+                batch = [self._pending.pop(k) for k in targets]
+            for snap in batch:
+                try:
+                    self._writer(snap["account_hash"], snap["day"], snap["total_balance"],
+                                 snap["cash_balance"], snap["holdings"])
+                except Exception as e:
+                    print(f"❌ [Auto-Snapshot] Buffered flush failed for {snap['account_hash'][-4:]}: {e}")
+                    # 放回佇列 (若期間已有更新的快照則以新的為準)，下次 flush 時重試
+                    with self._lock:
+                        self._pending.setdefault((snap["account_hash"], snap["day"]), snap)
+                    continue
+                with self._lock:
+                    self._flushed[(snap["account_hash"], snap["day"])] = snap["signature"]
+                    self.writes += 1
+            self._trim_flushed()
+
+    def _trim_flushed(self):
+        # 只需保留今天的簽章，跨日後舊的 key 不會再出現
+        today = datetime.now().date()
+        with self._lock:
+            for key in [k for k in self._flushed if k[1] < today]:
+                self._flushed.pop(key, None)
+
+    def _run_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run_loop, daemon=True, name="snapshot-flush")
+            self._thread.start()
+            print(f"🚀 [Auto-Snapshot] Write-behind buffer started (flush every {self.flush_interval}s).")
+
+    def stop(self):
+        """
+        停止背景執行緒並寫入所有待處理快照
+        """
+        if self._thread:
+            self._stop_event.set()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "unchanged": self.unchanged,
+                "writes": self.writes,
+            }
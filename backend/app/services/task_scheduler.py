@@ -3,7 +3,10 @@ import threading
 import logging
 from datetime import datetime
 from app.services.schwab_client import schwab_client
+from app.services.rate_limiter import Priority, request_priority
+from app.services.event_bus import event_bus
 from app.db.database import SessionLocal
+from app.utils.metrics import job_duration
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,11 +23,14 @@ class TaskScheduler:
         這會觸發全自動快照與交易同步
         """
         logger.info(f"⏰ [SCHEDULER] 開始執行定時更新任務: {datetime.now()}")
+        status = "failed"
+        started = time.perf_counter()
         try:
             # 1. 獲取所有帳戶
             accounts = schwab_client.get_linked_accounts()
             if not accounts:
                 logger.warning("⚠️ [SCHEDULER] 未找到任何帳戶，跳過更新。")
+                status = "skipped"
                 return
 
             for acc in accounts:
@@ -40,13 +46,22 @@ class TaskScheduler:
                 schwab_client.get_real_account_data(acc_hash)
 
             logger.info("✅ [SCHEDULER] 所有帳戶更新完成。")
+            status = "completed"
         except Exception as e:
             logger.error(f"❌ [SCHEDULER] 排程更新失敗: {e}")
+        finally:
+            job_duration.observe(time.perf_counter() - started, "update_holdings", status)
+            # 通知已連線的前端 (SSE) 重新整理
+            event_bus.publish("job", {"job": "update_holdings", "status": status})
 
     def _run_loop(self):
         """
-        背景執行迴圈
+        背景執行迴圈 (所有 Schwab 請求以 BACKGROUND 優先順序排隊)
         """
+        with request_priority(Priority.BACKGROUND):
+            self._loop()
+
+    def _loop(self):
         # 初始執行一次
         self.update_holdings()
         
@@ -0,0 +1,171 @@
+import copy
+import time
+import threading
+from typing import Dict, Any, Optional
+from app.core.config import settings
+
+
+class TokenManager:
+    """
+    Schwab OAuth Token 管理
+    - 解碼後的 Token 常駐記憶體，請求路徑不再讀取資料庫或解析 JSON
+    - 背景執行緒在 expires_at 前 refresh_margin 秒主動換發，並更新執行中的 client session
+    - 換發失敗時指數退避；refresh token 遭拒 (過期 / invalid_grant) 則停止重試，直到重新登入或 reload_token
+    """
+    def __init__(self, refresh_margin: float = 600, check_interval: float = 60, max_backoff: float = 3600):
+        self.refresh_margin = refresh_margin
+        self.check_interval = check_interval
+        self.max_backoff = max_backoff
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self.rejected: Optional[str] = None
+        self._token: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh: Optional[float] = None
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        回傳 schwab-py 格式的 Token ({"token": {...}, "creation_timestamp": ...})
+        只有第一次 (或失效後) 才從資料庫載入
+        """
+        with self._lock:
+            if self._token is None:
+                from app.services.schwab_client import schwab_client
+                self._token = schwab_client._load_token_from_db()
+            return copy.deepcopy(self._token) if self._token else None
+
+    def set(self, token_data: Dict[str, Any]):
+        """
+        Token 寫入資料庫後同步更新記憶體快取 (write-through)
+        """
+        with self._lock:
+            self._token = copy.deepcopy(token_data)
+            self._reset_backoff()
+
+    def invalidate(self):
+        with self._lock:
+            self._token = None
+            self._reset_backoff()
+
+    def _reset_backoff(self):
+        # 新 Token (登入、換發成功) 或 reload_token 後重新開始換發
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self.rejected = None
+
+    def expires_at(self) -> Optional[float]:
+        with self._lock:
+            data = self._token
+            if not data:
+                return None
+            inner = data.get("token", data)
+            expires_at = inner.get("expires_at") or data.get("expires_at")
+            if expires_at:
+                return float(expires_at)
+            creation = data.get("creation_timestamp")
+            if creation and inner.get("expires_in"):
+                return float(creation) + float(inner["expires_in"])
+            return None
+
+    def refresh_if_needed(self) -> bool:
+        if self.get() is None:
+            return False
+        if self.rejected or time.time() < self._retry_at:
+            return False
+        expires_at = self.expires_at()
+        if expires_at is not None and expires_at - time.time() > self.refresh_margin:
+            return False
+        return self.refresh_now()
+
+    def refresh_now(self) -> bool:
+        """
+        以 refresh_token 換發新的 access token，寫回資料庫並套用到執行中的 client
+        """
+        from app.services.schwab_auth import refresh_schwab_token
+        from app.services.schwab_client import schwab_client
+
+        current = self.get()
+        if not current:
+            return False
+        inner = current.get("token", current)
+        refresh_token = inner.get("refresh_token")
+        if not refresh_token:
+            return False
+        try:
+            new_inner = refresh_schwab_token(refresh_token)
+            new_inner.setdefault("refresh_token", refresh_token)
+            new_inner["expires_at"] = int(time.time()) + int(new_inner.get("expires_in", 1800))
+            token_data = {
+                "token": new_inner,
+                # creation_timestamp 代表 refresh token 的取得時間，換發 access token 時保持不變
+                "creation_timestamp": current.get("creation_timestamp") or int(time.time()),
+                "expires_at": new_inner["expires_at"]
+            }
+            schwab_client._save_token_to_db(token_data)
+            schwab_client.apply_token(new_inner)
+            self.refreshes += 1
+            self.last_refresh = time.time()
+            print(f"🔑 [TOKEN] Access token refreshed ahead of expiry (expires in {int(new_inner.get('expires_in', 1800))}s).")
+            return True
+        except Exception as e:
+            self.failures += 1
+            self._on_refresh_failure(e)
+            return False
+
+    def _on_refresh_failure(self, error: Exception):
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        body = getattr(response, "text", "") or ""
+        with self._lock:
+            if status == 401 or (status == 400 and "invalid_grant" in body):
+                # refresh token 已失效 (例如超過嘉信 7 天期限)，重試無用，需重新授權
+                self.rejected = f"HTTP {status}"
+                print(f"❌ [TOKEN] Refresh token rejected ({self.rejected}), re-authorization required. Background refresh paused.")
+                return
+            self._consecutive_failures += 1
+            delay = min(self.max_backoff, self.check_interval * (2 ** (self._consecutive_failures - 1)))
+            self._retry_at = time.time() + delay
+        print(f"❌ [TOKEN] Background token refresh failed: {error} (retry in {int(delay)}s)")
+
+    def _run_loop(self):
+        while not self._stop_event.is_set():
+            if settings.APP_MODE.strip().upper() == "REAL":
+                try:
+                    self.refresh_if_needed()
+                except Exception as e:
+                    print(f"⚠️ [TOKEN] Refresh check failed: {e}")
+            self._stop_event.wait(self.check_interval)
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run_loop, daemon=True, name="token-refresh")
+            self._thread.start()
+            print("🚀 [TOKEN] Background token refresher started.")
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        expires_at = self.expires_at()
+        return {
+            "expires_in": int(expires_at - time.time()) if expires_at else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_refresh": self.last_refresh,
+            "rejected": self.rejected,
+            "retry_in": max(0, int(self._retry_at - time.time())) if self._retry_at else None,
+        }
+
+
+token_manager = TokenManager(
+    refresh_margin=settings.TOKEN_REFRESH_MARGIN_SECONDS,
+    check_interval=settings.TOKEN_REFRESH_CHECK_SECONDS,
+    max_backoff=settings.TOKEN_REFRESH_MAX_BACKOFF_SECONDS
+)
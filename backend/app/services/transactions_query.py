@@ -0,0 +1,94 @@
+import base64
+import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from app.models.persistence import TransactionHistory, TradeHistory, Dividend
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# 各資料來源的欄位對應：帳戶欄位、動作欄位 (股息沒有動作欄位)
+SOURCES = {
+    "history": {"model": TransactionHistory, "account": "account_id", "action": "action"},
+    "trades": {"model": TradeHistory, "account": "account_hash", "action": "side"},
+    "dividends": {"model": Dividend, "account": "account_hash", "action": None},
+}
+
+
+def encode_cursor(date: datetime.date, row_id: int) -> str:
+    raw = f"{date.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        date_str, row_id = raw.split("|")
+        return datetime.date.fromisoformat(date_str), int(row_id)
+    except Exception:
+        raise InvalidCursor("無效的分頁游標")
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _serialize(row, source: str) -> Dict[str, Any]:
+    item = {
+        "id": row.id,
+        "source": source,
+        "date": row.date.isoformat() if row.date else None,
+        "symbol": row.symbol,
+        "description": row.description,
+    }
+    if source == "history":
+        item.update({"account_id": row.account_id, "action": row.action, "amount": row.amount})
+    elif source == "trades":
+        item.update({"account_id": row.account_hash, "action": row.side, "quantity": row.quantity,
+                     "price": row.price, "realized_pnl": row.realized_pnl})
+    else:
+        item.update({"account_id": row.account_hash, "action": "DIVIDEND", "amount": row.amount})
+    return item
+
+
+def query_transactions(db: Session, source: str = "history", account_hash: Optional[str] = None,
+                       start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None,
+                       action: Optional[str] = None, symbol: Optional[str] = None, q: Optional[str] = None,
+                       cursor: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+    """
+    依 (date, id) 由新到舊的 keyset 分頁查詢交易紀錄
+    每頁以「上一頁最後一筆之後」為條件定位，不使用 OFFSET，頁數再深成本也相同
+    """
+    spec = SOURCES[source]
+    model = spec["model"]
+    query = db.query(model)
+
+    if account_hash:
+        query = query.filter(getattr(model, spec["account"]) == account_hash)
+    if start_date:
+        query = query.filter(model.date >= start_date)
+    if end_date:
+        query = query.filter(model.date <= end_date)
+    if action:
+        if spec["action"] is None:
+            raise ValueError("股息紀錄不支援 action 篩選")
+        query = query.filter(getattr(model, spec["action"]) == action)
+    if symbol:
+        query = query.filter(model.symbol == symbol.upper())
+    if q:
+        query = query.filter(model.description.ilike(f"%{_escape_like(q)}%", escape="\\"))
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.date, model.id) < tuple_(cursor_date, cursor_id))
+
+    rows = query.order_by(model.date.desc(), model.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [_serialize(r, source) for r in rows],
+        "next_cursor": encode_cursor(rows[-1].date, rows[-1].id) if has_more else None,
+        "limit": limit,
+    }
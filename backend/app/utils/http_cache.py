@@ -0,0 +1,141 @@
+import json
+import uuid
+import hashlib
+import threading
+from typing import Any, Dict, Set
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from app.db.database import SessionLocal
+
+
+class DataVersions:
+    """
+    各資料表的資料版本：程序內計數 + 資料庫指紋
+    - 程序內計數：每次提交寫入該表時遞增 (涵蓋本程序內的 update)
+    - 資料庫指紋：每表的 COUNT(*) 與 MAX(id)，涵蓋其他程序 (匯入腳本、清除工具) 的新增與刪除
+    ETag 由版本組成，只需一次輕量查詢即可判斷資料是否變動，不必重新計算結果
+    boot 為啟動識別碼，重新啟動後舊的 ETag 一律失效
+    """
+    def __init__(self):
+        self.boot = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._engine = None
+
+    def bump(self, *tables: str):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, *tables: str) -> str:
+        fingerprints = self._fingerprints(tables)
+        with self._lock:
+            return self.boot + ":" + ",".join(
+                f"{t}={self._versions.get(t, 0)}" + (f"/{fingerprints[t]}" if t in fingerprints else "")
+                for t in tables
+            )
+
+    def _fingerprints(self, tables) -> Dict[str, str]:
+        """
+        單一查詢取得各表的列數與最大 id (主鍵索引，成本很低)；資料表不存在時略過
+        """
+        engine = self._engine
+        if engine is None or not tables:
+            return {}
+        quote = engine.dialect.identifier_preparer.quote
+        try:
+            with engine.connect() as conn:
+                columns = ", ".join(f"(SELECT COUNT(*) FROM {quote(t)}), (SELECT MAX(id) FROM {quote(t)})" for t in tables)
+                row = conn.execute(text(f"SELECT {columns}")).one()
+            return {t: f"{row[2 * i]}.{row[2 * i + 1]}" for i, t in enumerate(tables)}
+        except Exception:
+            if len(tables) == 1:
+                return {}
+            result = {}
+            for table in tables:
+                result.update(self._fingerprints((table,)))
+            return result
+
+    def track(self, session_factory):
+        """
+        監聽 Session：flush 與 ORM 批次 insert/update/delete 時記下涉及的資料表，commit 後遞增版本
+        資料庫指紋也使用此 Session 綁定的 engine
+        """
+        self._engine = session_factory.kw.get("bind")
+
+        def _pending(session) -> Set[str]:
+            return session.info.setdefault("_dirty_tables", set())
+
+        @event.listens_for(session_factory, "after_flush")
+        def _after_flush(session, flush_context):
+            tables = _pending(session)
+            for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+                table = getattr(obj, "__tablename__", None)
+                if table:
+                    tables.add(table)
+
+        @event.listens_for(session_factory, "do_orm_execute")
+        def _on_execute(orm_execute_state):
+            if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+                for mapper in orm_execute_state.all_mappers:
+                    _pending(orm_execute_state.session).add(mapper.local_table.name)
+
+        @event.listens_for(session_factory, "after_commit")
+        def _after_commit(session):
+            tables = session.info.pop("_dirty_tables", None)
+            if tables:
+                self.bump(*tables)
+
+        @event.listens_for(session_factory, "after_rollback")
+        def _after_rollback(session):
+            session.info.pop("_dirty_tables", None)
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    由版本號 / 查詢參數組成弱 ETag (內容語意相同即可，不保證位元組完全一致)
+    """
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def content_digest(data: Any) -> str:
+    """
+    無版本號可用的資料 (例如嘉信即時快照) 以內容雜湊作為版本
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    比對 If-None-Match (支援多個值、* 與弱比較)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str):
+    # no-cache：瀏覽器可快取，但每次都須以 If-None-Match 重新驗證
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
+
+
+data_versions = DataVersions()
+data_versions.track(SessionLocal)
@@ -0,0 +1,70 @@
+import json
+import math
+from typing import Any, Dict, List
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 為選用套件，未安裝時退回標準 json
+    orjson = None
+
+
+def _default(obj: Any):
+    """
+    orjson / json 無法直接處理的型別 (pandas、NumPy 純量、NaT/NA)
+    """
+    if hasattr(obj, "isoformat"):
+        try:
+            return obj.isoformat()
+        except ValueError:  # pandas NaT
+            return None
+    if hasattr(obj, "item"):  # NumPy 純量
+        value = obj.item()
+        return None if isinstance(value, float) and not math.isfinite(value) else value
+    if hasattr(obj, "tolist"):  # NumPy 陣列 / pandas Series
+        return obj.tolist()
+    if obj is None or type(obj).__name__ in ("NAType", "NaTType"):
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    以 orjson 序列化的 JSONResponse，原生支援 NumPy、日期與非字串鍵
+    NaN / Infinity 輸出為 null (標準 JSONResponse 會直接拋出錯誤)
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(_sanitize(content), default=_default, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+def _sanitize(value: Any) -> Any:
+    # 標準 json 的 NaN 處理與 orjson 一致 (轉為 null)
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k if isinstance(k, str) else str(k): _sanitize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_sanitize(v) for v in value]
+    return value
+
+
+def to_columnar(rows: List[Dict[str, Any]], index_key: str = "date") -> Dict[str, Any]:
+    """
+    將逐列資料 [{date, total, acc1, ...}] 轉為欄式 {date: [...], series: {total: [...], acc1: [...]}}
+    每個鍵只出現一次，缺值以 null 補齊
+    """
+    keys: List[str] = []
+    seen = set()
+    for row in rows:
+        for key in row:
+            if key != index_key and key not in seen:
+                seen.add(key)
+                keys.append(key)
+    return {
+        index_key: [row.get(index_key) for row in rows],
+        "series": {key: [row.get(key) for row in rows] for key in keys},
+    }
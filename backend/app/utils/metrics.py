@@ -0,0 +1,259 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from app.db.database import engine
+
+# Prometheus 文字格式 (text/plain; version=0.0.4)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """
+    只增不減的計數器 (依標籤分組)
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: Any, amount: float = 1.0):
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *label_values: Any) -> float:
+        with self._lock:
+            return self._values.get(tuple(str(v) for v in label_values), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram:
+    """
+    累積分桶直方圖：每個標籤組合記錄各桶計數、總和與次數
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # 標籤 -> [各桶計數 (非累積，最後一格為 +Inf), 總和]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: Any):
+        key = tuple(str(v) for v in label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *label_values: Any):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def count(self, *label_values: Any) -> int:
+        with self._lock:
+            series = self._series.get(tuple(str(v) for v in label_values))
+            return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1])) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    程序內指標登錄表，輸出 Prometheus 文字格式
+    服務本身已有 stats() 的數值 (快取命中、佇列長度) 於抓取時附加，不重複計數
+    """
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self, collected: Iterable[Tuple[str, str, str, Sequence[str], Iterable[Tuple[Sequence[Any], float]]]] = ()) -> str:
+        """
+        collected: 抓取時由 stats() 取得的數值 (名稱, 類型, 說明, 標籤名稱, [(標籤值, 數值), ...])
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for name, kind, help, labels, samples in collected:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for values, value in samples:
+                lines.append(f"{name}{_format_labels(labels, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter("schweb_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = metrics.histogram("schweb_http_request_duration_seconds", "HTTP request latency (until response headers)",
+                                 ("method", "route"))
+http_db_queries = metrics.histogram("schweb_http_request_db_queries", "DB queries executed per HTTP request",
+                                    ("route",), COUNT_BUCKETS)
+http_db_time = metrics.histogram("schweb_http_request_db_seconds", "DB time spent per HTTP request", ("route",), DB_BUCKETS)
+db_queries = metrics.histogram("schweb_db_query_duration_seconds", "DB statement duration by operation", ("operation",), DB_BUCKETS)
+schwab_calls = metrics.counter("schweb_schwab_api_calls_total", "Schwab API calls by method and outcome", ("method", "outcome"))
+schwab_latency = metrics.histogram("schweb_schwab_api_call_duration_seconds", "Schwab API call latency by method", ("method",))
+job_duration = metrics.histogram("schweb_job_duration_seconds", "Background job duration by job and final status",
+                                 ("job", "status"), JOB_BUCKETS)
+
+
+# --- 每個請求的資料庫統計 ---
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# 可變物件存於 contextvar：執行緒池 (run_in_threadpool / run_io) 複製 context 後仍累加到同一個請求
+_request_db: contextvars.ContextVar[Optional[RequestDbStats]] = contextvars.ContextVar("request_db_stats", default=None)
+
+
+def begin_request() -> RequestDbStats:
+    stats = RequestDbStats()
+    _request_db.set(stats)
+    return stats
+
+
+def track_engine(engine):
+    """
+    監聽 Engine 的每一個 SQL 陳述式：記錄耗時，並累加到目前請求的統計
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
+        if operation not in ("select", "insert", "update", "delete"):
+            operation = "other"
+        db_queries.observe(elapsed, operation)
+        stats = _request_db.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+@contextmanager
+def time_job(job: str):
+    """
+    記錄背景工作耗時；yield 的 dict 可設定最終狀態 (預設 completed，拋出例外時為 failed)
+    """
+    outcome = {"status": "completed"}
+    start = time.perf_counter()
+    try:
+        yield outcome
+    except BaseException:
+        outcome["status"] = "failed"
+        raise
+    finally:
+        job_duration.observe(time.perf_counter() - start, job, outcome["status"])
+
+
+def cache_metrics(caches: Dict[str, Dict[str, Any]]) -> List[Tuple]:
+    """
+    由各快取的 hits / misses 組出命中數、未命中數與命中率
+    """
+    hits = [((name,), c["hits"]) for name, c in caches.items()]
+    misses = [((name,), c["misses"]) for name, c in caches.items()]
+    ratios = [((name,), c["hits"] / (c["hits"] + c["misses"]) if c["hits"] + c["misses"] else 0.0)
+              for name, c in caches.items()]
+    return [
+        ("schweb_cache_hits_total", "counter", "Cache hits since start", ("cache",), hits),
+        ("schweb_cache_misses_total", "counter", "Cache misses since start", ("cache",), misses),
+        ("schweb_cache_hit_ratio", "gauge", "Cache hit ratio since start", ("cache",), ratios),
+    ]
+
+
+track_engine(engine)
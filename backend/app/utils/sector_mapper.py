@@ -1,5 +1,9 @@
+import re
 from typing import Dict
 
+# OCC 期權代碼：標的 (最多 6 碼，Schwab 以空白補齊) + YYMMDD + C/P + 8 位履約價
+OCC_OPTION_PATTERN = re.compile(r"^([A-Z0-9./]{1,6})\s*(\d{6}[CP]\d{8})$")
+
 # 預定義常見股票與 ETF 的 GICS 行業分類
 SYMBOL_SECTOR_MAP = {
     # Information Technology
@@ -158,11 +162,23 @@ SYMBOL_SECTOR_MAP = {
     "SCHD": "ETFs",
 }
 
+def canonical_symbol(symbol: str) -> str:
+    """
+    將代碼轉為標準形式，供報價比對與行業查詢共用
+    - 分類股 BRK/B、brk.b -> BRK.B
+    - OCC 期權去除補齊空白：'AAPL  240119C00150000' -> 'AAPL240119C00150000'
+    """
+    symbol = (symbol or "").strip().upper()
+    match = OCC_OPTION_PATTERN.match(symbol)
+    if match:
+        return match.group(1).replace("/", ".") + match.group(2)
+    return symbol.replace("/", ".")
+
 def get_sector(symbol: str, asset_type: str = "EQUITY") -> str:
     """
     根據 Symbol 與資產類型獲取行業分類
     """
-    symbol = symbol.upper().replace("/", ".")
+    symbol = canonical_symbol(symbol)
     
     if asset_type == "OPTION":
         return "Options"
@@ -1,39 +1,74 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, account, risk, copilot, analytics, settings as api_settings
+from fastapi.middleware.gzip import GZipMiddleware
+from app.api import auth, account, risk, copilot, analytics, dashboard, stream, transactions, export, settings as api_settings
 from app.core.config import settings
+from app.utils.json_response import FastJSONResponse
 from app.db.database import engine, Base
 from app.models.persistence import SystemSetting # 確保模型被載入以自動建立表格
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, default_response_class=FastJSONResponse)
 
 # 啟動背景排程器
 @app.on_event("startup")
 async def startup_event():
     from app.services.task_scheduler import task_scheduler
     task_scheduler.start()
+    # 啟動時一次性遷移 token.json 至資料庫 (不再於每次 get_client 時檢查)
+    from app.services.schwab_client import schwab_client
+    schwab_client._migrate_token_file_if_needed()
+    from app.services.token_manager import token_manager
+    token_manager.start()
+    from app.services.schwab_client import snapshot_buffer
+    snapshot_buffer.start()
+    from app.services.live_publisher import live_publisher
+    live_publisher.start()
+    if settings.QUOTE_STREAM_ENABLED:
+        from app.services.quote_stream import quote_stream
+        quote_stream.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     from app.services.task_scheduler import task_scheduler
     task_scheduler.stop()
+    from app.services.live_publisher import live_publisher
+    live_publisher.stop()
+    from app.services.quote_stream import quote_stream
+    quote_stream.stop()
+    from app.services.token_manager import token_manager
+    token_manager.stop()
+    # 寫入所有尚未落地的快照
+    from app.services.schwab_client import snapshot_buffer
+    snapshot_buffer.stop()
+    from app.services.import_jobs import import_job_manager
+    import_job_manager.shutdown()
+    from app.services.executor import execution_manager
+    execution_manager.shutdown()
 
 # 自動建立資料表 (僅限開發環境)
 Base.metadata.create_all(bind=engine)
+from app.db.schema import ensure_schema
+ensure_schema(engine)
 
 # 模式偵測：如果當前是 MOCK 模式，但資料庫有 Key，則切換到 REAL 模式
-if settings.APP_MODE == "MOCK":
-    from app.db.database import SessionLocal
-    db = SessionLocal()
+# 啟動時檢查一次，之後由 settings_store 的變更通知觸發 (例如在 /settings 填入 API Key)
+from app.services.settings_store import settings_store
+
+def sync_app_mode(changed=None, version=None):
+    if changed is not None and "SCHWAB_API_KEY" not in changed:
+        return
+    if settings.APP_MODE != "MOCK":
+        return
     try:
-        db_key = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_API_KEY").first()
-        if db_key and db_key.value:
+        if settings_store.get("SCHWAB_API_KEY"):
             print(f"🚀 [CONFIG] Detected API Key in Database. Switching to REAL mode.")
             settings.APP_MODE = "REAL"
     except Exception as e:
         print(f"⚠️ [CONFIG] Failed to check database for settings: {e}")
-    finally:
-        db.close()
+
+sync_app_mode()
+settings_store.subscribe(sync_app_mode)
 
 # CORS 配置
 app.add_middleware(
@@ -44,16 +79,107 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class _GZipExceptExports(GZipMiddleware):
+    """
+    匯出檔案不壓縮：續傳的 Range 位元組位置需對應未壓縮的原始檔案
+    """
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(f"{settings.API_V1_STR}/export"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# 大型回應 (多年度、多帳戶的歷史資料) 壓縮後傳輸；SSE 串流與匯出檔案不受影響
+app.add_middleware(_GZipExceptExports, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+
+# 前端 HTTP 請求觸發的 Schwab 呼叫優先於背景排程與回補
+@app.middleware("http")
+async def interactive_priority(request, call_next):
+    from app.services.rate_limiter import Priority, request_priority
+    with request_priority(Priority.INTERACTIVE):
+        return await call_next(request)
+
+# 每個請求的延遲與資料庫查詢次數/耗時 (以路由樣板為標籤，避免路徑參數造成過多序列)
+@app.middleware("http")
+async def request_metrics(request, call_next):
+    from app.utils import metrics as m
+    db_stats = m.begin_request()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        m.http_latency.observe(time.perf_counter() - start, request.method, route)
+        m.http_requests.inc(request.method, route, status)
+        m.http_db_queries.observe(db_stats.queries, route)
+        m.http_db_time.observe(db_stats.seconds, route)
+
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["authentication"])
 app.include_router(account.router, prefix=f"{settings.API_V1_STR}/account", tags=["account"])
 app.include_router(risk.router, prefix=f"{settings.API_V1_STR}/risk", tags=["risk"])
 app.include_router(copilot.router, prefix=f"{settings.API_V1_STR}/copilot", tags=["copilot"])
 app.include_router(analytics.router, prefix=f"{settings.API_V1_STR}/analytics", tags=["analytics"])
+app.include_router(dashboard.router, prefix=f"{settings.API_V1_STR}/dashboard", tags=["dashboard"])
+app.include_router(stream.router, prefix=f"{settings.API_V1_STR}/stream", tags=["stream"])
+app.include_router(transactions.router, prefix=f"{settings.API_V1_STR}/transactions", tags=["transactions"])
+app.include_router(export.router, prefix=f"{settings.API_V1_STR}/export", tags=["export"])
 app.include_router(api_settings.router, prefix=f"{settings.API_V1_STR}/settings", tags=["settings"])
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "version": settings.VERSION}
+    from app.services.quote_cache import quote_cache
+    from app.services.rate_limiter import schwab_rate_limiter
+    from app.services.circuit_breaker import schwab_breaker
+    from app.services.token_manager import token_manager
+    from app.services.schwab_client import snapshot_buffer
+    from app.services.executor import execution_manager
+    from app.services.positions_feed import positions_feed
+    from app.services.event_bus import event_bus
+    from app.services.live_publisher import live_publisher
+    from app.services.quote_stream import quote_stream
+    return {
+        "status": "healthy",
+        "version": settings.VERSION,
+        "quote_cache": quote_cache.stats(),
+        "schwab_rate_limit": schwab_rate_limiter.stats(),
+        "schwab_breaker": schwab_breaker.stats(),
+        "token": token_manager.status(),
+        "snapshot_buffer": snapshot_buffer.stats(),
+        "executor": execution_manager.stats(),
+        "positions_feed": positions_feed.stats(),
+        "stream": {**event_bus.stats(), "publisher": live_publisher.stats()},
+        "quote_stream": quote_stream.stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus 抓取端點 (文字格式)：請求延遲、Schwab API 呼叫、資料庫查詢、背景工作與快取命中率
+    """
+    from app.utils.metrics import metrics, cache_metrics, CONTENT_TYPE
+    from app.services.quote_cache import quote_cache
+    from app.services.exporter import exporter
+    from app.services.positions_feed import positions_feed
+    from app.services.executor import execution_manager
+    from app.services.event_bus import event_bus
+    feed = positions_feed.stats()
+    collected = cache_metrics({
+        "quote": quote_cache.stats(),
+        "export": exporter.stats(),
+        # 增量回應視為命中版本歷史，需要完整清單視為未命中
+        "positions_delta": {"hits": feed["delta_responses"], "misses": feed["full_responses"]},
+    })
+    pools = execution_manager.stats()
+    collected.append(("schweb_executor_queued", "gauge", "Tasks waiting for a worker", ("pool",),
+                      [((pool,), s["queued"]) for pool, s in pools.items()]))
+    collected.append(("schweb_executor_active", "gauge", "Tasks currently running", ("pool",),
+                      [((pool,), s["active"]) for pool, s in pools.items()]))
+    collected.append(("schweb_stream_subscribers", "gauge", "Open SSE subscriptions", (),
+                      [((), event_bus.stats()["subscribers"])]))
+    return Response(metrics.render(collected), media_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
     import uvicorn
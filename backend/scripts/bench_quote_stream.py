@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# 將專案根目錄加入 sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.event_bus import EventBus
+from app.services.fake_stream import FakeStreamClient, StreamExhausted, load_replay, synthetic_ticks
+from app.services.quote_stream import QuoteStreamIngestor
+
+def main():
+    parser = argparse.ArgumentParser(description="以本地重播串流量測報價 ingest 吞吐量")
+    parser.add_argument("--replay", help="錄製的串流訊息 (JSONL)；未提供時使用合成資料")
+    parser.add_argument("--symbols", type=int, default=500, help="合成持倉代碼數")
+    parser.add_argument("--ticks", type=int, default=200000, help="合成 tick 數")
+    args = parser.parse_args()
+
+    prices = {f"SYM{i}": 100.0 + i for i in range(args.symbols)}
+    messages = load_replay(args.replay) if args.replay else synthetic_ticks(prices, args.ticks)
+    symbols = {c["key"] for m in messages for c in m.get("content", [])}
+    holdings = [{"symbol": s.replace("/", "."), "asset_type": "OPTION" if " " in s else "EQUITY",
+                 "quantity": 10, "price": 100.0, "cost_basis": 900.0, "day_pnl": 0.0, "drawdown_pct": -5.0}
+                for s in symbols]
+
+    ingestor = QuoteStreamIngestor(bus=EventBus(), publish_interval=1.0)
+    ingestor.track_holdings("BENCH", holdings)
+    stream = FakeStreamClient(messages)
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(ingestor.run(stream))
+    except StreamExhausted:
+        pass
+    elapsed = time.perf_counter() - started
+    print(f"📈 {ingestor.ticks} ticks / {len(symbols)} symbols in {elapsed:.2f}s "
+          f"({ingestor.ticks / elapsed:,.0f} ticks/s, {ingestor.recomputed} positions recomputed)")
+
+if __name__ == "__main__":
+    main()
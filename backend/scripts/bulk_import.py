@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+import argparse
+
+# 將專案根目錄加入 sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.bulk_importer import BulkImporter
+
+def main():
+    parser = argparse.ArgumentParser(description="批次匯入嘉信 Balances / Transactions CSV (ZIP 或目錄)")
+    parser.add_argument("path", help="ZIP 檔或包含 CSV 的目錄")
+    parser.add_argument("--workers", type=int, default=None, help="平行解析的行程數")
+    args = parser.parse_args()
+
+    importer = BulkImporter(max_workers=args.workers)
+    if os.path.isdir(args.path):
+        result = importer.import_directory(args.path)
+    elif args.path.lower().endswith('.zip'):
+        with open(args.path, 'rb') as f:
+            result = importer.import_zip(f.read())
+    else:
+        print(f"❌ 不支援的路徑: {args.path} (請提供 ZIP 檔或目錄)")
+        sys.exit(1)
+
+    for item in result["files"]:
+        status = "✅" if item.get("success") else "❌"
+        detail = item.get("stats") or item.get("error")
+        print(f"{status} {item['filename']}: {json.dumps(detail, ensure_ascii=False)}")
+    print(f"\n🎉 完成：{result['imported']}/{result['total']} 個檔案匯入成功。")
+
+if __name__ == "__main__":
+    main()
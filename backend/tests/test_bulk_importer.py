@@ -0,0 +1,26 @@
+import io
+import zipfile
+from app.services.importer import importer_service
+from app.services.bulk_importer import BulkImporter
+
+ACCOUNT_MAP = {"323": "HASH_323", "024": "HASH_024"}
+
+def test_account_from_filename():
+    assert importer_service._get_account_hash_from_filename("yuang_XXX323_Transactions_20260115.csv", ACCOUNT_MAP) == "HASH_323"
+    assert importer_service._get_account_hash_from_filename("MA_XXXX024_Balances_20260113.CSV", ACCOUNT_MAP) == "HASH_024"
+    assert importer_service._get_account_hash_from_filename("unknown_Balances.csv", ACCOUNT_MAP) is None
+    print("test_account_from_filename passed!")
+
+def test_collect_from_zip():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("2026-01/yuang_XXX323_Transactions.csv", "Date,Action\n")
+        zf.writestr("__MACOSX/._yuang_XXX323_Transactions.csv", "junk")
+        zf.writestr("notes.txt", "ignored")
+    files = BulkImporter(max_workers=1).collect_from_zip(buf.getvalue())
+    assert [name for name, _ in files] == ["yuang_XXX323_Transactions.csv"]
+    print("test_collect_from_zip passed!")
+
+if __name__ == "__main__":
+    test_account_from_filename()
+    test_collect_from_zip()
@@ -0,0 +1,53 @@
+import time
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.rate_limiter import RateLimiter, RateLimitedClient
+
+class _Resp:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+class _Client:
+    def __init__(self):
+        self.status = 503
+        self.calls = 0
+
+    def get_account(self, account_hash):
+        self.calls += 1
+        return _Resp(self.status)
+
+def test_opens_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=0.05)
+    raw = _Client()
+    client = RateLimitedClient(raw, RateLimiter(6000, burst=100), breaker=breaker)
+    for _ in range(3):
+        client.get_account("h")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    try:
+        client.get_account("h")
+        assert False, "should reject while open"
+    except CircuitOpenError:
+        pass
+    assert raw.calls == 3
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    raw.status = 200
+    client.get_account("h")
+    assert breaker.state == CircuitBreaker.CLOSED
+    print("test_opens_and_recovers passed!")
+
+def test_failed_probe_reopens_and_slow_calls_count():
+    breaker = CircuitBreaker("test", failure_threshold=2, slow_call_seconds=0.0, recovery_timeout=0.01)
+    breaker.record_success(0.5)
+    breaker.record_success(0.5)
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.record_failure("probe failed")
+    assert breaker.is_open
+    print("test_failed_probe_reopens_and_slow_calls_count passed!")
+
+if __name__ == "__main__":
+    test_opens_and_recovers()
+    test_failed_probe_reopens_and_slow_calls_count()
@@ -0,0 +1,54 @@
+import asyncio
+from fastapi import HTTPException
+from app.api import dashboard
+from app.services.repository import account_repo
+
+SNAPSHOT = {"accounts": [{"total_balance": 1000.0, "cash_balance": 100.0,
+                          "holdings": [{"symbol": "AAPL", "market_value": 900.0, "quantity": 5}]}]}
+
+def _patched(run):
+    calls = []
+    originals = (account_repo.get_account_data, account_repo.build_summary,
+                 dashboard.build_history, dashboard.build_risk_metrics)
+
+    def fake_account_data(account_hash=None):
+        calls.append(account_hash)
+        return SNAPSHOT
+
+    account_repo.get_account_data = fake_account_data
+    account_repo.build_summary = lambda data, account_hash=None: {"total_balance": data["accounts"][0]["total_balance"]}
+    dashboard.build_history = lambda db, account_hash=None: {"history": [], "accounts": []}
+    dashboard.build_risk_metrics = lambda db, account_hash=None, account_data=None: {"beta": 1.0, "shared": account_data is SNAPSHOT}
+    try:
+        return run(), calls
+    finally:
+        (account_repo.get_account_data, account_repo.build_summary,
+         dashboard.build_history, dashboard.build_risk_metrics) = originals
+
+def test_dashboard_fetches_snapshot_once():
+    result, calls = _patched(lambda: asyncio.run(dashboard.get_dashboard(account_hash="ACC1", fields=None, shape="rows")))
+    assert calls == ["ACC1"]
+    assert result["summary"] == {"total_balance": 1000.0}
+    assert result["positions"][0]["symbol"] == "AAPL"
+    assert result["risk"]["shared"] is True
+    assert "errors" not in result
+    print("test_dashboard_fetches_snapshot_once passed!")
+
+def test_dashboard_field_selection_skips_broker():
+    result, calls = _patched(lambda: asyncio.run(dashboard.get_dashboard(account_hash="ACC1", fields="history", shape="rows")))
+    assert calls == []
+    assert list(result.keys()) == ["history"]
+    print("test_dashboard_field_selection_skips_broker passed!")
+
+def test_dashboard_rejects_unknown_field():
+    try:
+        asyncio.run(dashboard.get_dashboard(account_hash=None, fields="summary,bogus", shape="rows"))
+        assert False, "expected HTTPException"
+    except HTTPException as e:
+        assert e.status_code == 400
+    print("test_dashboard_rejects_unknown_field passed!")
+
+if __name__ == "__main__":
+    test_dashboard_fetches_snapshot_once()
+    test_dashboard_field_selection_skips_broker()
+    test_dashboard_rejects_unknown_field()
@@ -0,0 +1,91 @@
+import json
+import asyncio
+import threading
+from app.api.stream import event_stream
+from app.services.event_bus import EventBus
+from app.services.live_publisher import LivePublisher
+
+def _account(price, total=1000.0):
+    return {"accounts": [{"total_balance": total, "cash_balance": 100.0,
+                          "holdings": [{"symbol": "AAPL", "price": price, "quantity": 5}]}]}
+
+def test_fan_out_from_other_thread():
+    async def main():
+        bus = EventBus()
+        acc1, acc2 = bus.subscribe("ACC1"), bus.subscribe("ACC2")
+        worker = threading.Thread(target=lambda: (bus.publish("quotes", {"AAPL": 1.0}, "ACC1"),
+                                                  bus.publish("job", {"status": "completed"})))
+        worker.start(); worker.join()
+        await asyncio.sleep(0)
+        return ([e["type"] for e in (acc1.queue.get_nowait(), acc1.queue.get_nowait())],
+                acc2.queue.get_nowait()["type"], acc2.queue.qsize())
+
+    acc1_events, acc2_event, acc2_left = asyncio.run(main())
+    assert acc1_events == ["quotes", "job"]
+    # 其他帳戶只收到全域事件
+    assert acc2_event == "job" and acc2_left == 0
+    print("test_fan_out_from_other_thread passed!")
+
+def test_slow_client_gets_resync():
+    async def main():
+        bus = EventBus(queue_size=2)
+        sub = bus.subscribe("ACC1")
+        for i in range(5):
+            bus.publish("quotes", {"AAPL": i}, "ACC1")
+        await asyncio.sleep(0)
+        stream = event_stream(sub, heartbeat=1, bus=bus)
+        chunks = [await stream.__anext__() for _ in range(4)]
+        await stream.aclose()
+        return chunks, sub.dropped, bus.stats()["subscribers"]
+
+    chunks, dropped, subscribers = asyncio.run(main())
+    assert chunks[0].startswith("retry:")
+    assert "event: resync" in chunks[1]
+    assert json.loads(chunks[2].split("data: ")[1])["data"] == {"AAPL": 3}
+    assert dropped == 3
+    # 關閉串流後解除訂閱
+    assert subscribers == 0
+    print("test_slow_client_gets_resync passed!")
+
+def test_heartbeat_when_idle():
+    async def main():
+        bus = EventBus()
+        stream = event_stream(bus.subscribe(), heartbeat=0.01, bus=bus)
+        chunks = [await stream.__anext__() for _ in range(2)]
+        await stream.aclose()
+        return chunks
+
+    assert asyncio.run(main())[1] == ": heartbeat\n\n"
+    print("test_heartbeat_when_idle passed!")
+
+def test_publisher_refreshes_once_per_account():
+    fetches = []
+    prices = {"AAPL": 100.0}
+
+    def fake_fetch(account_hash):
+        fetches.append(account_hash)
+        return _account(prices["AAPL"])
+
+    async def main():
+        bus = EventBus()
+        tabs = [bus.subscribe("ACC1") for _ in range(3)]
+        publisher = LivePublisher(bus, fetch=fake_fetch)
+        first = await asyncio.to_thread(publisher.refresh_once)
+        unchanged = await asyncio.to_thread(publisher.refresh_once)
+        prices["AAPL"] = 101.0
+        moved = await asyncio.to_thread(publisher.refresh_once)
+        await asyncio.sleep(0)
+        return first, unchanged, moved, [tabs[0].queue.get_nowait()["type"] for _ in range(tabs[0].queue.qsize())]
+
+    first, unchanged, moved, events = asyncio.run(main())
+    # 三個分頁共用同一次上游刷新
+    assert fetches == ["ACC1", "ACC1", "ACC1"]
+    assert first == 3 and unchanged == 0 and moved == 2
+    assert events == ["snapshot", "positions", "quotes", "positions", "quotes"]
+    print("test_publisher_refreshes_once_per_account passed!")
+
+if __name__ == "__main__":
+    test_fan_out_from_other_thread()
+    test_slow_client_gets_resync()
+    test_heartbeat_when_idle()
+    test_publisher_refreshes_once_per_account()
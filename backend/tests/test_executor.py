@@ -0,0 +1,95 @@
+import time
+import asyncio
+import threading
+from app.services.executor import ExecutionManager
+from app.services.rate_limiter import Priority, request_priority, current_priority
+
+def _square(x):
+    return x * x
+
+def test_run_io_off_event_loop():
+    manager = ExecutionManager(io_workers=2, cpu_workers=0)
+    loop_thread = threading.get_ident()
+
+    async def main():
+        return await manager.run_io(threading.get_ident)
+
+    worker_thread = asyncio.run(main())
+    assert worker_thread != loop_thread
+    stats = manager.stats()["io"]
+    assert stats["completed"] == 1 and stats["queued"] == 0 and stats["active"] == 0
+    manager.shutdown()
+    print("test_run_io_off_event_loop passed!")
+
+def test_run_io_keeps_priority_context():
+    # 互動請求的優先順序需要跟著進入執行緒，嘉信 API 限流才不會降級
+    manager = ExecutionManager(io_workers=1, cpu_workers=0)
+
+    async def main():
+        with request_priority(Priority.INTERACTIVE):
+            return await manager.run_io(current_priority)
+
+    assert asyncio.run(main()) == Priority.INTERACTIVE
+    manager.shutdown()
+    print("test_run_io_keeps_priority_context passed!")
+
+def test_io_pool_is_bounded():
+    manager = ExecutionManager(io_workers=1, cpu_workers=0)
+
+    async def main():
+        await asyncio.gather(*(manager.run_io(time.sleep, 0.05) for _ in range(3)))
+
+    asyncio.run(main())
+    stats = manager.stats()["io"]
+    assert stats["completed"] == 3
+    # 單一 worker：後面的工作必須排隊等待
+    assert stats["max_wait"] >= 0.05
+    manager.shutdown()
+    print("test_io_pool_is_bounded passed!")
+
+def test_run_cpu_in_process_pool():
+    manager = ExecutionManager(io_workers=1, cpu_workers=1)
+    assert manager.run_cpu_blocking(_square, 7) == 49
+
+    async def main():
+        return await manager.run_cpu(_square, 3)
+
+    assert asyncio.run(main()) == 9
+    assert manager.stats()["cpu"]["completed"] == 2
+    manager.shutdown()
+    print("test_run_cpu_in_process_pool passed!")
+
+def _fail():
+    raise ValueError("boom")
+
+def test_cpu_pool_reports_queue_and_wait():
+    manager = ExecutionManager(io_workers=1, cpu_workers=1)
+    manager.run_cpu_blocking(_square, 2)  # 先啟動 worker 行程
+    threads = [threading.Thread(target=manager.run_cpu_blocking, args=(time.sleep, 0.3)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.15)
+    busy = manager.stats()["cpu"]
+    for t in threads:
+        t.join()
+    # 單一 worker 飽和時需看得到排隊中的工作
+    assert busy["active"] >= 1 and busy["queued"] >= 1
+    done = manager.stats()["cpu"]
+    assert done["completed"] == 5 and done["queued"] == 0 and done["active"] == 0
+    assert done["max_wait"] >= 0.5 and done["avg_run"] >= 0.2
+
+    try:
+        manager.run_cpu_blocking(_fail)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert manager.stats()["cpu"]["failed"] == 1
+    manager.shutdown()
+    print("test_cpu_pool_reports_queue_and_wait passed!")
+
+if __name__ == "__main__":
+    test_run_io_off_event_loop()
+    test_run_io_keeps_priority_context()
+    test_io_pool_is_bounded()
+    test_run_cpu_in_process_pool()
+    test_cpu_pool_reports_queue_and_wait()
@@ -0,0 +1,129 @@
+import os
+import csv
+import io
+import json
+import datetime
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.db.database import Base
+from app.models.persistence import TransactionHistory
+from app.services.exporter import Exporter
+from app.utils.http_cache import DataVersions
+
+def _exporter(batch_size=7):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[TransactionHistory.__table__])
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    start = datetime.date(2025, 1, 1)
+    for i in range(50):
+        db.add(TransactionHistory(account_id="ACC1" if i % 2 else "ACC2", date=start + datetime.timedelta(days=49 - i),
+                                  action="Buy", symbol="AAPL", description=f'row {i}, "quoted"', amount=float(i),
+                                  unique_id=f"u{i}"))
+    db.commit()
+    db.close()
+    return Exporter(session_factory=factory, cache_dir=tempfile.mkdtemp(), batch_size=batch_size)
+
+def test_csv_streams_in_batches():
+    exp = _exporter()
+    chunks = list(exp.iter_chunks("transactions", "csv"))
+    # 標頭 + 每批一塊 (50 列 / 每批 7 列)
+    assert len(chunks) == 8
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 50
+    assert [r["date"] for r in rows] == sorted(r["date"] for r in rows)
+    assert rows[0]["description"] == 'row 49, "quoted"'
+    print("test_csv_streams_in_batches passed!")
+
+def test_ndjson_filters():
+    exp = _exporter()
+    body = b"".join(exp.iter_chunks("transactions", "ndjson", account_hash="ACC1",
+                                    start_date=datetime.date(2025, 1, 10), end_date=datetime.date(2025, 1, 20)))
+    records = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert records and all(r["account_id"] == "ACC1" for r in records)
+    assert all("2025-01-10" <= r["date"] <= "2025-01-20" for r in records)
+    print("test_ndjson_filters passed!")
+
+def test_stream_caches_only_complete_exports():
+    exp = _exporter()
+    gen = exp.stream("k1", "transactions", "csv")
+    next(gen)
+    gen.close()
+    # 中途中斷：不留下快取或暫存檔
+    assert exp.cached("k1", "csv") is None and os.listdir(exp.cache_dir) == []
+
+    body = b"".join(exp.stream("k1", "transactions", "csv"))
+    path = exp.cached("k1", "csv")
+    assert path and open(path, "rb").read() == body
+    assert exp.materialize("k2", "transactions", "csv") == exp.cache_path("k2", "csv")
+    print("test_stream_caches_only_complete_exports passed!")
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    exp = _exporter()
+    chunks = list(exp.iter_chunks("transactions", "parquet"))
+    path = os.path.join(exp.cache_dir, "out.parquet")
+    with open(path, "wb") as f:
+        f.write(b"".join(chunks))
+    meta = pq.ParquetFile(path).metadata
+    # 每批一個 row group
+    assert meta.num_row_groups == 8
+    table = pq.read_table(path)
+    assert table.num_rows == 50
+    rows = table.to_pylist()
+    assert [r["date"] for r in rows] == sorted(r["date"] for r in rows)
+    assert isinstance(rows[0]["date"], datetime.date) and rows[0]["amount"] == 49.0
+    assert rows[0]["description"] == 'row 49, "quoted"'
+    print("test_parquet_round_trip passed!")
+
+def test_range_resume():
+    from app.api import export as export_api
+    originals = (export_api.exporter, export_api.data_versions)
+    export_api.exporter = _exporter()
+    export_api.data_versions = DataVersions()
+    export_api.data_versions.track(export_api.exporter._session_factory)
+    try:
+        _check_range_resume(export_api)
+    finally:
+        export_api.exporter, export_api.data_versions = originals
+    print("test_range_resume passed!")
+
+def _check_range_resume(export_api):
+    app = FastAPI()
+    app.include_router(export_api.router, prefix="/export")
+    client = TestClient(app)
+
+    full = client.get("/export/transactions?format=csv")
+    assert full.status_code == 200 and full.headers["accept-ranges"] == "bytes"
+    etag = full.headers["etag"]
+    assert not etag.startswith("W/")
+
+    part = client.get("/export/transactions?format=csv", headers={"Range": "bytes=100-", "If-Range": etag})
+    assert part.status_code == 206 and part.content == full.content[100:]
+    # If-Range 不符 (資料已變動)：回傳完整檔案
+    stale = client.get("/export/transactions?format=csv", headers={"Range": "bytes=100-", "If-Range": '"old"'})
+    assert stale.status_code == 200 and stale.content == full.content
+    assert client.get("/export/transactions", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/export/nope").status_code == 404
+
+    # 其他程序寫入 (不經過本程序的 Session 事件)：ETag 改變，續傳不再沿用舊快取檔
+    engine = export_api.exporter._session_factory.kw["bind"]
+    with engine.begin() as conn:
+        conn.execute(TransactionHistory.__table__.insert().values(
+            account_id="ACC1", date=datetime.date(2025, 3, 1), action="Buy", symbol="MSFT",
+            description="external", amount=1.0, unique_id="ext"))
+    resumed = client.get("/export/transactions?format=csv", headers={"Range": "bytes=100-", "If-Range": etag})
+    assert resumed.status_code == 200 and resumed.headers["etag"] != etag
+    assert b"external" in resumed.content
+
+if __name__ == "__main__":
+    test_csv_streams_in_batches()
+    test_ndjson_filters()
+    test_stream_caches_only_complete_exports()
+    test_parquet_round_trip()
+    test_range_resume()
@@ -0,0 +1,51 @@
+import datetime
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import Base
+from app.db.schema import ensure_schema
+from app.models.persistence import HoldingSnapshot
+from app.services.schwab_client import SchwabClient
+
+TODAY = datetime.date(2026, 1, 15)
+
+def _engine():
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+def _holding(symbol, market_value):
+    return {"symbol": symbol, "name": symbol, "quantity": 10, "market_value": market_value,
+            "cost_basis": 100.0, "sector": "Information Technology", "asset_type": "EQUITY"}
+
+def test_ensure_schema_adds_account_column():
+    engine = _engine()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE holding_snapshots (id INTEGER PRIMARY KEY, date DATE NOT NULL, "
+                          "symbol VARCHAR NOT NULL, quantity FLOAT NOT NULL, market_value FLOAT NOT NULL)"))
+    ensure_schema(engine)
+    ensure_schema(engine)
+    columns = {c["name"] for c in inspect(engine).get_columns("holding_snapshots")}
+    assert "account_id" in columns
+    print("test_ensure_schema_adds_account_column passed!")
+
+def test_diff_only_touches_changed_rows():
+    engine = _engine()
+    Base.metadata.create_all(bind=engine, tables=[HoldingSnapshot.__table__])
+    db = sessionmaker(bind=engine)()
+    client = SchwabClient()
+
+    client._diff_holding_snapshots(db, "ACC1", TODAY, [_holding("AAPL", 1500), _holding("MSFT", 4000)])
+    client._diff_holding_snapshots(db, "ACC2", TODAY, [_holding("AAPL", 1500)])
+    db.commit()
+
+    changes = client._diff_holding_snapshots(db, "ACC1", TODAY, [_holding("AAPL", 1500), _holding("NVDA", 900)])
+    db.commit()
+    assert changes == {"added": 1, "updated": 0, "removed": 1}
+
+    rows = sorted((r.account_id, r.symbol) for r in db.query(HoldingSnapshot).all())
+    assert rows == [("ACC1", "AAPL"), ("ACC1", "NVDA"), ("ACC2", "AAPL")]
+    db.close()
+    print("test_diff_only_touches_changed_rows passed!")
+
+if __name__ == "__main__":
+    test_ensure_schema_adds_account_column()
+    test_diff_only_touches_changed_rows()
@@ -0,0 +1,121 @@
+import os
+import datetime
+import tempfile
+from starlette.requests import Request
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import Base
+from app.models.persistence import AssetHistory
+from app.utils.http_cache import DataVersions, make_etag, etag_matches
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def _session_factory(versions):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[AssetHistory.__table__])
+    factory = sessionmaker(bind=engine)
+    versions.track(factory)
+    return factory
+
+def test_versions_bump_on_commit_only():
+    versions = DataVersions()
+    factory = _session_factory(versions)
+    before = versions.get("asset_history")
+
+    db = factory()
+    db.add(AssetHistory(date=datetime.date(2026, 1, 2), account_id="ACC1", total_value=100.0, cash_balance=10.0))
+    db.rollback()
+    assert versions.get("asset_history") == before
+
+    db.add(AssetHistory(date=datetime.date(2026, 1, 2), account_id="ACC1", total_value=100.0, cash_balance=10.0))
+    db.commit()
+    after_insert = versions.get("asset_history")
+    assert after_insert != before
+
+    # 批次刪除不經過 flush，也需要遞增版本
+    db.query(AssetHistory).filter(AssetHistory.account_id == "ACC1").delete()
+    db.commit()
+    assert versions.get("asset_history") != after_insert
+    # 讀取不影響版本
+    db.query(AssetHistory).all()
+    db.commit()
+    db.close()
+    # 資料表不存在時只有程序內計數
+    assert versions.get("dividends").endswith("dividends=0")
+    print("test_versions_bump_on_commit_only passed!")
+
+def test_versions_see_other_process_writes():
+    path = os.path.join(tempfile.mkdtemp(), "versions.db")
+    url = f"sqlite:///{path}"
+    versions = DataVersions()
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine, tables=[AssetHistory.__table__])
+    versions.track(sessionmaker(bind=engine))
+    before = versions.get("asset_history")
+    assert versions.get("asset_history") == before
+
+    # 其他程序 (匯入腳本) 透過獨立的 engine 寫入，不會觸發本程序的 Session 事件
+    other = sessionmaker(bind=create_engine(url))()
+    rows = [AssetHistory(date=datetime.date(2026, 1, d), account_id="ACC1", total_value=100.0, cash_balance=10.0)
+            for d in (2, 3)]
+    other.add_all(rows)
+    other.commit()
+    after_insert = versions.get("asset_history")
+    assert after_insert != before
+    assert make_etag("history", None, after_insert) != make_etag("history", None, before)
+
+    other.delete(rows[0])
+    other.commit()
+    other.close()
+    assert versions.get("asset_history") not in (before, after_insert)
+    print("test_versions_see_other_process_writes passed!")
+
+def test_etag_matching():
+    etag = make_etag("history", None, "v1")
+    assert etag.startswith('W/"')
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(f'"other", {etag[2:]}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request('W/"stale"'), etag)
+    assert not etag_matches(_request(), etag)
+    assert make_etag("history", "ACC1", "v1") != etag
+    print("test_etag_matching passed!")
+
+def test_risk_etag_tracks_live_beta():
+    from starlette.responses import Response
+    from app.api import analytics
+    from app.core.config import settings
+    holdings = [{"symbol": "VOO", "market_value": 1000.0}]
+    snapshot = {"accounts": [{"holdings": holdings, "total_balance": 1000.0}]}
+    originals = (analytics.fetch_beta_account_data, analytics.build_risk_metrics, settings.APP_MODE)
+    analytics.fetch_beta_account_data = lambda account_hash=None: snapshot
+    analytics.build_risk_metrics = lambda db, account_hash=None, account_data=None: {"beta": analytics.compute_beta(account_data)}
+    try:
+        response = Response()
+        assert analytics.get_risk_analysis(_request(), response, None, None) == {"beta": 1.0}
+        etag = response.headers["etag"]
+        assert analytics.get_risk_analysis(_request(etag), Response(), None, None).status_code == 304
+
+        # 持倉改變 (交易或價格變動) 而資料表未變：Beta 不同，不可回 304
+        holdings.append({"symbol": "TSLA", "market_value": 1000.0})
+        snapshot["accounts"][0]["total_balance"] = 2000.0
+        fresh = analytics.get_risk_analysis(_request(etag), Response(), None, None)
+        assert isinstance(fresh, dict) and fresh["beta"] != 1.0
+
+        # 執行中切換 MOCK / REAL 同樣使 ETag 失效
+        response = Response()
+        analytics.get_risk_analysis(_request(), response, None, None)
+        settings.APP_MODE = "REAL" if settings.APP_MODE.strip().upper() != "REAL" else "MOCK"
+        assert isinstance(analytics.get_risk_analysis(_request(response.headers["etag"]), Response(), None, None), dict)
+    finally:
+        analytics.fetch_beta_account_data, analytics.build_risk_metrics, settings.APP_MODE = originals
+    print("test_risk_etag_tracks_live_beta passed!")
+
+if __name__ == "__main__":
+    test_versions_bump_on_commit_only()
+    test_versions_see_other_process_writes()
+    test_etag_matching()
+    test_risk_etag_tracks_live_beta()
@@ -0,0 +1,30 @@
+from app.services.importer import _RecordChunker
+
+FIELDS = ["Date", "Action", "Symbol", "Amount"]
+
+def _rows(start, count):
+    return [{"Date": f"01/{(i % 28) + 1:02d}/2026", "Action": "Buy", "Symbol": f"S{i}", "Amount": str(i)} for i in range(start, start + count)]
+
+def _chunk(rows):
+    chunker = _RecordChunker(FIELDS)
+    for row in rows:
+        chunker.add(list(row.values()))
+    return chunker.finish()
+
+def test_identical_rows_same_chunks():
+    rows = _rows(0, 500)
+    assert _chunk(rows) == _chunk(rows)
+    print("test_identical_rows_same_chunks passed!")
+
+def test_prepended_rows_keep_later_chunks():
+    # 新匯出檔在最前方多了幾筆新交易，其餘區塊雜湊應保持不變
+    old = _chunk(_rows(0, 500))
+    extended = _chunk(_rows(1000, 5) + _rows(0, 500))
+    unseen = [h for h in extended if h not in set(old)]
+    assert len(old) > 3
+    assert len(unseen) == 1
+    print("test_prepended_rows_keep_later_chunks passed!")
+
+if __name__ == "__main__":
+    test_identical_rows_same_chunks()
+    test_prepended_rows_keep_later_chunks()
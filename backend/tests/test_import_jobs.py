@@ -0,0 +1,29 @@
+from app.services.import_jobs import ImportJob, ImportCancelled
+
+def test_job_progress_counters():
+    job = ImportJob("yuang_XXX323_Transactions.csv", "hash_123")
+    job.record(parsed=3, inserted=2, skipped=1)
+    job.record(errored=1)
+    info = job.to_dict()
+    assert info["status"] == "queued"
+    assert info["rows_parsed"] == 3
+    assert info["rows_inserted"] == 2
+    assert info["rows_skipped"] == 1
+    assert info["rows_errored"] == 1
+    print("test_job_progress_counters passed!")
+
+def test_job_cancel():
+    job = ImportJob("balances.csv", "hash_123")
+    job.check_cancelled()  # 未取消時不應拋出例外
+    job.cancel()
+    assert job.is_cancelled
+    try:
+        job.check_cancelled()
+        assert False, "ImportCancelled not raised"
+    except ImportCancelled:
+        pass
+    print("test_job_cancel passed!")
+
+if __name__ == "__main__":
+    test_job_progress_counters()
+    test_job_cancel()
@@ -0,0 +1,68 @@
+import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import Base
+from app.models.persistence import Dividend, TradeHistory
+import app.services.importer as importer_module
+from app.services.importer import importer_service
+
+D1 = datetime.date(2026, 1, 15)
+D2 = datetime.date(2026, 1, 16)
+
+def _tx(index, action, amount, symbol="AAPL", date=D1, quantity=0.0, price=0.0):
+    return {"index": index, "chunk": 0, "date": date, "action": action, "symbol": symbol,
+            "description": "", "amount": amount, "quantity": quantity, "price": price}
+
+def test_classify_transactions():
+    rows = [
+        _tx(0, "Qualified Dividend", 12.5),
+        _tx(1, "Qualified Dividend", 12.5),  # 檔案內相同的兩筆皆為真實紀錄
+        _tx(2, "Buy", -1500.0, quantity=10, price=150),
+        _tx(3, "Journal", 0.0),
+        _tx(4, "Buy", -10.0, date=None),
+    ]
+    existing = {"dividend": set(), "trade": {(D1, "AAPL", "BUY", 10.0, 150.0)}}
+    statuses = [s for _, _, _, s in importer_service._classify_transactions(rows, "ACC", existing)]
+    assert statuses == ["new", "new", "duplicate", "ignored", "error"]
+    print("test_classify_transactions passed!")
+
+def test_identical_trades_in_one_file_both_imported():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[Dividend.__table__, TradeHistory.__table__])
+    Session = sessionmaker(bind=engine, autoflush=False)
+    rows = [_tx(0, "Buy", -1500.0, quantity=10, price=150), _tx(1, "Buy", -1500.0, quantity=10, price=150)]
+
+    original = importer_module.SessionLocal
+    importer_module.SessionLocal = Session
+    try:
+        result = importer_service._import_transactions(rows, "ACC")
+        assert result["success"] and result["stats"]["trades"] == 2
+        # 再次匯入同一檔案：兩筆皆已存在
+        again = importer_service._import_transactions(rows, "ACC")
+        assert again["stats"]["trades"] == 0 and again["stats"]["skipped"] == 2
+    finally:
+        importer_module.SessionLocal = original
+    db = Session()
+    assert db.query(TradeHistory).count() == 2
+    db.close()
+    print("test_identical_trades_in_one_file_both_imported passed!")
+
+def test_classify_balances():
+    rows = [
+        {"chunk": 0, "date": D1, "balance": 1000.0},
+        {"chunk": 0, "date": D2, "balance": 2000.0},
+        {"chunk": 0, "date": D2, "balance": 2000.001},
+        {"chunk": 0, "date": D2, "balance": 2500.0},
+        {"chunk": 0, "date": None, "balance": 100.0},
+    ]
+    current = {D1: 900.0}
+    result = [(s, prev) for _, s, prev in importer_service._classify_balances(rows, current)]
+    assert result == [("updated", 900.0), ("new", None), ("unchanged", 2000.0), ("updated", 2000.0), ("ignored", None)]
+    assert current == {D1: 1000.0, D2: 2500.0}
+    print("test_classify_balances passed!")
+
+if __name__ == "__main__":
+    test_classify_transactions()
+    test_identical_trades_in_one_file_both_imported()
+    test_classify_balances()
@@ -0,0 +1,35 @@
+from app.services.importer import importer_service
+
+AMOUNTS = ["$1,234.56", "-500.00", "", None, '"$12.50"', "nan", "1_000", "abc", " 7 ", "-$3.2", ".5", "1,2,3"]
+DATES = ["01/15/2026", "1/5/2026", "01/15/2026 as of 01/14/2026", "2026-01-15", "invalid", "", None, '"01/15/2026"', "02/30/2026"]
+
+def test_amount_column_matches_scalar():
+    column = importer_service._parse_amount_column(AMOUNTS)
+    for value, parsed in zip(AMOUNTS, column):
+        expected = importer_service._parse_amount(value)
+        assert parsed == expected or (parsed != parsed and expected != expected), value
+    print("test_amount_column_matches_scalar passed!")
+
+def test_date_column_matches_scalar():
+    column = importer_service._parse_date_column(DATES)
+    assert column == [importer_service._parse_date(v) for v in DATES]
+    print("test_date_column_matches_scalar passed!")
+
+def test_parse_csv_short_rows():
+    content = b'"Date","Action","Symbol","Description","Quantity","Price","Fees & Comm","Amount"\n' \
+              b'"01/15/2026 as of 01/14/2026","Buy","AAPL","APPLE INC","10","$150.00","","-$1,500.00"\n' \
+              b'"01/16/2026","Qualified Dividend","MSFT"\n' \
+              b'"Transactions Total","","","","","","","-$1,500.00"\n'
+    parsed = importer_service.parse_csv(content, "X_Transactions.csv")
+    rows = parsed["rows"]
+    assert parsed["kind"] == "transactions"
+    assert [r["index"] for r in rows] == [0, 1]
+    assert rows[0]["amount"] == -1500.0 and rows[0]["price"] == 150.0
+    assert str(rows[0]["date"]) == "2026-01-15"
+    assert rows[1]["amount"] == 0.0 and rows[1]["description"] == ""
+    print("test_parse_csv_short_rows passed!")
+
+if __name__ == "__main__":
+    test_amount_column_matches_scalar()
+    test_date_column_matches_scalar()
+    test_parse_csv_short_rows()
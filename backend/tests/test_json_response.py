@@ -0,0 +1,35 @@
+import json
+import datetime
+import numpy as np
+import pandas as pd
+from app.utils.json_response import FastJSONResponse, to_columnar
+
+def test_renders_numpy_and_pandas_types():
+    content = {
+        "value": np.float64(1.5),
+        "count": np.int64(3),
+        "series": np.array([1, 2]),
+        "date": datetime.date(2026, 1, 2),
+        "stamp": pd.Timestamp("2026-01-02"),
+        "missing": float("nan"),
+    }
+    body = json.loads(FastJSONResponse(content).body)
+    assert body["value"] == 1.5 and body["count"] == 3 and body["series"] == [1, 2]
+    assert body["date"] == "2026-01-02"
+    assert body["stamp"].startswith("2026-01-02")
+    assert body["missing"] is None
+    print("test_renders_numpy_and_pandas_types passed!")
+
+def test_to_columnar_fills_missing_series():
+    rows = [
+        {"date": "2026-01-01", "total": 100.0, "ACC1": 100.0},
+        {"date": "2026-01-02", "total": 250.0, "ACC1": 110.0, "ACC2": 140.0},
+    ]
+    columnar = to_columnar(rows)
+    assert columnar["date"] == ["2026-01-01", "2026-01-02"]
+    assert columnar["series"] == {"total": [100.0, 250.0], "ACC1": [100.0, 110.0], "ACC2": [None, 140.0]}
+    print("test_to_columnar_fills_missing_series passed!")
+
+if __name__ == "__main__":
+    test_renders_numpy_and_pandas_types()
+    test_to_columnar_fills_missing_series()
@@ -0,0 +1,77 @@
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from app.utils.metrics import MetricsRegistry, begin_request, track_engine, time_job, cache_metrics, schwab_calls, job_duration
+from app.services.rate_limiter import RateLimiter, RateLimitedClient
+
+def test_render_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests_total", "Demo requests", ("route",))
+    latency = registry.histogram("demo_seconds", "Demo latency", ("route",), buckets=(0.1, 1.0))
+    requests.inc('/a"b')
+    requests.inc('/a"b', amount=2)
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, "/x")
+    # 重複註冊回傳同一個指標
+    assert registry.counter("demo_requests_total", "Demo requests", ("route",)) is requests
+
+    lines = registry.render(cache_metrics({"quote": {"hits": 3, "misses": 1}})).splitlines()
+    assert "# TYPE demo_requests_total counter" in lines
+    assert 'demo_requests_total{route="/a\\"b"} 3' in lines
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/x"} 3' in lines
+    assert 'demo_seconds_sum{route="/x"} 3.55' in lines
+    assert 'schweb_cache_hit_ratio{cache="quote"} 0.75' in lines
+    print("test_render_text_format passed!")
+
+def test_db_queries_counted_per_request():
+    engine = create_engine("sqlite://")
+    track_engine(engine)
+    stats = begin_request()
+    with engine.connect() as conn:
+        for _ in range(3):
+            conn.execute(text("SELECT 1"))
+    assert stats.queries == 3 and stats.seconds > 0
+    # 新請求重新計數
+    assert begin_request().queries == 0
+    print("test_db_queries_counted_per_request passed!")
+
+def test_schwab_calls_by_outcome():
+    class _Client:
+        def get_quotes(self, symbols):
+            return SimpleNamespace(status_code=200)
+
+        def get_account(self, account_hash):
+            return SimpleNamespace(status_code=503)
+
+        def get_orders(self):
+            raise ConnectionError("reset")
+
+    client = RateLimitedClient(_Client(), RateLimiter(rate_per_minute=6000, burst=10))
+    before = {k: schwab_calls.value(*k) for k in [("get_quotes", "ok"), ("get_account", "http_5xx"), ("get_orders", "exception")]}
+    client.get_quotes(["AAPL"])
+    client.get_account("h")
+    with pytest.raises(ConnectionError):
+        client.get_orders()
+    for key, value in before.items():
+        assert schwab_calls.value(*key) == value + 1
+    print("test_schwab_calls_by_outcome passed!")
+
+def test_time_job_records_status():
+    before = job_duration.count("demo_job", "failed")
+    with pytest.raises(RuntimeError):
+        with time_job("demo_job"):
+            raise RuntimeError("boom")
+    with time_job("demo_job") as outcome:
+        outcome["status"] = "skipped"
+    assert job_duration.count("demo_job", "failed") == before + 1
+    assert job_duration.count("demo_job", "skipped") == 1
+    print("test_time_job_records_status passed!")
+
+if __name__ == "__main__":
+    test_render_text_format()
+    test_db_queries_counted_per_request()
+    test_schwab_calls_by_outcome()
+    test_time_job_records_status()
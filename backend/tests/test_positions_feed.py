@@ -0,0 +1,48 @@
+from app.services.positions_feed import PositionsFeed
+
+def _pos(symbol, price, quantity=10):
+    return {"symbol": symbol, "price": price, "quantity": quantity, "market_value": price * quantity}
+
+def test_first_request_is_full():
+    feed = PositionsFeed()
+    result = feed.delta("ACC1", [_pos("AAPL", 100), _pos("MSFT", 300)])
+    assert result["full"] is True
+    assert [p["symbol"] for p in result["positions"]] == ["AAPL", "MSFT"]
+    print("test_first_request_is_full passed!")
+
+def test_delta_since_version():
+    feed = PositionsFeed()
+    v1 = feed.delta("ACC1", [_pos("AAPL", 100), _pos("MSFT", 300), _pos("TSLA  260116C00400000", 5)])["version"]
+    result = feed.delta("ACC1", [_pos("AAPL", 101), _pos("MSFT", 300), _pos("NVDA", 150)], since=v1)
+    assert result["full"] is False
+    assert [p["symbol"] for p in result["changed"]] == ["AAPL"]
+    assert [p["symbol"] for p in result["added"]] == ["NVDA"]
+    assert result["removed"] == ["TSLA  260116C00400000"]
+    assert result["version"] != v1
+    print("test_delta_since_version passed!")
+
+def test_unchanged_keeps_version():
+    feed = PositionsFeed()
+    v1 = feed.delta("ACC1", [_pos("AAPL", 100)])["version"]
+    result = feed.delta("ACC1", [_pos("AAPL", 100)], since=v1)
+    assert result["version"] == v1
+    assert result["changed"] == [] and result["added"] == [] and result["removed"] == []
+    print("test_unchanged_keeps_version passed!")
+
+def test_unknown_or_expired_version_is_full():
+    feed = PositionsFeed(history=2)
+    v1 = feed.delta("ACC1", [_pos("AAPL", 100)])["version"]
+    feed.delta("ACC1", [_pos("AAPL", 101)])
+    feed.delta("ACC1", [_pos("AAPL", 102)])
+    assert feed.delta("ACC1", [_pos("AAPL", 103)], since=v1)["full"] is True
+    # 其他伺服器實例 (或重啟前) 的版本也視為未知
+    assert feed.delta("ACC1", [_pos("AAPL", 103)], since="deadbeef-1")["full"] is True
+    # 不同帳戶的版本互不適用
+    assert feed.delta("ACC2", [_pos("AAPL", 103)], since=v1)["full"] is True
+    print("test_unknown_or_expired_version_is_full passed!")
+
+if __name__ == "__main__":
+    test_first_request_is_full()
+    test_delta_since_version()
+    test_unchanged_keeps_version()
+    test_unknown_or_expired_version_is_full()
@@ -0,0 +1,35 @@
+import time
+from app.services.quote_cache import QuoteCache
+
+def _fetcher(calls):
+    def fetch(symbols):
+        calls.append(list(symbols))
+        return {s: {"quote": {"lastPrice": 1.0}} for s in symbols if s != "BAD"}
+    return fetch
+
+def test_only_missing_symbols_fetched():
+    calls = []
+    cache = QuoteCache(price_ttl=60, fundamental_ttl=3600)
+    cache.get_many(["AAPL", "BRK/B"], _fetcher(calls))
+    result = cache.get_many(["aapl", "BRK.B", "MSFT"], _fetcher(calls))
+    assert calls == [["AAPL", "BRK/B"], ["MSFT"]]
+    assert set(result) == {"AAPL", "BRK.B", "MSFT"}
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    print("test_only_missing_symbols_fetched passed!")
+
+def test_field_ttl():
+    calls = []
+    cache = QuoteCache(price_ttl=0.05, fundamental_ttl=3600)
+    cache.get_many(["AAPL", "BAD"], _fetcher(calls))
+    time.sleep(0.06)
+    cache.get_many(["AAPL"], _fetcher(calls), field="fundamental")
+    assert len(calls) == 1
+    # 價格已過期，需要重新請求；無效代碼的空結果也只快取短 TTL
+    cache.get_many(["AAPL", "BAD"], _fetcher(calls), field="price")
+    assert calls[-1] == ["AAPL", "BAD"]
+    print("test_field_ttl passed!")
+
+if __name__ == "__main__":
+    test_only_missing_symbols_fetched()
+    test_field_ttl()
@@ -0,0 +1,77 @@
+import pytest
+from app.services.quote_fetcher import QuoteFetcher
+from app.services.circuit_breaker import CircuitOpenError
+
+class _Resp:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return self._data
+
+class _FakeClient:
+    def __init__(self, bad=(), flaky=0):
+        self.bad = set(bad)
+        self.flaky = flaky
+        self.calls = []
+
+    def get_quotes(self, symbols):
+        self.calls.append(list(symbols))
+        if self.flaky > 0:
+            self.flaky -= 1
+            return _Resp(503)
+        if self.bad & set(symbols):
+            return _Resp(400)
+        return _Resp(200, {s: {"quote": {"52WeekHigh": 1.0}} for s in symbols})
+
+def test_chunks_merge_results():
+    client = _FakeClient()
+    symbols = [f"S{i}" for i in range(25)]
+    quotes = QuoteFetcher(chunk_size=10, max_workers=3, backoff=0).fetch(client, symbols)
+    assert set(quotes) == set(symbols)
+    assert sorted(len(c) for c in client.calls) == [5, 10, 10]
+    print("test_chunks_merge_results passed!")
+
+def test_bad_symbol_isolated():
+    client = _FakeClient(bad={"S3"})
+    symbols = [f"S{i}" for i in range(8)]
+    quotes = QuoteFetcher(chunk_size=8, retries=0, backoff=0).fetch(client, symbols)
+    assert set(quotes) == set(symbols) - {"S3"}
+    print("test_bad_symbol_isolated passed!")
+
+def test_transient_failure_retried():
+    client = _FakeClient(flaky=1)
+    quotes = QuoteFetcher(chunk_size=10, retries=2, backoff=0).fetch(client, ["AAPL", "MSFT"])
+    assert set(quotes) == {"AAPL", "MSFT"}
+    assert len(client.calls) == 2
+    print("test_transient_failure_retried passed!")
+
+def test_outage_not_split():
+    # 上游持續 503：每個區塊只重試，不拆分
+    client = _FakeClient(flaky=10**6)
+    symbols = [f"S{i}" for i in range(100)]
+    quotes = QuoteFetcher(chunk_size=50, retries=2, backoff=0).fetch(client, symbols)
+    assert quotes == {}
+    assert len(client.calls) == 2 * 3
+    print("test_outage_not_split passed!")
+
+def test_circuit_open_raises_immediately():
+    class _OpenClient:
+        calls = 0
+
+        def get_quotes(self, symbols):
+            _OpenClient.calls += 1
+            raise CircuitOpenError("open")
+
+    with pytest.raises(CircuitOpenError):
+        QuoteFetcher(chunk_size=100, retries=2, backoff=0).fetch(_OpenClient(), [f"S{i}" for i in range(100)])
+    assert _OpenClient.calls == 1
+    print("test_circuit_open_raises_immediately passed!")
+
+if __name__ == "__main__":
+    test_chunks_merge_results()
+    test_bad_symbol_isolated()
+    test_transient_failure_retried()
+    test_outage_not_split()
+    test_circuit_open_raises_immediately()
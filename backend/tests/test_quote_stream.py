@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from app.services.event_bus import EventBus
+from app.services.fake_stream import FakeStreamClient, StreamExhausted, synthetic_ticks
+from app.services.quote_stream import QuoteStreamIngestor
+
+OPTION = "AAPL  260116C00200000"
+
+def _holdings():
+    return [
+        # 前收 100 (day_pnl = 10 * (105 - 100))，52 週高點 120
+        {"symbol": "AAPL", "asset_type": "EQUITY", "quantity": 10, "price": 105.0, "cost_basis": 900.0,
+         "market_value": 1050.0, "day_pnl": 50.0, "drawdown_pct": (105.0 - 120.0) / 120.0 * 100},
+        {"symbol": "BRK.B", "asset_type": "EQUITY", "quantity": 2, "price": 500.0, "cost_basis": 800.0,
+         "market_value": 1000.0, "day_pnl": 0.0, "drawdown_pct": None},
+        {"symbol": OPTION, "asset_type": "OPTION", "quantity": 1, "price": 3.0, "cost_basis": 250.0,
+         "market_value": 300.0, "day_pnl": 0.0, "drawdown_pct": None},
+        {"symbol": "SWVXX", "asset_type": "CASH_EQUIVALENT", "quantity": 100, "price": 1.0},
+    ]
+
+def test_tick_recomputes_pnl_and_drawdown():
+    ingestor = QuoteStreamIngestor(bus=EventBus())
+    ingestor.track_holdings("ACC1", _holdings())
+    assert ingestor.desired_symbols() == {"equity": ["AAPL", "BRK/B"], "option": [OPTION]}
+
+    ingestor.on_tick("AAPL", {"LAST_PRICE": 110.0})
+    aapl = next(p for p in ingestor.positions("ACC1") if p["symbol"] == "AAPL")
+    assert aapl["market_value"] == pytest.approx(1100.0)
+    assert aapl["total_pnl"] == pytest.approx(200.0)
+    assert aapl["day_pnl"] == pytest.approx(100.0)
+    assert aapl["drawdown_pct"] == pytest.approx((110.0 - 120.0) / 120.0 * 100)
+
+    # 新高：drawdown 歸零；選擇權以 MARK 計價並乘上合約乘數
+    ingestor.on_tick("AAPL", {"LAST_PRICE": 125.0})
+    ingestor.on_tick(OPTION, {"MARK": 4.0})
+    positions = {p["symbol"]: p for p in ingestor.positions("ACC1")}
+    assert positions["AAPL"]["drawdown_pct"] == 0
+    assert positions[OPTION]["market_value"] == pytest.approx(400.0)
+    assert ingestor.recomputed == 3
+    print("test_tick_recomputes_pnl_and_drawdown passed!")
+
+def test_replay_through_fake_stream():
+    async def main():
+        bus = EventBus()
+        sub = bus.subscribe("ACC1")
+        ingestor = QuoteStreamIngestor(bus=bus, publish_interval=0)
+        ingestor.track_holdings("ACC1", _holdings())
+        # NVDA 不在持倉中，不會被訂閱也不會送出
+        ticks = synthetic_ticks({"AAPL": 105.0, "BRK/B": 500.0, OPTION: 3.0, "NVDA": 150.0}, count=200)
+        stream = FakeStreamClient(ticks)
+        with pytest.raises(StreamExhausted):
+            await ingestor.run(stream)
+        await asyncio.sleep(0)
+        return ingestor, stream, sub
+
+    ingestor, stream, sub = asyncio.run(main())
+    assert stream.subscriptions() == {"AAPL", "BRK/B"}
+    assert ingestor.last_quote("NVDA") is None
+    assert ingestor.ticks == stream.delivered > 0
+    assert ingestor.last_quote("BRK.B") is not None
+    event = sub.queue.get_nowait()
+    assert event["type"] == "positions" and event["data"]["changed"]
+    print("test_replay_through_fake_stream passed!")
+
+def test_untracked_holdings_unsubscribe():
+    ingestor = QuoteStreamIngestor(bus=EventBus())
+    ingestor.track_holdings("ACC1", _holdings())
+    ingestor.track_holdings("ACC1", _holdings()[:1])
+    assert ingestor.desired_symbols() == {"equity": ["AAPL"], "option": []}
+    print("test_untracked_holdings_unsubscribe passed!")
+
+if __name__ == "__main__":
+    test_tick_recomputes_pnl_and_drawdown()
+    test_replay_through_fake_stream()
+    test_untracked_holdings_unsubscribe()
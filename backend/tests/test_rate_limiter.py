@@ -0,0 +1,52 @@
+import time
+import threading
+from app.services.rate_limiter import RateLimiter, RateLimitedClient, Priority, request_priority
+
+def test_burst_then_throttle():
+    limiter = RateLimiter(rate_per_minute=600, burst=3)
+    waits = [limiter.acquire() for _ in range(4)]
+    assert max(waits[:3]) < 0.05
+    assert waits[3] >= 0.05
+    print("test_burst_then_throttle passed!")
+
+def test_interactive_preempts_background():
+    limiter = RateLimiter(rate_per_minute=600, burst=1)
+    limiter.acquire()
+    order = []
+
+    def worker(priority, name):
+        limiter.acquire(priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=worker, args=(Priority.BACKGROUND, f"bg{i}")) for i in range(2)]
+    for t in threads:
+        t.start()
+    time.sleep(0.02)
+    fg = threading.Thread(target=worker, args=(Priority.INTERACTIVE, "fg"))
+    fg.start()
+    for t in threads + [fg]:
+        t.join()
+    assert order[0] == "fg"
+    assert limiter.stats()["queue_depth"] == 0
+    print("test_interactive_preempts_background passed!")
+
+def test_client_proxy_uses_context_priority():
+    class _Client:
+        class Account:
+            FIELDS = "positions"
+
+        def get_quotes(self, symbols):
+            return symbols
+
+    limiter = RateLimiter(rate_per_minute=600, burst=5)
+    client = RateLimitedClient(_Client(), limiter)
+    with request_priority(Priority.BACKGROUND):
+        assert client.get_quotes(["AAPL"]) == ["AAPL"]
+    assert client.Account.FIELDS == "positions"
+    assert limiter.stats()["by_priority"]["BACKGROUND"]["requests"] == 1
+    print("test_client_proxy_uses_context_priority passed!")
+
+if __name__ == "__main__":
+    test_burst_then_throttle()
+    test_interactive_preempts_background()
+    test_client_proxy_uses_context_priority()
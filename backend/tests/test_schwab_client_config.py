@@ -0,0 +1,34 @@
+from app.services.schwab_client import SchwabClient
+
+def test_credentials_cached_until_invalidated():
+    client = SchwabClient()
+    loads = []
+
+    def fake_refresh():
+        loads.append(1)
+        client._api_key, client._api_secret = None, None
+        client._config_loaded = True
+
+    client._refresh_config = fake_refresh
+    # 未設定憑證時也只載入一次
+    for _ in range(5):
+        assert client.api_key is None
+        assert client.api_secret is None
+    assert len(loads) == 1
+
+    client.invalidate_config()
+    client.api_key
+    assert len(loads) == 2
+    print("test_credentials_cached_until_invalidated passed!")
+
+def test_get_client_skips_token_file_scan():
+    client = SchwabClient()
+    sentinel = object()
+    client._client = sentinel
+    client._migrate_token_file_if_needed = lambda: (_ for _ in ()).throw(AssertionError("scanned token files"))
+    assert client.get_client() is sentinel
+    print("test_get_client_skips_token_file_scan passed!")
+
+if __name__ == "__main__":
+    test_credentials_cached_until_invalidated()
+    test_get_client_skips_token_file_scan()
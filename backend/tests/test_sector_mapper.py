@@ -0,0 +1,20 @@
+from app.utils.sector_mapper import canonical_symbol, get_sector
+
+def test_canonical_symbol():
+    assert canonical_symbol("brk/b") == "BRK.B"
+    assert canonical_symbol("BRK.B") == "BRK.B"
+    assert canonical_symbol(" aapl ") == "AAPL"
+    assert canonical_symbol("AAPL  240119C00150000") == "AAPL240119C00150000"
+    assert canonical_symbol("AAPL240119C00150000") == "AAPL240119C00150000"
+    assert canonical_symbol("BRK/B 240119P00400000") == "BRK.B240119P00400000"
+    print("test_canonical_symbol passed!")
+
+def test_get_sector_uses_canonical_symbol():
+    assert get_sector("BRK/B") == "Financials"
+    assert get_sector("brk.b") == "Financials"
+    assert get_sector("AAPL  240119C00150000", "OPTION") == "Options"
+    print("test_get_sector_uses_canonical_symbol passed!")
+
+if __name__ == "__main__":
+    test_canonical_symbol()
+    test_get_sector_uses_canonical_symbol()
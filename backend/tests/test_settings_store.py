@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import Base
+from app.models.persistence import SystemSetting
+from app.services.settings_store import SettingsStore
+
+def _store():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[SystemSetting.__table__])
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(SystemSetting(key="SCHWAB_API_KEY", value="key1"))
+    db.commit()
+    db.close()
+    return SettingsStore(session_factory=Session), Session
+
+def test_write_through_and_version():
+    store, Session = _store()
+    assert store.get("SCHWAB_API_KEY") == "key1"
+    store.set_many({"SCHWAB_API_KEY": "key2", "SCHWAB_REDIRECT_URI": "https://127.0.0.1"})
+    assert store.version == 1
+    db = Session()
+    assert db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_API_KEY").first().value == "key2"
+    db.close()
+    # 值未變動時不遞增版本
+    store.set("SCHWAB_API_KEY", "key2")
+    assert store.version == 1
+    print("test_write_through_and_version passed!")
+
+def test_subscribers_notified():
+    store, _ = _store()
+    events = []
+    store.subscribe(lambda changed, version: events.append((changed, version)))
+    store.set("SCHWAB_API_SECRET", "secret")
+    assert events == [({"SCHWAB_API_SECRET": "secret"}, 1)]
+    print("test_subscribers_notified passed!")
+
+if __name__ == "__main__":
+    test_write_through_and_version()
+    test_subscribers_notified()
@@ -0,0 +1,53 @@
+import datetime
+from app.services.snapshot_buffer import SnapshotBuffer
+
+DAY = datetime.date.today()
+
+def _holdings(price):
+    return [{"symbol": "AAPL", "quantity": 10, "market_value": 10 * price, "cost_basis": 1000}]
+
+def test_first_snapshot_written_then_coalesced():
+    writes = []
+    buffer = SnapshotBuffer(lambda *args: writes.append(args), flush_interval=3600)
+    buffer._thread = object()  # 模擬背景執行緒已啟動
+    buffer.submit("HASH1", 1500, 0, _holdings(150), day=DAY)
+    assert len(writes) == 1
+
+    for price in (151, 152, 153):
+        buffer.submit("HASH1", 1500 + price, 0, _holdings(price), day=DAY)
+    assert len(writes) == 1
+    buffer.flush()
+    assert len(writes) == 2
+    assert writes[-1][2] == 1653
+    print("test_first_snapshot_written_then_coalesced passed!")
+
+def test_unchanged_snapshot_skipped():
+    writes = []
+    buffer = SnapshotBuffer(lambda *args: writes.append(args))
+    buffer.submit("HASH1", 1500, 0, _holdings(150), day=DAY)
+    buffer.submit("HASH1", 1500, 0, _holdings(150), day=DAY)
+    buffer.flush()
+    assert len(writes) == 1
+    assert buffer.stats()["unchanged"] == 1
+    print("test_unchanged_snapshot_skipped passed!")
+
+def test_failed_write_retried():
+    calls = []
+
+    def writer(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    buffer = SnapshotBuffer(writer)
+    buffer.submit("HASH1", 1500, 0, _holdings(150), day=DAY)
+    assert buffer.stats()["pending"] == 1
+    buffer.flush()
+    assert len(calls) == 2
+    assert buffer.stats()["pending"] == 0
+    print("test_failed_write_retried passed!")
+
+if __name__ == "__main__":
+    test_first_snapshot_written_then_coalesced()
+    test_unchanged_snapshot_skipped()
+    test_failed_write_retried()
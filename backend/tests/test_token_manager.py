@@ -0,0 +1,126 @@
+import json
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import Base
+from app.models.persistence import SystemSetting
+from app.services.settings_store import SettingsStore
+import app.services.schwab_client as schwab_client_module
+import app.services.schwab_auth as schwab_auth
+from app.services.schwab_client import schwab_client
+from app.services.token_manager import TokenManager, token_manager
+
+def _token(expires_in):
+    return {
+        "creation_timestamp": 1700000000,
+        "token": {"access_token": "old", "refresh_token": "r1", "expires_at": int(time.time()) + expires_in}
+    }
+
+def test_cached_token_not_refreshed_early():
+    manager = TokenManager(refresh_margin=600)
+    manager.set(_token(3600))
+    assert manager.refresh_if_needed() is False
+    assert 3500 < manager.status()["expires_in"] <= 3600
+    print("test_cached_token_not_refreshed_early passed!")
+
+def test_refresh_before_expiry():
+    manager = TokenManager(refresh_margin=600)
+    manager.set(_token(120))
+    saved, applied = [], []
+    originals = (schwab_auth.refresh_schwab_token, schwab_client._save_token_to_db, schwab_client.apply_token)
+    schwab_auth.refresh_schwab_token = lambda rt: {"access_token": "new", "expires_in": 1800}
+    schwab_client._save_token_to_db = lambda data: (saved.append(data), manager.set(data))
+    schwab_client.apply_token = applied.append
+    try:
+        assert manager.refresh_if_needed() is True
+    finally:
+        schwab_auth.refresh_schwab_token, schwab_client._save_token_to_db, schwab_client.apply_token = originals
+    assert saved[0]["creation_timestamp"] == 1700000000
+    assert saved[0]["token"]["refresh_token"] == "r1"
+    assert applied[0]["access_token"] == "new"
+    assert manager.get()["token"]["access_token"] == "new"
+    print("test_refresh_before_expiry passed!")
+
+def test_failed_refresh_backs_off_and_stops_on_rejection():
+    import requests
+    manager = TokenManager(refresh_margin=600, check_interval=60, max_backoff=300)
+    token = _token(0)
+    del token["token"]["expires_at"]  # 到期時間未知：每次檢查都會嘗試換發
+    manager.set(token)
+    calls = []
+
+    def outage(rt):
+        calls.append(rt)
+        raise ConnectionError("schwab down")
+
+    def rejected(rt):
+        calls.append(rt)
+        response = requests.Response()
+        response.status_code = 400
+        response._content = b'{"error": "invalid_grant"}'
+        raise requests.HTTPError("400 Client Error", response=response)
+
+    original = schwab_auth.refresh_schwab_token
+    try:
+        schwab_auth.refresh_schwab_token = outage
+        assert manager.refresh_if_needed() is False
+        assert manager.refresh_if_needed() is False
+        assert len(calls) == 1 and 0 < manager.status()["retry_in"] <= 60
+        # 連續失敗：退避時間加倍，但不超過上限
+        manager._retry_at = 0
+        manager.refresh_if_needed()
+        assert 60 < manager.status()["retry_in"] <= 120
+
+        schwab_auth.refresh_schwab_token = rejected
+        manager._retry_at = 0
+        manager.refresh_if_needed()
+        for _ in range(5):
+            manager.refresh_if_needed()
+        assert len(calls) == 3 and manager.status()["rejected"] == "HTTP 400"
+
+        # 重新登入 (寫入新 Token) 後恢復換發
+        manager.set(token)
+        assert manager.status()["rejected"] is None and manager.status()["retry_in"] is None
+        manager.refresh_if_needed()
+        assert len(calls) == 4
+    finally:
+        schwab_auth.refresh_schwab_token = original
+    print("test_failed_refresh_backs_off_and_stops_on_rejection passed!")
+
+def test_reload_token_reads_external_write():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[SystemSetting.__table__])
+    Session = sessionmaker(bind=engine)
+    store = SettingsStore(session_factory=Session)
+    store.set("SCHWAB_TOKEN_DATA", json.dumps(_token(3600)))
+
+    original = schwab_client_module.settings_store
+    schwab_client_module.settings_store = store
+    # 不可碰觸開發者真實的 token.json (遷移會寫入測試用的 store 並將檔案改名封存)
+    schwab_client._migrate_token_file_if_needed = lambda: None
+    try:
+        token_manager.invalidate()
+        assert token_manager.get()["token"]["access_token"] == "old"
+        # 模擬其他程序 (force_import_token.py) 直接寫入資料庫
+        db = Session()
+        row = db.query(SystemSetting).filter(SystemSetting.key == "SCHWAB_TOKEN_DATA").first()
+        fresh = _token(3600)
+        fresh["token"]["access_token"] = "external"
+        row.value = json.dumps(fresh)
+        db.commit()
+        db.close()
+        assert token_manager.get()["token"]["access_token"] == "old"
+        schwab_client.reload_token()
+        assert token_manager.get()["token"]["access_token"] == "external"
+    finally:
+        schwab_client_module.settings_store = original
+        del schwab_client._migrate_token_file_if_needed
+        token_manager.invalidate()
+    print("test_reload_token_reads_external_write passed!")
+
+if __name__ == "__main__":
+    test_cached_token_not_refreshed_early()
+    test_refresh_before_expiry()
+    test_failed_refresh_backs_off_and_stops_on_rejection()
+    test_reload_token_reads_external_write()
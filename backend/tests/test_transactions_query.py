@@ -0,0 +1,65 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import Base
+from app.models.persistence import TransactionHistory, Dividend
+from app.services.transactions_query import query_transactions, InvalidCursor
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[TransactionHistory.__table__, Dividend.__table__])
+    db = sessionmaker(bind=engine)()
+    start = datetime.date(2025, 1, 1)
+    for i in range(120):
+        # 每天三筆，測試同日期以 id 排序
+        db.add(TransactionHistory(account_id="ACC1" if i % 4 else "ACC2", date=start + datetime.timedelta(days=i // 3),
+                                  action="Buy" if i % 2 else "Qualified Dividend", symbol="AAPL" if i % 3 else "MSFT",
+                                  description=f"row {i} 100% match" if i == 7 else f"row {i}", amount=float(i),
+                                  unique_id=f"u{i}"))
+    db.commit()
+    return db
+
+def test_pages_cover_all_rows_in_order():
+    db = _session()
+    seen, cursor = [], None
+    while True:
+        page = query_transactions(db, account_hash="ACC1", cursor=cursor, limit=25)
+        seen.extend((item["date"], item["id"]) for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 90 and len(set(seen)) == 90
+    assert seen == sorted(seen, reverse=True)
+    print("test_pages_cover_all_rows_in_order passed!")
+
+def test_filters():
+    db = _session()
+    page = query_transactions(db, action="Buy", symbol="msft", start_date=datetime.date(2025, 1, 10), limit=500)
+    assert page["items"] and page["next_cursor"] is None
+    assert all(i["action"] == "Buy" and i["symbol"] == "MSFT" and i["date"] >= "2025-01-10" for i in page["items"])
+    # % 為一般字元，不是萬用字元
+    assert [i["amount"] for i in query_transactions(db, q="100%")["items"]] == [7.0]
+    with pytest.raises(ValueError):
+        query_transactions(db, source="dividends", action="Buy")
+    with pytest.raises(InvalidCursor):
+        query_transactions(db, cursor="not-a-cursor")
+    print("test_filters passed!")
+
+def test_page_uses_account_date_index():
+    db = _session()
+    cursor = query_transactions(db, account_hash="ACC1", limit=10)["next_cursor"]
+    plan = " ".join(str(r[-1]) for r in db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT * FROM transaction_history WHERE account_id = 'ACC1' "
+        "AND (date, id) < ('2025-01-20', 50) ORDER BY date DESC, id DESC LIMIT 26")))
+    assert "ix_transaction_history_account_date" in plan
+    # 排序由索引提供，不需額外排序
+    assert "TEMP B-TREE" not in plan
+    assert cursor
+    print("test_page_uses_account_date_index passed!")
+
+if __name__ == "__main__":
+    test_pages_cover_all_rows_in_order()
+    test_filters()
+    test_page_uses_account_date_index()
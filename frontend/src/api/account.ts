@@ -36,6 +36,25 @@ export const getPositions = async (accountHash?: string) => {
   return response.data;
 };
 
+export interface PositionsDelta {
+  version: string;
+  since: string | null;
+  full: boolean;
+  positions?: Position[];
+  changed?: Position[];
+  added?: Position[];
+  removed?: string[];
+}
+
+// 只取得自 since 版本後的持倉變動；full=true 時 positions 為完整清單
+export const getPositionsDelta = async (accountHash?: string, since?: string): Promise<PositionsDelta> => {
+  const params: Record<string, string> = {};
+  if (accountHash) params.account_hash = accountHash;
+  if (since) params.since = since;
+  const response = await api.get('/account/positions/delta', { params });
+  return response.data;
+};
+
 export const getAssetHistory = async () => {
   const response = await api.get('/account/history');
   return response.data;
@@ -11,9 +11,28 @@ export interface HistoryResponse {
   accounts: string[];
 }
 
+export interface ColumnarHistoryResponse {
+  date: string[];
+  series: Record<string, (number | null)[]>;
+  accounts: string[];
+}
+
+// 以欄式格式傳輸 (每個序列一個陣列)，於前端還原為圖表使用的逐日物件
+export const fromColumnar = (data: ColumnarHistoryResponse): HistoryResponse => {
+  const history = data.date.map((date, i) => {
+    const point: HistoryPoint = { date, total: 0 };
+    for (const [key, values] of Object.entries(data.series)) {
+      const value = values[i];
+      if (value !== null && value !== undefined) point[key] = value;
+    }
+    return point;
+  });
+  return { history, accounts: data.accounts };
+};
+
 export const getHistoricalNetWorth = async (accountHash?: string): Promise<HistoryResponse> => {
   const response = await api.get('/analytics/history', {
-    params: { account_hash: accountHash }
+    params: { account_hash: accountHash, shape: 'columnar' }
   });
-  return response.data;
+  return fromColumnar(response.data);
 };
@@ -0,0 +1,23 @@
+import api from './client';
+import { fromColumnar, type HistoryResponse } from './analytics';
+
+export type DashboardSection = 'summary' | 'positions' | 'history' | 'risk';
+
+export interface DashboardResponse {
+  summary?: any;
+  positions?: any[];
+  history?: HistoryResponse;
+  risk?: any;
+  errors?: Record<string, string>;
+}
+
+export const getDashboard = async (accountHash?: string, fields?: DashboardSection[]): Promise<DashboardResponse> => {
+  const params: Record<string, string> = {};
+  if (accountHash) params.account_hash = accountHash;
+  if (fields && fields.length > 0) params.fields = fields.join(',');
+  params.shape = 'columnar';
+  const response = await api.get('/dashboard', { params });
+  const data = response.data;
+  if (data.history) data.history = fromColumnar(data.history);
+  return data;
+};
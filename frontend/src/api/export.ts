@@ -0,0 +1,17 @@
+export type ExportDataset = 'transactions' | 'trades' | 'dividends' | 'balances' | 'asset_history';
+export type ExportFormat = 'csv' | 'ndjson' | 'parquet';
+
+export interface ExportFilters {
+  account_hash?: string;
+  start_date?: string;
+  end_date?: string;
+}
+
+// 匯出檔案直接交給瀏覽器下載 (串流、可續傳)，不經 axios 載入記憶體
+export const getExportUrl = (dataset: ExportDataset, format: ExportFormat = 'csv', filters: ExportFilters = {}): string => {
+  const params = new URLSearchParams({ format });
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value) params.set(key, value);
+  });
+  return `/api/export/${dataset}?${params.toString()}`;
+};
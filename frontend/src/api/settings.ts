@@ -22,6 +22,41 @@ export const importCsv = async (file: File, accountHash: string) => {
   return response.data;
 };
 
+export const previewImportCsv = async (file: File, accountHash: string) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  formData.append('account_hash', accountHash);
+  formData.append('dry_run', 'true');
+  const response = await api.post('/settings/import-csv', formData, {
+    headers: {
+      'Content-Type': 'multipart/form-data',
+    },
+  });
+  return response.data;
+};
+
+export const submitImportJob = async (file: File, accountHash: string) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  formData.append('account_hash', accountHash);
+  const response = await api.post('/settings/import-jobs', formData, {
+    headers: {
+      'Content-Type': 'multipart/form-data',
+    },
+  });
+  return response.data;
+};
+
+export const getImportJob = async (jobId: string) => {
+  const response = await api.get(`/settings/import-jobs/${jobId}`);
+  return response.data;
+};
+
+export const cancelImportJob = async (jobId: string) => {
+  const response = await api.delete(`/settings/import-jobs/${jobId}`);
+  return response.data;
+};
+
 export const resetHistory = async () => {
   const response = await api.delete('/settings/reset-history');
   return response.data;
@@ -0,0 +1,38 @@
+import type { Position, PositionsDelta } from './account';
+
+export type LiveEventType = 'snapshot' | 'positions' | 'quotes' | 'job' | 'resync';
+
+export interface LiveEvent<T = any> {
+  account: string | null;
+  ts: number;
+  data: T;
+}
+
+type LiveHandlers = Partial<Record<LiveEventType, (event: LiveEvent) => void>>;
+
+// 訂閱後端 SSE 推播，回傳取消訂閱函式；斷線重連後以 resync 通知重新取得完整資料
+export const subscribeLiveEvents = (accountHash: string | undefined, handlers: LiveHandlers) => {
+  const params = accountHash ? `?account_hash=${encodeURIComponent(accountHash)}` : '';
+  const source = new EventSource(`/api/stream/events${params}`);
+  let opened = false;
+
+  source.onopen = () => {
+    if (opened) handlers.resync?.({ account: accountHash ?? null, ts: Date.now() / 1000, data: { reconnected: true } });
+    opened = true;
+  };
+  for (const [type, handler] of Object.entries(handlers)) {
+    source.addEventListener(type, (message) => handler(JSON.parse((message as MessageEvent).data)));
+  }
+  return () => source.close();
+};
+
+// 將持倉增量套用到目前的持倉清單
+export const applyPositionsDelta = (positions: Position[], delta: PositionsDelta): Position[] => {
+  if (delta.full) return delta.positions ?? [];
+  const removed = new Set(delta.removed ?? []);
+  const changed = new Map((delta.changed ?? []).map((p) => [p.symbol, p]));
+  return positions
+    .filter((p) => !removed.has(p.symbol))
+    .map((p) => changed.get(p.symbol) ?? p)
+    .concat(delta.added ?? []);
+};
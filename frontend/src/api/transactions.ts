@@ -0,0 +1,40 @@
+import api from './client';
+
+export type TransactionSource = 'history' | 'trades' | 'dividends';
+
+export interface TransactionFilters {
+  source?: TransactionSource;
+  account_hash?: string;
+  start_date?: string;
+  end_date?: string;
+  action?: string;
+  symbol?: string;
+  q?: string;
+  limit?: number;
+}
+
+export interface TransactionItem {
+  id: number;
+  source: TransactionSource;
+  date: string;
+  account_id: string | null;
+  action: string | null;
+  symbol: string | null;
+  description: string | null;
+  amount?: number;
+  quantity?: number;
+  price?: number;
+  realized_pnl?: number | null;
+}
+
+export interface TransactionPage {
+  items: TransactionItem[];
+  next_cursor: string | null;
+  limit: number;
+}
+
+// keyset 分頁：下一頁帶入上一頁回傳的 next_cursor
+export const getTransactions = async (filters: TransactionFilters = {}, cursor?: string): Promise<TransactionPage> => {
+  const response = await api.get('/transactions', { params: { ...filters, cursor } });
+  return response.data;
+};
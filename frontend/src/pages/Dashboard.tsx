@@ -1,13 +1,14 @@
 import { useState, useMemo, useEffect } from 'react'
-import { useQuery } from '@tanstack/react-query'
+import { useQuery, useQueryClient } from '@tanstack/react-query'
 import MainLayout from '../components/layout/MainLayout'
 import StatCard from '../components/dashboard/StatCard'
 import NetWorthChart from '../components/dashboard/NetWorthChart'
 import HoldingsTable from '../components/dashboard/HoldingsTable'
 import AllocationChart from '../components/dashboard/AllocationChart'
 import AccountSelector from '../components/dashboard/AccountSelector'
-import { getAccountSummary, getPositions, getAccountList } from '../api/account'
-import { getHistoricalNetWorth } from '../api/analytics'
+import { getAccountList } from '../api/account'
+import { getDashboard, type DashboardResponse } from '../api/dashboard'
+import { subscribeLiveEvents, applyPositionsDelta } from '../api/stream'
 import { useAppStore } from '../store/useAppStore'
 import { usePrivacy } from '../context/PrivacyContext'
 import { Coins, HandCoins } from 'lucide-react'
@@ -46,23 +47,35 @@ export default function Dashboard() {
 
   const queryEnabled = isLiveMode ? !!selectedAccountHash : true;
 
-  const { data: summary, isLoading: isSummaryLoading } = useQuery({
-    queryKey: ['accountSummary', selectedAccountHash],
-    queryFn: () => getAccountSummary(selectedAccountHash),
+  // 摘要、持倉與資產走勢由 /dashboard 一次取得 (後端共用同一份帳戶快照)
+  const { data: dashboard, isLoading: isDashboardLoading } = useQuery({
+    queryKey: ['dashboard', selectedAccountHash],
+    queryFn: () => getDashboard(selectedAccountHash, ['summary', 'positions', 'history']),
     enabled: queryEnabled,
-    refetchInterval: 30000,
   });
 
-  const { data: history, isLoading: isHistoryLoading } = useQuery({
-    queryKey: ['historicalNetWorth', selectedAccountHash],
-    queryFn: () => getHistoricalNetWorth(selectedAccountHash),
-  });
-
-  const { data: positions, isLoading: isPositionsLoading } = useQuery({
-    queryKey: ['accountPositions', selectedAccountHash],
-    queryFn: () => getPositions(selectedAccountHash),
-    enabled: queryEnabled,
-  });
+  // 以 SSE 推播取代輪詢：快照與持倉增量直接寫入快取，工作完成或斷線重連時才重新取得
+  const queryClient = useQueryClient();
+  useEffect(() => {
+    if (!queryEnabled) return;
+    const key = ['dashboard', selectedAccountHash];
+    const refetch = () => queryClient.invalidateQueries({ queryKey: key });
+    return subscribeLiveEvents(selectedAccountHash || undefined, {
+      snapshot: (event) => queryClient.setQueryData<DashboardResponse>(key, (old) =>
+        old && { ...old, summary: { ...old.summary, ...event.data } }),
+      positions: (event) => queryClient.setQueryData<DashboardResponse>(key, (old) =>
+        old && { ...old, positions: applyPositionsDelta(old.positions ?? [], event.data) }),
+      job: refetch,
+      resync: refetch,
+    });
+  }, [selectedAccountHash, queryEnabled, queryClient]);
+
+  const summary = dashboard?.summary;
+  const history = dashboard?.history;
+  const positions = dashboard?.positions;
+  const isSummaryLoading = isDashboardLoading;
+  const isHistoryLoading = isDashboardLoading;
+  const isPositionsLoading = isDashboardLoading;
 
   const filteredPositions = useMemo(() => {
     if (!positions) return [];